@@ -25,6 +25,10 @@ class BaseAgent(abc.ABC):
         self.index = index
         self.kwargs = kwargs
 
+        # The number of seconds a move can take before the game issues a warning,
+        # None until the game says (see `BaseAgent.setMoveWarningTime`).
+        self._moveWarningTime = None
+
     @abc.abstractmethod
     def getAction(self, state):
         """
@@ -34,6 +38,22 @@ class BaseAgent(abc.ABC):
 
         pass
 
+    def getMoveWarningTime(self):
+        """
+        Get the number of seconds this agent can take on a move before getting a warning,
+        or None if it is not known.
+        """
+
+        return self._moveWarningTime
+
+    def setMoveWarningTime(self, seconds):
+        """
+        Called by the game (before `BaseAgent.registerInitialState`)
+        with the result of the rules' `getMoveWarningTime`.
+        """
+
+        self._moveWarningTime = seconds
+
     def registerInitialState(self, state):
         """
         Inspect the starting state.
@@ -1,4 +1,5 @@
 from pacai.agents.capture.reflex import ReflexCaptureAgent
+from pacai.core import fooddistance
 
 class OffensiveReflexAgent(ReflexCaptureAgent):
     """
@@ -10,18 +11,36 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index)
 
+        # The distances to the food in the state whose actions are being evaluated.
+        self._foodDistances = None
+
+    def evaluateAll(self, gameState, actions):
+        # Every successor starts with the same food,
+        # so the distances to it are found once for all of them.
+        self._foodDistances = self._getFoodDistances(gameState)
+
+        try:
+            return super().evaluateAll(gameState, actions)
+        finally:
+            self._foodDistances = None
+
     def getFeatures(self, gameState, action):
         features = {}
         successor = self.getSuccessor(gameState, action)
         features['successorScore'] = self.getScore(successor)
 
+        foodDistances = self._foodDistances
+        if (foodDistances is None):
+            foodDistances = self._getFoodDistances(gameState)
+
         # Compute distance to the nearest food.
-        foodList = self.getFood(successor).asList()
+        myPos = successor.getAgentState(self.index).getPosition()
+        if (not successor.hasFood(int(myPos[0]), int(myPos[1]))):
+            foodDistances = foodDistances.withoutFood(myPos)
 
-        # This should always be True, but better safe than sorry.
-        if (len(foodList) > 0):
-            myPos = successor.getAgentState(self.index).getPosition()
-            minDistance = min([self.getMazeDistance(myPos, food) for food in foodList])
+        # This should always be found, but better safe than sorry.
+        minDistance = foodDistances.getDistance(myPos)
+        if (minDistance is not None):
             features['distanceToFood'] = minDistance
 
         return features
@@ -31,3 +50,7 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
             'successorScore': 100,
             'distanceToFood': -1
         }
+
+    def _getFoodDistances(self, gameState):
+        return fooddistance.getFoodDistances(gameState.getWalls(), self.getFood(gameState),
+                graph = gameState.getInitialLayout().getMazeGraph())
@@ -21,7 +21,7 @@ class ReflexCaptureAgent(CaptureAgent):
         actions = gameState.getLegalActions(self.index)
 
         start = time.time()
-        values = [self.evaluate(gameState, a) for a in actions]
+        values = self.evaluateAll(gameState, actions)
         logging.debug('evaluate() time for agent %d: %.4f' % (self.index, time.time() - start))
 
         maxValue = max(values)
@@ -54,6 +54,15 @@ class ReflexCaptureAgent(CaptureAgent):
 
         return stateEval
 
+    def evaluateAll(self, gameState, actions):
+        """
+        Returns the `ReflexCaptureAgent.evaluate` value of each action from the same state.
+        Override this (together with `ReflexCaptureAgent.evaluate`) to compute anything
+        that does not depend on the action just once.
+        """
+
+        return [self.evaluate(gameState, action) for action in actions]
+
     def getFeatures(self, gameState, action):
         """
         Returns a dict of features for the state.
@@ -17,9 +17,8 @@ class GreedyAgent(BaseAgent):
 
     def getAction(self, state):
         # Generate candidate actions
-        legal = state.getLegalPacmanActions()
-        if (Directions.STOP in legal):
-            legal.remove(Directions.STOP)
+        legal = [action for action in state.getLegalPacmanActions()
+                if (action != Directions.STOP)]
 
         successors = [(state.generateSuccessor(0, action), action) for action in legal]
         scored = [(self.evaluationFunction(state), action) for state, action in successors]
@@ -18,7 +18,7 @@ class ReinforcementAgent(ValueEstimationAgent):
             alpha = 0.5, gamma = 1, **kwargs):
         """
         Args:
-            actionFn: A function which takes a state and returns the list of legal actions.
+            actionFn: A function which takes a state and returns the (tuple of) legal actions.
             alpha: The learning rate.
             epsilon: The exploration rate.
             gamma: The discount factor.
@@ -96,6 +96,40 @@ class ReinforcementAgent(ValueEstimationAgent):
             self.accumTestRewards += self.episodeRewards
 
         self.episodesSoFar += 1
+        self._checkTrainingDone()
+
+    def recordEpisodes(self, numEpisodes, trainRewards):
+        """
+        Count training episodes that were played by copies of this agent
+        (see `pacai.core.training`) as if this agent played them.
+        """
+
+        self.accumTrainRewards += trainRewards
+        self.episodesSoFar += numEpisodes
+        self._checkTrainingDone()
+
+    def getParameters(self):
+        """
+        Get everything this agent has learned (e.g. Q-values or feature weights)
+        as a dict of numbers, where missing keys are 0.0.
+        Agents that return something other than None here (and implement
+        `ReinforcementAgent.setParameters`) can be trained with multiple processes
+        (see `pacai.core.training`).
+        """
+
+        return None
+
+    def setParameters(self, parameters):
+        """
+        Replace everything this agent has learned
+        (see `ReinforcementAgent.getParameters`).
+        The agent owns the given dict.
+        Agents whose getParameters() returns None have nothing to replace, so this does nothing.
+        """
+
+        pass
+
+    def _checkTrainingDone(self):
         if (self.episodesSoFar >= self.numTraining):
             # Take off the training wheels.
             self.epsilon = 0.0  # No exploration.
@@ -0,0 +1,367 @@
+"""
+Monte Carlo tree search (MCTS) for pacman and capture.
+"""
+
+import math
+import random
+import time
+
+from pacai.agents.base import BaseAgent
+from pacai.agents.search.multiagent import AUTO_TIME_BUDGET
+from pacai.agents.search.multiagent import DEFAULT_MOVE_WARNING_TIME
+from pacai.agents.search.multiagent import DEFAULT_TIME_FRACTION
+
+DEFAULT_EXPLORATION = 0.5
+
+# The number of plies (a move by every agent) a rollout plays before it is scored.
+DEFAULT_ROLLOUT_DEPTH = 3
+
+# How much each step away from the closest food costs in a rollout's value,
+# as a fraction of the points for eating a food.
+DEFAULT_FOOD_WEIGHT = 0.1
+
+# The most an 'auto' time budget will be, in seconds
+# (pacman's move warning time is the whole game's timeout).
+DEFAULT_MAX_TIME_BUDGET = 1.0
+
+class MonteCarloAgent(BaseAgent):
+    """
+    An agent that picks moves with Monte Carlo tree search, using UCT (UCB1 applied to trees).
+
+    Every iteration walks down the tree (picking the best child by UCT for whoever is moving),
+    adds a new node, and then plays random moves from there for a while (a rollout).
+    The score at the end of the rollout (for this agent's side) is added to every node on the way.
+    Each agent picks moves that are good for their own side,
+    so in capture, teammates maximize the value and opponents minimize it
+    (and in pacman, pacman maximizes and the ghosts minimize).
+
+    The whole search runs on a single `pacai.core.rollout.RolloutState`,
+    which is moved forward and back instead of making a successor for every move.
+
+    After moving, the agent keeps the part of the tree under the state the game actually reached,
+    so the next search does not start from scratch.
+    """
+
+    def __init__(self, index, exploration = DEFAULT_EXPLORATION,
+            rolloutDepth = DEFAULT_ROLLOUT_DEPTH, foodWeight = DEFAULT_FOOD_WEIGHT,
+            timeBudget = AUTO_TIME_BUDGET,
+            timeFraction = DEFAULT_TIME_FRACTION, maxTimeBudget = DEFAULT_MAX_TIME_BUDGET,
+            maxIterations = None, reuseTree = True, seed = None, **kwargs):
+        """
+        Args:
+            exploration: The UCT exploration constant (larger values explore more).
+            rolloutDepth: The number of plies (a move by every agent) each rollout plays.
+            foodWeight: How much each step between this agent and the closest food
+                costs in the value of a rollout, as a fraction of the points for eating a food
+                (see `MonteCarloAgent.getValue`).
+            timeBudget: The number of seconds each move can search for,
+                'auto' for a fraction (timeFraction) of the game's move warning time,
+                or None to only stop at maxIterations.
+            timeFraction: The fraction of the move warning time to use for an 'auto' budget.
+            maxTimeBudget: The most seconds an 'auto' budget can be.
+            maxIterations: The most iterations to run for each move (None for no limit).
+            reuseTree: Keep the relevant part of the tree between moves.
+            seed: A seed for the agent's own random number generator.
+        """
+
+        super().__init__(index, **kwargs)
+
+        self._exploration = float(exploration)
+        self._rolloutDepth = int(rolloutDepth)
+        self._foodWeight = float(foodWeight)
+
+        if (timeBudget is not None and timeBudget != AUTO_TIME_BUDGET):
+            timeBudget = float(timeBudget)
+            if (timeBudget <= 0.0):
+                raise ValueError('The time budget must be positive, got %f.' % (timeBudget))
+
+        if (maxIterations is not None):
+            maxIterations = int(maxIterations)
+
+        if (timeBudget is None and maxIterations is None):
+            raise ValueError('A time budget or a maximum number of iterations is required.')
+
+        self._timeBudget = timeBudget
+        self._timeFraction = float(timeFraction)
+        self._maxTimeBudget = float(maxTimeBudget)
+        self._maxIterations = maxIterations
+
+        self._reuseTree = _parseBool(reuseTree)
+        self._rng = random.Random(seed)
+
+        # The root of the last search, and the action that was taken from it.
+        self._root = None
+        self._lastAction = None
+
+        # The smallest and largest rollout values seen, to scale values into [0, 1] for UCT.
+        self._minValue = None
+        self._maxValue = None
+
+        # Stats about the last search.
+        self._lastIterations = 0
+        self._lastReused = False
+
+    def getAction(self, state):
+        rolloutState = state.getRolloutState()
+
+        root = self._findRoot(rolloutState)
+        self._lastReused = (root is not None)
+        if (root is None):
+            root = _Node(self.index, rolloutState.getLegalActions(self.index))
+
+        self._search(root, rolloutState)
+
+        # The search may not have tried anything,
+        # or (for a scared pacman ghost between cells) may not know the legal actions.
+        action = root.getMostVisitedAction()
+        if (action not in state.getLegalActions(self.index)):
+            action = self._rng.choice(state.getLegalActions(self.index))
+
+        self._root = root
+        self._lastAction = action
+
+        return action
+
+    def getLastIterations(self):
+        """
+        Get the number of iterations the last search ran.
+        """
+
+        return self._lastIterations
+
+    def getTimeBudget(self):
+        """
+        Get the number of seconds each search can take, or None if there is no time limit.
+        """
+
+        if (self._timeBudget != AUTO_TIME_BUDGET):
+            return self._timeBudget
+
+        moveWarningTime = self.getMoveWarningTime()
+        if (moveWarningTime is None):
+            moveWarningTime = DEFAULT_MOVE_WARNING_TIME
+
+        return min(moveWarningTime * self._timeFraction, self._maxTimeBudget)
+
+    def getValue(self, rolloutState):
+        """
+        Score a rollout state for this agent's side:
+        the score, minus a penalty for how far this agent is from food (if it eats food).
+        Random rollouts rarely find food that is far away, so this gives the search a direction.
+        """
+
+        value = rolloutState.getScoreFor(self.index)
+
+        if (self._foodWeight != 0.0 and not rolloutState.isOver()):
+            distance = rolloutState.getFoodDistance(self.index)
+            if (distance is not None):
+                value -= self._foodWeight * rolloutState.FOOD_POINTS * distance
+
+        return value
+
+    def reusedTree(self):
+        """
+        Check if the last search started from the tree of the search before it.
+        """
+
+        return self._lastReused
+
+    # Override
+    def registerInitialState(self, state):
+        self._root = None
+        self._lastAction = None
+        self._minValue = None
+        self._maxValue = None
+
+    def _findRoot(self, rolloutState):
+        """
+        Find the node for this state under the last search's root
+        (after the last action and one move by every other agent).
+        """
+
+        if (not self._reuseTree or self._root is None):
+            return None
+
+        child = self._root.children.get(self._lastAction)
+        if (child is None):
+            return None
+
+        signature = rolloutState.getSignature()
+
+        nodes = [child]
+        for i in range(rolloutState.getNumAgents() - 1):
+            nodes = [grandchild for node in nodes for grandchild in node.children.values()]
+
+        for node in nodes:
+            if (node.signature == signature and node.agentIndex == self.index):
+                return node
+
+        return None
+
+    def _rollout(self, rolloutState, agentIndex):
+        """
+        Play random moves from this state, and return the value where it stops.
+        The state is put back when done.
+        """
+
+        numAgents = rolloutState.getNumAgents()
+        choice = self._rng.choice
+        moves = 0
+
+        for i in range(self._rolloutDepth * numAgents):
+            if (rolloutState.isOver()):
+                break
+
+            rolloutState.apply(agentIndex, choice(rolloutState.getLegalActions(agentIndex)))
+            agentIndex = (agentIndex + 1) % numAgents
+            moves += 1
+
+        value = self.getValue(rolloutState)
+
+        for i in range(moves):
+            rolloutState.undo()
+
+        return value
+
+    def _search(self, root, rolloutState):
+        startTime = time.time()
+
+        deadline = None
+        budget = self.getTimeBudget()
+        if (budget is not None):
+            deadline = startTime + budget
+
+        numAgents = rolloutState.getNumAgents()
+        iterations = 0
+
+        while (self._maxIterations is None or iterations < self._maxIterations):
+            # Always run at least one iteration.
+            if (iterations > 0 and deadline is not None and time.time() > deadline):
+                break
+
+            iterations += 1
+
+            # Selection and expansion.
+            node = root
+            path = [root]
+
+            while (not rolloutState.isOver()):
+                agentIndex = node.agentIndex
+
+                if (len(node.untried) > 0):
+                    action = node.untried.pop(self._rng.randrange(len(node.untried)))
+                    rolloutState.apply(agentIndex, action)
+
+                    nextAgent = (agentIndex + 1) % numAgents
+                    child = _Node(nextAgent, rolloutState.getLegalActions(nextAgent),
+                            rolloutState.getSignature())
+                    node.children[action] = child
+
+                    path.append(child)
+                    break
+
+                if (len(node.children) == 0):
+                    break
+
+                action, node = self._select(node, rolloutState.isTeammate(self.index, agentIndex))
+                rolloutState.apply(agentIndex, action)
+                path.append(node)
+
+            # Simulation.
+            value = self._rollout(rolloutState, path[-1].agentIndex)
+
+            if (self._minValue is None or value < self._minValue):
+                self._minValue = value
+
+            if (self._maxValue is None or value > self._maxValue):
+                self._maxValue = value
+
+            # Backpropagation.
+            for node in path:
+                node.visits += 1
+                node.totalValue += value
+
+            for i in range(len(path) - 1):
+                rolloutState.undo()
+
+        self._lastIterations = iterations
+
+    def _select(self, node, maximize):
+        """
+        Pick the child with the best UCT score for whoever is moving at this node.
+        """
+
+        valueRange = self._maxValue - self._minValue
+        if (valueRange <= 0.0):
+            valueRange = 1.0
+
+        logVisits = math.log(node.visits)
+
+        bestScore = None
+        best = None
+
+        for (action, child) in node.children.items():
+            if (child.visits == 0):
+                return action, child
+
+            meanValue = ((child.totalValue / child.visits) - self._minValue) / valueRange
+            if (not maximize):
+                meanValue = 1.0 - meanValue
+
+            score = meanValue + self._exploration * math.sqrt(logVisits / child.visits)
+            if (bestScore is None or score > bestScore):
+                bestScore = score
+                best = (action, child)
+
+        return best
+
+class _Node(object):
+    """
+    A state in the search tree, where agentIndex is about to move.
+    """
+
+    __slots__ = ('agentIndex', 'untried', 'children', 'visits', 'totalValue', 'signature')
+
+    def __init__(self, agentIndex, actions, signature = None):
+        self.agentIndex = agentIndex
+        self.untried = list(actions)
+
+        # {action: _Node, ...}
+        self.children = {}
+
+        self.visits = 0
+        self.totalValue = 0.0
+
+        self.signature = signature
+
+    def getMostVisitedAction(self):
+        bestAction = None
+        bestVisits = -1
+
+        for (action, child) in self.children.items():
+            if (child.visits > bestVisits):
+                bestAction = action
+                bestVisits = child.visits
+
+        return bestAction
+
+def createTeam(firstIndex, secondIndex, isRed, **kwargs):
+    """
+    A capture team of two Monte Carlo agents (e.g. `--red pacai.agents.search.mcts`).
+    Any team arguments are passed to both agents.
+    """
+
+    return [
+        MonteCarloAgent(firstIndex, **kwargs),
+        MonteCarloAgent(secondIndex, **kwargs),
+    ]
+
+def _parseBool(value):
+    """
+    Agent arguments from the command line are strings.
+    """
+
+    if (isinstance(value, str)):
+        return value.lower() not in ('false', '0', 'no', '')
+
+    return bool(value)
@@ -1,19 +1,388 @@
+import time
+
 from pacai.agents.base import BaseAgent
+from pacai.core.eval import evaluateAll
+from pacai.core.search import transposition
 from pacai.util import reflection
 
+# A time budget that is a fraction of the game's move warning time.
+AUTO_TIME_BUDGET = 'auto'
+DEFAULT_TIME_FRACTION = 0.75
+
+# The move warning time to assume if the game never gave one.
+DEFAULT_MOVE_WARNING_TIME = 1.0
+
 class MultiAgentSearchAgent(BaseAgent):
     """
     A common class for all multi-agent searchers.
+
+    Every searcher gets a `pacai.core.search.transposition.TranspositionTable`
+    that lasts for a whole game (it is cleared in `MultiAgentSearchAgent.registerInitialState`).
+    Children can use it directly, or through
+    `MultiAgentSearchAgent.alphaBetaSearch` and `MultiAgentSearchAgent.expectimaxSearch`.
+    A table should only be used for one kind of search (and one evaluation function),
+    since the stored values depend on both.
+
+    Searchers that are given a time budget can use
+    `MultiAgentSearchAgent.iterativeDeepeningSearch` to search as deep as time allows.
+
+    These searches evaluate all the children of a state at the bottom of the tree together
+    (see `pacai.core.eval.evaluateAll`), so batch evaluators can share work between them.
     """
 
-    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2, **kwargs):
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2,
+            tableSize = transposition.DEFAULT_MAX_SIZE,
+            tableReplacement = transposition.REPLACE_LRU,
+            timeBudget = None, timeFraction = DEFAULT_TIME_FRACTION, maxDepth = None, **kwargs):
+        """
+        Args:
+            evalFn: The fully qualified name of the evaluation function,
+                or of an evaluator class (e.g. a `pacai.core.eval.BatchEvaluator`) to make one of.
+            depth: The number of plies to search, where a ply is one move by every agent.
+            tableSize: The number of transposition table entries, 0 disables the table.
+            tableReplacement: The transposition table replacement policy ('lru' or 'depth').
+            timeBudget: The number of seconds an iterative deepening search can take,
+                'auto' for a fraction (timeFraction) of the game's move warning time,
+                or None to always search to a fixed depth.
+            timeFraction: The fraction of the move warning time to use for an 'auto' budget.
+            maxDepth: The deepest an iterative deepening search will go.
+                Defaults to no limit with a time budget, and the tree depth without one.
+        """
+
         super().__init__(index, **kwargs)
 
         self._evaluationFunction = reflection.qualifiedImport(evalFn)
+        if (isinstance(self._evaluationFunction, type)):
+            self._evaluationFunction = self._evaluationFunction()
+
         self._treeDepth = int(depth)
 
+        self._transpositionTable = None
+        if (int(tableSize) > 0):
+            self._transpositionTable = transposition.TranspositionTable(tableSize,
+                    tableReplacement)
+
+        if (timeBudget is not None and timeBudget != AUTO_TIME_BUDGET):
+            timeBudget = float(timeBudget)
+            if (timeBudget <= 0.0):
+                raise ValueError('The time budget must be positive, got %f.' % (timeBudget))
+
+        self._timeBudget = timeBudget
+        self._timeFraction = float(timeFraction)
+
+        self._maxDepth = None
+        if (maxDepth is not None):
+            self._maxDepth = int(maxDepth)
+
+        # When the running search has to stop (see `MultiAgentSearchAgent._checkTime`).
+        self._deadline = None
+
+        # If the running search was cut off by its depth (instead of only reaching game ends).
+        self._depthLimited = False
+
+    def alphaBetaSearch(self, state, depth = None):
+        """
+        Search the minimax tree (with alpha-beta pruning) rooted at this state,
+        where this agent is maximizing and every other agent is minimizing.
+        The depth defaults to `MultiAgentSearchAgent.getTreeDepth`.
+
+        Returns (value, action).
+        """
+
+        if (depth is None):
+            depth = self._treeDepth
+
+        value, line = self._alphaBeta(state, self.index, depth, float('-inf'), float('inf'))
+        return value, _firstAction(line)
+
+    def expectimaxSearch(self, state, depth = None):
+        """
+        Search the expectimax tree rooted at this state,
+        where this agent is maximizing and every other agent chooses uniformly at random.
+        The depth defaults to `MultiAgentSearchAgent.getTreeDepth`.
+
+        Returns (value, action).
+        """
+
+        if (depth is None):
+            depth = self._treeDepth
+
+        return self._expectimax(state, self.index, depth)
+
+    def iterativeDeepeningSearch(self, state, expectimax = False):
+        """
+        Run alpha-beta (or expectimax) searches of increasing depth, starting at 1,
+        until the time budget (`MultiAgentSearchAgent.getTimeBudget`) runs out,
+        the maximum depth is reached, or a search reaches the end of the game on every line.
+        Each alpha-beta search tries the principal variation of the one before it first.
+        The first search is always allowed to finish, so there is always a result.
+
+        Returns (value, action, depth) for the deepest search that finished.
+        """
+
+        startTime = time.time()
+        budget = self.getTimeBudget()
+
+        maxDepth = self._maxDepth
+        if (maxDepth is None):
+            maxDepth = self._treeDepth if (budget is None) else float('inf')
+
+        result = None
+        principalVariation = None
+        depth = 0
+
+        try:
+            while (depth < maxDepth):
+                depth += 1
+                self._depthLimited = False
+
+                if (expectimax):
+                    value, action = self._expectimax(state, self.index, depth)
+                else:
+                    value, principalVariation = self._alphaBeta(state, self.index, depth,
+                            float('-inf'), float('inf'), principalVariation)
+                    action = _firstAction(principalVariation)
+
+                result = (value, action, depth)
+
+                if (not self._depthLimited):
+                    break
+
+                if (budget is not None):
+                    self._deadline = startTime + budget
+        except _SearchTimeout:
+            pass
+        finally:
+            self._deadline = None
+
+        return result
+
     def getEvaluationFunction(self):
         return self._evaluationFunction
 
+    def getTranspositionTable(self):
+        """
+        Get this agent's `pacai.core.search.transposition.TranspositionTable`,
+        or None if it is disabled.
+        """
+
+        return self._transpositionTable
+
+    def getTimeBudget(self):
+        """
+        Get the number of seconds an iterative deepening search can take,
+        or None if there is no time limit.
+        """
+
+        if (self._timeBudget != AUTO_TIME_BUDGET):
+            return self._timeBudget
+
+        moveWarningTime = self.getMoveWarningTime()
+        if (moveWarningTime is None):
+            moveWarningTime = DEFAULT_MOVE_WARNING_TIME
+
+        return moveWarningTime * self._timeFraction
+
     def getTreeDepth(self):
         return self._treeDepth
+
+    # Override
+    def registerInitialState(self, state):
+        # Entries from another game will never be hit again.
+        if (self._transpositionTable is not None):
+            self._transpositionTable.clear()
+
+    def _alphaBeta(self, state, agentIndex, depth, alpha, beta, principalVariation = None):
+        """
+        Returns (value, line), where line is the list of actions
+        (for this agent and the ones after it) that the value comes from.
+        If this state is on the principal variation of an earlier search,
+        then principalVariation is the rest of that variation.
+        """
+
+        self._checkTime()
+
+        if (state.isOver()):
+            return self._evaluationFunction(state), []
+
+        if (depth == 0):
+            self._depthLimited = True
+            return self._evaluationFunction(state), []
+
+        table = self._transpositionTable
+        if (table is not None):
+            value = table.probe(state, agentIndex, depth, alpha, beta)
+            if (value is not None):
+                # Whatever was below this entry might have been cut off.
+                self._depthLimited = True
+
+                bestMove = table.getBestMove(state, agentIndex)
+                return value, ([] if (bestMove is None) else [bestMove])
+
+        pvAction = _firstAction(principalVariation)
+
+        actions = self._getOrderedActions(state, agentIndex, pvAction)
+        if (len(actions) == 0):
+            return self._evaluationFunction(state), []
+
+        nextAgent, nextDepth = self._nextTurn(state, agentIndex, depth)
+        maximize = (agentIndex == self.index)
+        originalAlpha = alpha
+        originalBeta = beta
+
+        bestValue = float('-inf') if maximize else float('inf')
+        bestLine = []
+
+        leafValues = None
+        if (nextDepth == 0):
+            leafValues = self._evaluateChildren(state, agentIndex, actions)
+
+        for (i, action) in enumerate(actions):
+            if (leafValues is not None):
+                value = leafValues[i]
+                line = []
+            else:
+                childVariation = None
+                if (pvAction is not None and action == pvAction):
+                    childVariation = principalVariation[1:]
+
+                successor = state.generateSuccessor(agentIndex, action)
+                value, line = self._alphaBeta(successor, nextAgent, nextDepth, alpha, beta,
+                        childVariation)
+
+            if (maximize):
+                if (value > bestValue):
+                    bestValue = value
+                    bestLine = [action] + line
+
+                alpha = max(alpha, bestValue)
+            else:
+                if (value < bestValue):
+                    bestValue = value
+                    bestLine = [action] + line
+
+                beta = min(beta, bestValue)
+
+            if (alpha > beta):
+                break
+
+        if (table is not None):
+            if (bestValue <= originalAlpha):
+                bound = transposition.UPPER
+            elif (bestValue >= originalBeta):
+                bound = transposition.LOWER
+            else:
+                bound = transposition.EXACT
+
+            table.store(state, agentIndex, depth, bestValue, bound, _firstAction(bestLine))
+
+        return bestValue, bestLine
+
+    def _evaluateChildren(self, state, agentIndex, actions):
+        """
+        Evaluate all the children of a state in one batch, when they are all leaves.
+        This gives the same values as searching each child to depth 0.
+        """
+
+        self._checkTime()
+
+        successors = [state.generateSuccessor(agentIndex, action) for action in actions]
+
+        for successor in successors:
+            if (not successor.isOver()):
+                self._depthLimited = True
+                break
+
+        return evaluateAll(self._evaluationFunction, state, successors)
+
+    def _checkTime(self):
+        if (self._deadline is not None and time.time() > self._deadline):
+            raise _SearchTimeout()
+
+    def _expectimax(self, state, agentIndex, depth):
+        self._checkTime()
+
+        if (state.isOver()):
+            return self._evaluationFunction(state), None
+
+        if (depth == 0):
+            self._depthLimited = True
+            return self._evaluationFunction(state), None
+
+        table = self._transpositionTable
+        if (table is not None):
+            entry = table.lookup(state, agentIndex, depth)
+            if (entry is not None):
+                self._depthLimited = True
+                return entry.value, entry.bestMove
+
+        actions = state.getLegalActions(agentIndex)
+        if (len(actions) == 0):
+            return self._evaluationFunction(state), None
+
+        nextAgent, nextDepth = self._nextTurn(state, agentIndex, depth)
+
+        if (nextDepth == 0):
+            values = self._evaluateChildren(state, agentIndex, actions)
+        else:
+            values = []
+            for action in actions:
+                successor = state.generateSuccessor(agentIndex, action)
+                values.append(self._expectimax(successor, nextAgent, nextDepth)[0])
+
+        if (agentIndex == self.index):
+            bestValue = max(values)
+            bestAction = actions[values.index(bestValue)]
+        else:
+            bestValue = sum(values) / len(values)
+            bestAction = None
+
+        if (table is not None):
+            table.store(state, agentIndex, depth, bestValue, transposition.EXACT, bestAction)
+
+        return bestValue, bestAction
+
+    def _getOrderedActions(self, state, agentIndex, bestMove = None):
+        """
+        Get the legal actions, with the best move first.
+        If no best move is given, the table's best move (if any) is used.
+        """
+
+        actions = state.getLegalActions(agentIndex)
+
+        if (bestMove is None and self._transpositionTable is not None):
+            bestMove = self._transpositionTable.getBestMove(state, agentIndex)
+
+        if (bestMove is None or bestMove not in actions or actions[0] == bestMove):
+            return actions
+
+        actions = list(actions)
+        actions.remove(bestMove)
+        actions.insert(0, bestMove)
+
+        return actions
+
+    def _nextTurn(self, state, agentIndex, depth):
+        """
+        Get the agent that moves next, and the depth remaining when it does.
+        A ply ends once every agent has moved and it is this agent's turn again.
+        """
+
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        if (nextAgent == self.index):
+            depth -= 1
+
+        return nextAgent, depth
+
+class _SearchTimeout(Exception):
+    """
+    Raised to unwind a search that ran out of time.
+    """
+
+    pass
+
+def _firstAction(line):
+    if (not line):
+        return None
+
+    return line[0]
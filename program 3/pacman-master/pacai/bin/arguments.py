@@ -1,6 +1,8 @@
 import argparse
 import textwrap
+import time
 
+from pacai.core.profiler import Profiler
 from pacai.ui import view
 
 def getParser(description, name):
@@ -56,13 +58,28 @@ def getParser(description, name):
             action = 'store', type = int, default = 0,
             help = 'set how many episodes of training (suppresses output) (default: %(default)s)')
 
+    parser.add_argument('--profile', dest = 'profile',
+            action = 'store', type = str, default = None,
+            help = 'write per-agent move timings, successor counts, and engine timings\n'
+                + 'to this report (.json or .csv) (default: %(default)s)')
+
+    parser.add_argument('--profile-cprofile', dest = 'cProfile',
+            action = 'store', type = str, default = None,
+            help = 'also run cProfile and dump its stats to this path (default: %(default)s)')
+
     parser.add_argument('--record', dest = 'record',
             action = 'store', type = str, default = None,
-            help = 'writes the moves of a game to the named pickle file (default: %(default)s)')
+            help = 'stream the moves of a game to the named replay file (default: %(default)s)')
 
     parser.add_argument('--replay', dest = 'replay',
             action = 'store', type = str, default = None,
-            help = 'load a recorded pickle game file to replay (default: %(default)s)')
+            help = 'load a recorded game file to replay (default: %(default)s)')
+
+    parser.add_argument('--simulation', dest = 'simulation',
+            action = 'store_true', default = False,
+            help = 'run games in headless simulation mode: no view updates,\n'
+                + 'no move history, and no move timing\n'
+                + '(unless catching exceptions) (default: %(default)s)')
 
     parser.add_argument('--sprites', dest = 'spritesPath',
             action = 'store', type = str, default = view.DEFAULT_SPRITES,
@@ -73,3 +90,33 @@ def getParser(description, name):
             help = 'display output as text only (default: %(default)s)')
 
     return parser
+
+def getGameOptions(simulation, catchExceptions):
+    """
+    Get the `pacai.core.game.Game` options for a run.
+    In simulation mode, history and timing are only kept when something needs them
+    (recorded games are streamed by a `pacai.core.replay.ReplayWriter` instead of the history).
+    """
+
+    if (not simulation):
+        return {}
+
+    timer = None
+    if (catchExceptions):
+        timer = time.time
+
+    return {
+        'simulation': True,
+        'recordHistory': False,
+        'timer': timer,
+    }
+
+def getProfiler(options):
+    """
+    Get the `pacai.core.profiler.Profiler` asked for by the profiling options, or None.
+    """
+
+    if (options.profile is None and options.cProfile is None):
+        return None
+
+    return Profiler(reportPath = options.profile, cProfilePath = options.cProfile)
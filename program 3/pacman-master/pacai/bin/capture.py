@@ -13,14 +13,17 @@ import sys
 
 from pacai.agents import keyboard
 from pacai.agents.capture.dummy import DummyAgent
+from pacai.bin.arguments import getGameOptions
 from pacai.bin.arguments import getParser
+from pacai.bin.arguments import getProfiler
+from pacai.core import replay
 from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
-from pacai.core.grid import Grid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
+from pacai.core.rollout import RolloutState
 from pacai.ui.capture.null import CaptureNullView
 from pacai.ui.capture.text import CaptureTextView
 from pacai.util import reflection
@@ -78,18 +81,19 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueCapsules.append(capsule)
 
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        self._redFood = self._food & layout.getSideMask(True)
+        self._blueFood = self._food & layout.getSideMask(False)
 
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
+        # Running counts, so checking for the end of the game never scans the board.
+        self._redFoodCount = self._redFood.count()
+        self._blueFoodCount = self._blueFood.count()
 
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        # Like the food and capsules of the base state, each side is copied on write.
+        # But, only the side that something was eaten from is copied.
+        self._redFoodCopied = True
+        self._blueFoodCopied = True
+        self._redCapsulesCopied = True
+        self._blueCapsulesCopied = True
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -105,35 +109,70 @@ class CaptureGameState(AbstractGameState):
     # Override
     def getLegalActions(self, agentIndex = 0):
         if (self.isOver()):
-            return []
+            return ()
 
         return AgentRules.getLegalActions(self, agentIndex)
 
     # Override
     def eatCapsule(self, x, y):
-        if (not self._capsulesCopied):
-            self._redCapsules = self._redCapsules.copy()
-            self._blueCapsules = self._blueCapsules.copy()
-
-        super().eatCapsule(x, y)
+        if (not super().eatCapsule(x, y)):
+            return False
 
         if (self.isOnRedSide((x, y))):
-            self._redCapsules.remove((x, y))
+            index = self._redCapsules.index((x, y))
+            self._logChange(('redCapsule', x, y, index,
+                    self._redCapsules, self._redCapsulesCopied))
+
+            if (not self._redCapsulesCopied):
+                self._redCapsules = self._redCapsules.copy()
+                self._redCapsulesCopied = True
+
+            del self._redCapsules[index]
         else:
-            self._blueCapsules.remove((x, y))
+            index = self._blueCapsules.index((x, y))
+            self._logChange(('blueCapsule', x, y, index,
+                    self._blueCapsules, self._blueCapsulesCopied))
+
+            if (not self._blueCapsulesCopied):
+                self._blueCapsules = self._blueCapsules.copy()
+                self._blueCapsulesCopied = True
+
+            del self._blueCapsules[index]
+
+        return True
 
     # Override
     def eatFood(self, x, y):
-        if (not self._foodCopied):
-            self._redFood = self._redFood.copy()
-            self._blueFood = self._blueFood.copy()
-
-        super().eatFood(x, y)
+        if (not super().eatFood(x, y)):
+            return False
 
         if (self.isOnRedSide((x, y))):
-            self._redFood[x][y] = False
+            self._logChange(('redFood', x, y, self._redFood, self._redFoodCopied))
+
+            if (not self._redFoodCopied):
+                self._redFood = self._redFood.copy()
+                self._redFoodCopied = True
+
+            self._redFood.set(x, y, False)
+            self._redFoodCount -= 1
         else:
-            self._blueFood[x][y] = False
+            self._logChange(('blueFood', x, y, self._blueFood, self._blueFoodCopied))
+
+            if (not self._blueFoodCopied):
+                self._blueFood = self._blueFood.copy()
+                self._blueFoodCopied = True
+
+            self._blueFood.set(x, y, False)
+            self._blueFoodCount -= 1
+
+        return True
+
+    def getBlueCapsuleCount(self):
+        """
+        Get the number of capsules left on the blue side.
+        """
+
+        return len(self._blueCapsules)
 
     def getBlueCapsules(self):
         """
@@ -153,6 +192,13 @@ class CaptureGameState(AbstractGameState):
 
         return self._blueFood
 
+    def getBlueFoodCount(self):
+        """
+        Get the number of food left on the blue side (without looking at the board).
+        """
+
+        return self._blueFoodCount
+
     def getBlueTeamIndices(self):
         """
         Returns a list of the agent index numbers for the agents on the blue team.
@@ -169,6 +215,13 @@ class CaptureGameState(AbstractGameState):
 
         return self._redCapsules
 
+    def getRedCapsuleCount(self):
+        """
+        Get the number of capsules left on the red side.
+        """
+
+        return len(self._redCapsules)
+
     def getRedFood(self):
         """
         Returns a grid of food that corresponds to the food on the red team's side.
@@ -179,6 +232,13 @@ class CaptureGameState(AbstractGameState):
 
         return self._redFood
 
+    def getRedFoodCount(self):
+        """
+        Get the number of food left on the red side (without looking at the board).
+        """
+
+        return self._redFoodCount
+
     def getRedTeamIndices(self):
         """
         Returns a list of agent index numbers for the agents on the red team.
@@ -187,6 +247,10 @@ class CaptureGameState(AbstractGameState):
 
         return self._redTeam
 
+    # Override
+    def getRolloutState(self):
+        return CaptureRolloutState(self)
+
     def getTimeleft(self):
         return self._timeleft
 
@@ -215,7 +279,7 @@ class CaptureGameState(AbstractGameState):
         Red is on the left side, blue on the right.
         """
 
-        return position[0] < int(self._layout.width / 2)
+        return self._layout.isOnRedSide(position)
 
     def isOnRedTeam(self, agentIndex):
         """
@@ -224,6 +288,131 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
+    # Override
+    def _getRecord(self):
+        return (super()._getRecord(), self._timeleft)
+
+    # Override
+    def _restoreRecord(self, record):
+        record, self._timeleft = record
+        super()._restoreRecord(record)
+
+    # Override
+    def _getCheckpoint(self):
+        checkpoint = super()._getCheckpoint()
+        checkpoint['timeleft'] = self._timeleft
+
+        return checkpoint
+
+    # Override
+    def _restoreCheckpoint(self, checkpoint):
+        super()._restoreCheckpoint(checkpoint)
+
+        self._timeleft = checkpoint['timeleft']
+
+        self._redCapsules = [capsule for capsule in self._capsules if self.isOnRedSide(capsule)]
+        self._blueCapsules = [capsule for capsule in self._capsules
+                if not self.isOnRedSide(capsule)]
+
+        self._redFood = self._food & self._layout.getSideMask(True)
+        self._blueFood = self._food & self._layout.getSideMask(False)
+        self._redFoodCount = self._redFood.count()
+        self._blueFoodCount = self._blueFood.count()
+
+        self._redFoodCopied = True
+        self._blueFoodCopied = True
+        self._redCapsulesCopied = True
+        self._blueCapsulesCopied = True
+
+    @staticmethod
+    def _fromCheckpoint(layout, checkpoint):
+        """
+        Build a state from a replay checkpoint
+        (see `pacai.core.gamestate.AbstractGameState._getCheckpoint`).
+        """
+
+        state = CaptureGameState(layout, checkpoint['timeleft'])
+        state._restoreCheckpoint(checkpoint)
+
+        return state
+
+    # Override
+    def _getMoveRecord(self):
+        return (super()._getMoveRecord(), self._timeleft, self._redFoodCount, self._blueFoodCount)
+
+    # Override
+    def _restoreMoveRecord(self, record):
+        record, self._timeleft, self._redFoodCount, self._blueFoodCount = record
+        super()._restoreMoveRecord(record)
+
+    # Override
+    def _undoChange(self, change):
+        kind = change[0]
+
+        if (kind == 'redFood'):
+            kind, x, y, food, foodCopied = change
+            if (foodCopied):
+                if (not self._redFoodCopied):
+                    self._redFood = self._redFood.copy()
+                    self._redFoodCopied = True
+
+                self._redFood.set(x, y, True)
+            else:
+                self._redFood = food
+                self._redFoodCopied = False
+        elif (kind == 'blueFood'):
+            kind, x, y, food, foodCopied = change
+            if (foodCopied):
+                if (not self._blueFoodCopied):
+                    self._blueFood = self._blueFood.copy()
+                    self._blueFoodCopied = True
+
+                self._blueFood.set(x, y, True)
+            else:
+                self._blueFood = food
+                self._blueFoodCopied = False
+        elif (kind == 'redCapsule'):
+            kind, x, y, index, capsules, capsulesCopied = change
+            if (capsulesCopied):
+                if (not self._redCapsulesCopied):
+                    self._redCapsules = self._redCapsules.copy()
+                    self._redCapsulesCopied = True
+
+                self._redCapsules.insert(index, (x, y))
+            else:
+                self._redCapsules = capsules
+                self._redCapsulesCopied = False
+        elif (kind == 'blueCapsule'):
+            kind, x, y, index, capsules, capsulesCopied = change
+            if (capsulesCopied):
+                if (not self._blueCapsulesCopied):
+                    self._blueCapsules = self._blueCapsules.copy()
+                    self._blueCapsulesCopied = True
+
+                self._blueCapsules.insert(index, (x, y))
+            else:
+                self._blueCapsules = capsules
+                self._blueCapsulesCopied = False
+        else:
+            super()._undoChange(change)
+
+    # Override
+    def _initSuccessor(self):
+        successor = super()._initSuccessor()
+
+        successor._redFoodCopied = False
+        successor._blueFoodCopied = False
+        successor._redCapsulesCopied = False
+        successor._blueCapsulesCopied = False
+
+        self._redFoodCopied = False
+        self._blueFoodCopied = False
+        self._redCapsulesCopied = False
+        self._blueCapsulesCopied = False
+
+        return successor
+
+    # Override
     def _applySuccessorAction(self, agentIndex, action):
         """
         Apply the action to the context state (self).
@@ -232,7 +421,7 @@ class CaptureGameState(AbstractGameState):
         # Find appropriate rules for the agent.
         AgentRules.applyAction(self, action, agentIndex)
         AgentRules.checkDeath(self, agentIndex)
-        AgentRules.decrementTimer(self.getAgentState(agentIndex))
+        AgentRules.decrementTimer(self._getMutableAgentState(agentIndex))
 
         # Book keeping.
         self._lastAgentMoved = agentIndex
@@ -240,23 +429,185 @@ class CaptureGameState(AbstractGameState):
 
         self._hash = None
 
+class CaptureRolloutState(RolloutState):
+    """
+    A `pacai.core.rollout.RolloutState` that plays by `AgentRules`.
+    Unlike the full game (where `CaptureRules` ends it), the game is over when the time is.
+    """
+
+    FOOD_POINTS = FOOD_POINTS
+
+    def __init__(self, gameState):
+        super().__init__(gameState)
+
+        layout = gameState.getInitialLayout()
+
+        self._timeleft = gameState.getTimeleft()
+
+        # Indexed by agent.
+        self._teams = [gameState.isOnRedTeam(index) for index in range(self.getNumAgents())]
+        self._isPacman = [gameState.getAgentState(index).isPacman()
+                for index in range(self.getNumAgents())]
+        self._startIsPacman = [isPacman for (isPacman, position) in layout.agentPositions]
+
+        # Indexed by cell id.
+        self._redSide = [layout.isOnRedSide(position) for position in self._graph.getCells()]
+
+        self._redFoodCount = gameState.getRedFoodCount()
+        self._blueFoodCount = gameState.getBlueFoodCount()
+
+        # The food each team eats, as it was when this state was made.
+        self._startingRedFood = gameState.getBlueFood()
+        self._startingBlueFood = gameState.getRedFood()
+
+    # Override
+    def getLegalActions(self, agentIndex = 0):
+        if (self._gameover):
+            return ()
+
+        return self._tables.actions[self._cells[agentIndex]]
+
+    # Override
+    def getScoreFor(self, agentIndex):
+        if (self._teams[agentIndex]):
+            return self._score
+
+        return -self._score
+
+    def getTimeleft(self):
+        return self._timeleft
+
+    def isOnRedTeam(self, agentIndex):
+        return self._teams[agentIndex]
+
+    # Override
+    def isTeammate(self, agentIndex, otherIndex):
+        return self._teams[agentIndex] == self._teams[otherIndex]
+
+    # Override
+    def _applyAction(self, agentIndex, action):
+        isRed = self._teams[agentIndex]
+
+        self._move(agentIndex, action)
+        cellId = self._cells[agentIndex]
+
+        # Eat (as the agent was before the move).
+        if (self._isPacman[agentIndex]):
+            self._consume(cellId, isRed)
+
+        self._isPacman[agentIndex] = (isRed != self._redSide[cellId])
+
+        self._checkDeath(agentIndex)
+
+        if (self._scaredTimers[agentIndex] > 0):
+            self._scaredTimers[agentIndex] -= 1
+
+        self._timeleft -= 1
+        if (self._timeleft <= 0):
+            self._gameover = True
+            self._win = (self._score != 0)
+
+    def _checkDeath(self, agentIndex):
+        isRed = self._teams[agentIndex]
+        teamPointModifier = 1 if isRed else -1
+
+        for otherIndex in range(len(self._cells)):
+            # The agent may have respawned on an earlier collision.
+            isPacman = self._isPacman[agentIndex]
+
+            if (self._teams[otherIndex] == isRed or self._isPacman[otherIndex] == isPacman):
+                continue
+
+            if (self._cells[otherIndex] != self._cells[agentIndex]):
+                continue
+
+            braveGhost = (not isPacman and self._scaredTimers[agentIndex] == 0)
+            otherScaredGhost = (not self._isPacman[otherIndex]
+                    and self._scaredTimers[otherIndex] > 0)
+
+            if (braveGhost or otherScaredGhost):
+                self._score += teamPointModifier * KILL_POINTS
+                self._respawnAgent(otherIndex)
+            else:
+                self._score += teamPointModifier * -KILL_POINTS
+                self._respawnAgent(agentIndex)
+
+    def _consume(self, cellId, isRed):
+        bit = 1 << cellId
+
+        if (self._food & bit):
+            self._food ^= bit
+            self._numFood -= 1
+
+            if (self._redSide[cellId]):
+                self._redFoodCount -= 1
+            else:
+                self._blueFoodCount -= 1
+
+            if (isRed):
+                self._score += FOOD_POINTS
+            else:
+                self._score -= FOOD_POINTS
+
+            if ((isRed and self._blueFoodCount <= MIN_FOOD)
+                    or (not isRed and self._redFoodCount <= MIN_FOOD)):
+                self._gameover = True
+                self._win = True
+
+            return
+
+        # Only the other team's capsules can be eaten.
+        if ((self._capsules & bit) and self._redSide[cellId] != isRed):
+            self._capsules ^= bit
+
+            for index in range(len(self._cells)):
+                if (self._teams[index] != isRed):
+                    self._scaredTimers[index] = SCARED_TIME
+
+    # Override
+    def _getStartingFood(self, agentIndex):
+        if (self._teams[agentIndex]):
+            return self._startingRedFood
+
+        return self._startingBlueFood
+
+    def _respawnAgent(self, agentIndex):
+        self._respawn(agentIndex)
+        self._isPacman[agentIndex] = self._startIsPacman[agentIndex]
+
+    # Override
+    def _save(self):
+        return (super()._save(), tuple(self._isPacman), self._timeleft,
+                self._redFoodCount, self._blueFoodCount)
+
+    # Override
+    def _restore(self, saved):
+        saved, isPacman, self._timeleft, self._redFoodCount, self._blueFoodCount = saved
+
+        super()._restore(saved)
+        self._isPacman = list(isPacman)
+
 class CaptureRules:
     """
     These game rules manage the control flow of a game, deciding when
     and how the game starts and ends.
     """
 
-    def newGame(self, layout, agents, display, length, catchExceptions):
+    def newGame(self, layout, agents, display, length, catchExceptions, **kwargs):
+        """
+        Any additional arguments are passed to `pacai.core.game.Game`.
+        """
+
         initState = CaptureGameState(layout, length)
         starter = random.randint(0, 1)
         logging.info('%s team starts' % ['Red', 'Blue'][starter])
         game = Game(agents, display, self, startingIndex = starter,
-                catchExceptions = catchExceptions)
+                catchExceptions = catchExceptions, **kwargs)
         game.state = initState
         game.length = length
 
-        self._totalBlueFood = initState.getBlueFood().count()
-        self._totalRedFood = initState.getRedFood().count()
+        self._totalBlueFood = initState.getBlueFoodCount()
+        self._totalRedFood = initState.getRedFoodCount()
 
         return game
 
@@ -279,10 +630,10 @@ class CaptureRules:
         redWin = False
         blueWin = False
 
-        if (state.getRedFood().count() <= MIN_FOOD):
+        if (state.getRedFoodCount() <= MIN_FOOD):
             logging.info("The Blue team ate all but %d of the opponents' dots." % MIN_FOOD)
             blueWin = True
-        elif (state.getBlueFood().count() <= MIN_FOOD):
+        elif (state.getBlueFoodCount() <= MIN_FOOD):
             logging.info("The Red team ate all but %d of the opponents' dots." % MIN_FOOD)
             redWin = True
         else:
@@ -338,12 +689,17 @@ class AgentRules:
     @staticmethod
     def getLegalActions(state, agentIndex):
         """
-        Returns a list of possible actions.
+        Returns a tuple of possible actions.
         """
 
         agentState = state.getAgentState(agentIndex)
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+
+        actions = state.getInitialLayout().getLegalActions(agentState.getPosition())
+        if (actions is not None):
+            return actions
+
+        return tuple(Actions.getPossibleActions(agentState.getPosition(),
+                agentState.getDirection(), state.getWalls()))
 
     @staticmethod
     def applyAction(state, action, agentIndex):
@@ -355,7 +711,7 @@ class AgentRules:
         if (action not in legal):
             raise ValueError('Illegal action: ' + str(action))
 
-        agentState = state.getAgentState(agentIndex)
+        agentState = state._getMutableAgentState(agentIndex)
 
         # Update position.
         vector = Actions.directionToVector(action, AgentRules.AGENT_SPEED)
@@ -392,8 +748,8 @@ class AgentRules:
             else:
                 state.addScore(-FOOD_POINTS)
 
-            if ((isRed and state.getBlueFood().count() <= MIN_FOOD)
-                    or (not isRed and state.getRedFood().count() <= MIN_FOOD)):
+            if ((isRed and state.getBlueFoodCount() <= MIN_FOOD)
+                    or (not isRed and state.getRedFoodCount() <= MIN_FOOD)):
                 state.endGame(True)
 
             return
@@ -414,7 +770,7 @@ class AgentRules:
                 otherTeam = state.getRedTeamIndices()
 
             for agentIndex in otherTeam:
-                state.getAgentState(agentIndex).setScaredTimer(SCARED_TIME)
+                state._getMutableAgentState(agentIndex).setScaredTimer(SCARED_TIME)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -455,10 +811,10 @@ class AgentRules:
             # Otherwise, we are being eatten.
             if (agentState.isBraveGhost() or otherAgentState.isScaredGhost()):
                 state.addScore(teamPointModifier * KILL_POINTS)
-                otherAgentState.respawn()
+                state._getMutableAgentState(otherAgentIndex).respawn()
             else:
                 state.addScore(teamPointModifier * -KILL_POINTS)
-                agentState.respawn()
+                state._getMutableAgentState(agentIndex).respawn()
 
 #############################
 # FRAMEWORK TO START A GAME #
@@ -566,6 +922,14 @@ def readCommand(argv):
         'spritesPath': options.spritesPath,
     }
 
+    if (options.simulation):
+        if (options.gif is not None):
+            raise ValueError('Simulation mode cannot produce gifs.')
+
+        # Simulations never touch the display.
+        options.textGraphics = False
+        options.nullGraphics = True
+
     # Choose a display format.
     if options.textGraphics:
         args['display'] = CaptureTextView(**viewOptions)
@@ -619,19 +983,7 @@ def readCommand(argv):
         args['agents'][index] = agent
 
     # Choose a layout.
-    if options.layout.startswith('RANDOM'):
-        layoutSeed = None
-        if (options.layout != 'RANDOM'):
-            layoutSeed = int(options.layout[6:])
-
-        args['layout'] = Layout(generateMaze(layoutSeed).split('\n'))
-    elif options.layout.lower().find('capture') == -1:
-        raise ValueError('You must use a capture layout with capture.py.')
-    else:
-        args['layout'] = getLayout(options.layout)
-
-    if (args['layout'] is None):
-        raise ValueError('The layout ' + options.layout + ' cannot be found.')
+    args['layout'] = loadCaptureLayout(options.layout)
 
     args['length'] = options.maxMoves
     args['numGames'] = options.numGames
@@ -639,9 +991,33 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['replay'] = options.replay
+    args['simulation'] = options.simulation
+    args['profiler'] = getProfiler(options)
 
     return args
 
+def loadCaptureLayout(name):
+    """
+    Load a capture layout by name.
+    Names of the form RANDOM<seed> (or just RANDOM) will generate a random maze.
+    """
+
+    if name.startswith('RANDOM'):
+        layoutSeed = None
+        if (name != 'RANDOM'):
+            layoutSeed = int(name[6:])
+
+        layout = Layout(generateMaze(layoutSeed).split('\n'))
+    elif name.lower().find('capture') == -1:
+        raise ValueError('You must use a capture layout with capture.py.')
+    else:
+        layout = getLayout(name)
+
+    if (layout is None):
+        raise ValueError('The layout ' + name + ' cannot be found.')
+
+    return layout
+
 def loadAgents(isRed, agentModule, textgraphics, args):
     """
     Calls agent factories and returns lists of agents.
@@ -680,10 +1056,32 @@ def replayGame(layout, agents, actions, display, length, redTeamName, blueTeamNa
     display.finish()
 
 def runGames(layout, agents, display, length, numGames, record, numTraining,
-        redTeamName, blueTeamName, catchExceptions = False, **kwargs):
+        redTeamName, blueTeamName, catchExceptions = False, simulation = False, profiler = None,
+        **kwargs):
+    """
+    Play the games.
+    If there is a `pacai.core.profiler.Profiler`, the games are recorded
+    (the caller is responsible for starting and stopping it).
+    """
+
     rules = CaptureRules()
     games = []
 
+    gameOptions = getGameOptions(simulation, catchExceptions)
+
+    path = None
+    if (record):
+        path = 'replay'
+        if (isinstance(record, str)):
+            path = record
+
+    info = {
+        'agents': [agent.__class__.__name__ for agent in agents],
+        'length': length,
+        'redTeamName': redTeamName,
+        'blueTeamName': blueTeamName,
+    }
+
     nullView = None
     if (numTraining > 0):
         logging.info('Playing %d training games.' % numTraining)
@@ -698,30 +1096,25 @@ def runGames(layout, agents, display, length, numGames, record, numTraining,
         else:
             gameDisplay = display
 
-        g = rules.newGame(layout, agents, gameDisplay, length, catchExceptions)
-        g.run()
+        replayWriter = None
+        if (path is not None):
+            replayWriter = replay.ReplayWriter(path, layout, info = info)
+
+        try:
+            g = rules.newGame(layout, agents, gameDisplay, length, catchExceptions,
+                    replayWriter = replayWriter, profiler = profiler, **gameOptions)
+            g.run()
+        finally:
+            if (replayWriter is not None):
+                replayWriter.close()
 
         if (not isTraining):
             games.append(g)
 
         g.record = None
-        if record:
-            components = {
-                'layout': layout,
-                'agents': [agent.__class__.__name__ for agent in agents],
-                'actions': g.moveHistory,
-                'length': length,
-                'redTeamName': redTeamName,
-                'blueTeamName': blueTeamName
-            }
-
-            path = 'replay'
-            if (isinstance(record, str)):
-                path = record
-
-            g.record = pickle.dumps(components)
-            with open(path, 'wb') as file:
-                file.write(g.record)
+        if (path is not None):
+            with open(path, 'rb') as file:
+                g.record = file.read()
 
             logging.info("Game recorded to: '%s'." % (path))
 
@@ -757,15 +1150,28 @@ def main(argv):
         logging.info('Replaying recorded game %s.' % options['replay'])
 
         recorded = None
-        with open(options['replay'], 'rb') as file:
-            recorded = pickle.load(file)
+        if (replay.isReplayFile(options['replay'])):
+            reader = replay.ReplayReader(options['replay'])
+            recorded = dict(reader.getInfo())
+            recorded['layout'] = reader.getLayout()
+            recorded['actions'] = reader.getMoves()
+        else:
+            # Older replays are a pickled dict.
+            with open(options['replay'], 'rb') as file:
+                recorded = pickle.load(file)
 
         recorded['display'] = options['display']
         replayGame(**recorded)
 
         return
 
-    return runGames(**options)
+    profiler = options['profiler']
+    if (profiler is None):
+        return runGames(**options)
+
+    profiler.instrument(CaptureGameState)
+    with profiler:
+        return runGames(**options)
 
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -1,4 +1,5 @@
 import argparse
+import itertools
 import logging
 import os
 import random
@@ -6,8 +7,13 @@ import sys
 import textwrap
 
 from pacai.agents.learning.reinforcement import ReinforcementAgent
+from pacai.bin.arguments import getProfiler
+from pacai.core import training
 from pacai.core.environment import Environment
 from pacai.core.mdp import MarkovDecisionProcess
+from pacai.core.mdp import ValueIterationSolver
+from pacai.core.profiler import SECTION_SUCCESSOR
+from pacai.core.profiler import SECTION_VIEW
 from pacai.student.qlearningAgents import QLearningAgent
 from pacai.student.valueIterationAgent import ValueIterationAgent
 from pacai.ui.gridworld.text import TextGridworldDisplay
@@ -318,11 +324,21 @@ def getUserAction(state, actionFunction):
 
     return action
 
-def runEpisode(agent, environment, discount, decision, display, message, pause, episode):
+def runEpisode(agent, environment, discount, decision, display, message, pause, episode,
+        profiler = None):
+    """
+    Run a single episode.
+    If there is a `pacai.core.profiler.Profiler`, every step is recorded as a move by agent 0,
+    taking the action as generating a successor, and displaying the state as the view.
+    """
+
     returns = 0
     totalDiscount = 1.0
     environment.reset()
 
+    if (profiler is not None):
+        profiler.startGame([agent])
+
     if (isinstance(agent, ReinforcementAgent)):
         agent.startEpisode()
 
@@ -331,7 +347,13 @@ def runEpisode(agent, environment, discount, decision, display, message, pause,
     while True:
         # DISPLAY CURRENT STATE
         state = environment.getCurrentState()
-        display(state)
+        if (profiler is not None):
+            startTime = profiler.clock()
+            display(state)
+            profiler.addTime(SECTION_VIEW, profiler.clock() - startTime)
+        else:
+            display(state)
+
         pause()
 
         # END IF IN A TERMINAL STATE
@@ -341,12 +363,23 @@ def runEpisode(agent, environment, discount, decision, display, message, pause,
             return returns
 
         # GET ACTION (USUALLY FROM AGENT)
-        action = decision(state)
+        if (profiler is not None):
+            profiler.startMove(0)
+            action = decision(state)
+            profiler.endMove(0)
+        else:
+            action = decision(state)
+
         if (action is None):
             raise Exception('Error: Agent returned None action')
 
         # EXECUTE ACTION
-        nextState, reward = environment.doAction(action)
+        if (profiler is not None):
+            startTime = profiler.clock()
+            nextState, reward = environment.doAction(action)
+            profiler.addTime(SECTION_SUCCESSOR, profiler.clock() - startTime)
+        else:
+            nextState, reward = environment.doAction(action)
         logString = ''
         logString += '\nStarted in state: ' + str(state)
         logString += '\nTook action: ' + str(action)
@@ -447,10 +480,24 @@ def parseOptions(argv):
             action = 'store_true', default = False,
             help = 'generate no graphics (default: %(default)s)')
 
+    parser.add_argument('--profile', dest = 'profile',
+            action = 'store', type = str, default = None,
+            help = 'write step timings, transition counts, and display timings\n'
+                + 'to this report (.json or .csv) (default: %(default)s)')
+
+    parser.add_argument('--profile-cprofile', dest = 'cProfile',
+            action = 'store', type = str, default = None,
+            help = 'also run cProfile and dump its stats to this path (default: %(default)s)')
+
     parser.add_argument('--text-graphics', dest = 'textGraphics',
             action = 'store_true', default = False,
             help = 'display output as text only (default: %(default)s)')
 
+    parser.add_argument('--training-processes', dest = 'trainingProcesses',
+            action = 'store', type = int, default = 1,
+            help = 'run q-learning episodes in this many processes, merging what they learn\n'
+                + '(episodes are not displayed) (default %(default)s)')
+
     parser.add_argument('--window-size', dest = 'gridSize',
             action = 'store', type = int, default = 150,
             help = 'request a window width of X pixels *per grid cell* (default %(default)s)')
@@ -492,6 +539,17 @@ def main(argv):
 
     opts = parseOptions(argv)
 
+    profiler = getProfiler(opts)
+    if (profiler is None):
+        _run(opts, None)
+        return
+
+    # Transitions are the successors of an MDP.
+    profiler.instrument(Gridworld, 'getTransitionStatesAndProbs')
+    with profiler:
+        _run(opts, profiler)
+
+def _run(opts, profiler):
     ###########################
     # GET THE GRIDWORLD
     ###########################
@@ -561,9 +619,13 @@ def main(argv):
     # Display q/v values before simulation of episodes.
     if (not opts.manual and opts.agent == 'value'):
         if (opts.valueSteps):
-            for i in range(opts.iters):
-                tempAgent = ValueIterationAgent(0, mdp, opts.discount, i)
-                display.displayValues(tempAgent, message = 'VALUES AFTER ' + str(i) + ' ITERATIONS')
+            # A single run of value iteration, displaying the values after every sweep.
+            solver = ValueIterationSolver(mdp, opts.discount)
+            snapshots = itertools.chain([solver.getSnapshot()],
+                    solver.sweeps(opts.iters - 1, threshold = None))
+
+            for (i, snapshot) in enumerate(snapshots):
+                display.displayValues(snapshot, message = 'VALUES AFTER ' + str(i) + ' ITERATIONS')
                 display.pause()
 
         display.displayValues(a, message = 'VALUES AFTER ' + str(opts.iters) + ' ITERATIONS')
@@ -604,9 +666,18 @@ def main(argv):
         logging.debug('RUNNING ' + str(opts.episodes) + ' EPISODES')
 
     returns = 0
-    for episode in range(1, opts.episodes + 1):
-        returns += runEpisode(a, env, opts.discount, decisionCallback, displayCallback,
-                messageCallback, pauseCallback, episode)
+    if (opts.trainingProcesses > 1 and opts.agent == 'q' and not opts.manual):
+        # Every process has its own copy of the environment, and nothing is displayed.
+        noop = lambda *args: None
+        runTrainingEpisode = lambda agent: runEpisode(agent, env, opts.discount, agent.getAction,
+                noop, noop, noop, 0)
+
+        returns = sum(training.train(a, runTrainingEpisode, opts.episodes,
+                opts.trainingProcesses))
+    else:
+        for episode in range(1, opts.episodes + 1):
+            returns += runEpisode(a, env, opts.discount, decisionCallback, displayCallback,
+                    messageCallback, pauseCallback, episode, profiler = profiler)
 
     if (opts.episodes > 0):
         logging.debug('AVERAGE RETURNS FROM START STATE:' + str((returns + 0.0) / opts.episodes))
@@ -16,13 +16,19 @@ import sys
 from pacai.agents.base import BaseAgent
 from pacai.agents.ghost.random import RandomGhost
 from pacai.agents.greedy import GreedyAgent
+from pacai.agents.learning.reinforcement import ReinforcementAgent
+from pacai.bin.arguments import getGameOptions
 from pacai.bin.arguments import getParser
+from pacai.bin.arguments import getProfiler
+from pacai.core import replay
+from pacai.core import training
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
 from pacai.core.layout import getLayout
+from pacai.core.rollout import RolloutState
 from pacai.ui.pacman.null import PacmanNullView
 from pacai.ui.pacman.text import PacmanTextView
 from pacai.util.logs import initLogging
@@ -67,7 +73,7 @@ class PacmanGameState(AbstractGameState):
     # Override
     def getLegalActions(self, agentIndex = PACMAN_AGENT_INDEX):
         if (self.isOver()):
-            return []
+            return ()
 
         # Pacman's turn.
         if (agentIndex == PACMAN_AGENT_INDEX):
@@ -118,6 +124,23 @@ class PacmanGameState(AbstractGameState):
 
         return self._agentStates[PACMAN_AGENT_INDEX]
 
+    # Override
+    def getRolloutState(self):
+        return PacmanRolloutState(self)
+
+    @staticmethod
+    def _fromCheckpoint(layout, checkpoint):
+        """
+        Build a state from a replay checkpoint
+        (see `pacai.core.gamestate.AbstractGameState._getCheckpoint`).
+        """
+
+        state = PacmanGameState(layout)
+        state._restoreCheckpoint(checkpoint)
+
+        return state
+
+    # Override
     def _applySuccessorAction(self, agentIndex, action):
         """
         Apply the action to the context state (self).
@@ -134,7 +157,7 @@ class PacmanGameState(AbstractGameState):
             # Penalty for waiting around.
             self.addScore(-TIME_PENALTY)
         else:
-            GhostRules.decrementTimer(self.getAgentState(agentIndex))
+            GhostRules.decrementTimer(self._getMutableAgentState(agentIndex))
 
         # Resolve multi-agent effects.
         GhostRules.checkDeath(self, agentIndex)
@@ -144,6 +167,92 @@ class PacmanGameState(AbstractGameState):
 
         self._hash = None
 
+class PacmanRolloutState(RolloutState):
+    """
+    A `pacai.core.rollout.RolloutState` that plays by the rules below
+    (`PacmanRules` and `GhostRules`), except that scared ghosts move at full speed.
+    """
+
+    FOOD_POINTS = FOOD_POINTS
+
+    def __init__(self, gameState):
+        super().__init__(gameState)
+
+        self._startingFood = gameState.getFood()
+
+    # Override
+    def getLegalActions(self, agentIndex = PACMAN_AGENT_INDEX):
+        if (self._gameover):
+            return ()
+
+        cellId = self._cells[agentIndex]
+        if (agentIndex == PACMAN_AGENT_INDEX):
+            return self._tables.actions[cellId]
+
+        return self._tables.ghostActions[cellId][self._directions[agentIndex]]
+
+    # Override
+    def getScoreFor(self, agentIndex):
+        # The ghosts are one side, and they want pacman's score to be low.
+        if (agentIndex == PACMAN_AGENT_INDEX):
+            return self._score
+
+        return -self._score
+
+    # Override
+    def isTeammate(self, agentIndex, otherIndex):
+        return (agentIndex == PACMAN_AGENT_INDEX) == (otherIndex == PACMAN_AGENT_INDEX)
+
+    # Override
+    def _applyAction(self, agentIndex, action):
+        self._move(agentIndex, action)
+        cellId = self._cells[agentIndex]
+
+        if (agentIndex == PACMAN_AGENT_INDEX):
+            bit = 1 << cellId
+            if (self._food & bit):
+                self._food ^= bit
+                self._numFood -= 1
+                self._score += FOOD_POINTS
+
+                if (self._numFood == 0):
+                    self._score += BOARD_CLEAR_POINTS
+                    self._gameover = True
+                    self._win = True
+            elif (self._capsules & bit):
+                self._capsules ^= bit
+
+                for index in range(1, len(self._cells)):
+                    self._scaredTimers[index] = SCARED_TIME
+
+            self._score -= TIME_PENALTY
+
+            for index in range(1, len(self._cells)):
+                if (self._cells[index] == cellId):
+                    self._collide(index)
+        else:
+            if (self._scaredTimers[agentIndex] > 0):
+                self._scaredTimers[agentIndex] -= 1
+
+            if (self._cells[PACMAN_AGENT_INDEX] == cellId):
+                self._collide(agentIndex)
+
+    # Override
+    def _getStartingFood(self, agentIndex):
+        if (agentIndex != PACMAN_AGENT_INDEX):
+            return None
+
+        return self._startingFood
+
+    def _collide(self, ghostIndex):
+        if (self._scaredTimers[ghostIndex] > 0):
+            self._score += GHOST_POINTS
+            self._respawn(ghostIndex)
+        elif (not self._gameover):
+            self._score += LOSE_POINTS
+            self._gameover = True
+            self._win = False
+
 class ClassicGameRules(object):
     """
     These game rules manage the control flow of a game, deciding when
@@ -153,10 +262,15 @@ class ClassicGameRules(object):
     def __init__(self, timeout = 30):
         self.timeout = timeout
 
-    def newGame(self, layout, pacmanAgent, ghostAgents, display, catchExceptions = False):
+    def newGame(self, layout, pacmanAgent, ghostAgents, display, catchExceptions = False,
+            **kwargs):
+        """
+        Any additional arguments are passed to `pacai.core.game.Game`.
+        """
+
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = PacmanGameState(layout)
-        game = Game(agents, display, self, catchExceptions = catchExceptions)
+        game = Game(agents, display, self, catchExceptions = catchExceptions, **kwargs)
         game.state = initState
 
         self._initialFoodCount = initState.getNumFood()
@@ -213,12 +327,17 @@ class PacmanRules:
     @staticmethod
     def getLegalActions(state):
         """
-        Returns a list of possible actions.
+        Returns a tuple of possible actions.
         """
 
         agentState = state.getPacmanState()
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+
+        actions = state.getInitialLayout().getLegalActions(agentState.getPosition())
+        if (actions is not None):
+            return actions
+
+        return tuple(Actions.getPossibleActions(agentState.getPosition(),
+                agentState.getDirection(), state.getWalls()))
 
     @staticmethod
     def applyAction(state, action):
@@ -230,7 +349,7 @@ class PacmanRules:
         if (action not in legal):
             raise ValueError('Illegal pacman action: ' + str(action))
 
-        pacmanState = state.getPacmanState()
+        pacmanState = state._getMutableAgentState(PACMAN_AGENT_INDEX)
 
         # Update position.
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -260,8 +379,8 @@ class PacmanRules:
             state.eatCapsule(x, y)
 
             # Reset all ghosts' scared timers.
-            for ghostState in state.getGhostStates():
-                ghostState.setScaredTimer(SCARED_TIME)
+            for index in state.getGhostIndexes():
+                state._getMutableAgentState(index).setScaredTimer(SCARED_TIME)
 
 class GhostRules:
     """
@@ -275,9 +394,17 @@ class GhostRules:
         """
         Ghosts cannot stop, and cannot turn around unless they
         reach a dead end, but can turn 90 degrees at intersections.
+        Returns a tuple of possible actions.
         """
 
         agentState = state.getGhostState(ghostIndex)
+
+        actions = state.getInitialLayout().getLegalGhostActions(agentState.getPosition(),
+                agentState.getDirection())
+        if (actions is not None):
+            return actions
+
+        # Scared ghosts move at half speed, so they may be between cells.
         possibleActions = Actions.getPossibleActions(agentState.getPosition(),
                 agentState.getDirection(), state.getWalls())
         reverse = Actions.reverseDirection(agentState.getDirection())
@@ -288,7 +415,7 @@ class GhostRules:
         if (reverse in possibleActions and len(possibleActions) > 1):
             possibleActions.remove(reverse)
 
-        return possibleActions
+        return tuple(possibleActions)
 
     @staticmethod
     def applyAction(state, action, ghostIndex):
@@ -296,7 +423,7 @@ class GhostRules:
         if (action not in legal):
             raise ValueError('Illegal ghost action: ' + str(action))
 
-        ghostState = state.getGhostState(ghostIndex)
+        ghostState = state._getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if (ghostState.isScared()):
             speed /= 2.0
@@ -341,7 +468,7 @@ class GhostRules:
         if (ghostState.isScared()):
             # Pacman ate a ghost.
             state.addScore(GHOST_POINTS)
-            ghostState.respawn()
+            state._getMutableAgentState(agentIndex).respawn()
         elif (not state.isOver()):
             # A ghost ate pacman.
             state.addScore(LOSE_POINTS)
@@ -410,6 +537,11 @@ def readCommand(argv):
             help = 'comma separated arguments to be passed to agents (e.g. \'opt1=val1,opt2\')'
                 + '(default: %(default)s)')
 
+    parser.add_argument('--training-processes', dest = 'trainingProcesses',
+            action = 'store', type = int, default = 1,
+            help = 'play training games in this many processes, merging what they learn\n'
+                + '(reinforcement agents only) (default: %(default)s)')
+
     parser.add_argument('--timeout', dest = 'timeout',
             action = 'store', type = int, default = 30,
             help = 'maximum time limit (seconds) an agent can spend computing per game '
@@ -465,6 +597,13 @@ def readCommand(argv):
         'spritesPath': options.spritesPath,
     }
 
+    if (options.simulation):
+        if (options.gif is not None):
+            raise ValueError('Simulation mode cannot produce gifs.')
+
+        # Simulations never touch the display.
+        options.nullGraphics = True
+
     # Choose a display format.
     if options.nullGraphics:
         args['display'] = PacmanNullView(**viewOptions)
@@ -483,8 +622,11 @@ def readCommand(argv):
     args['ghosts'] = [BaseAgent.loadAgent(options.ghost, i + 1) for i in range(options.numGhosts)]
     args['numGames'] = options.numGames
     args['pacman'] = BaseAgent.loadAgent(options.pacman, PACMAN_AGENT_INDEX, agentOpts)
+    args['profiler'] = getProfiler(options)
     args['record'] = options.record
+    args['simulation'] = options.simulation
     args['timeout'] = options.timeout
+    args['trainingProcesses'] = options.trainingProcesses
 
     return args
 
@@ -512,16 +654,49 @@ def replayGame(layout, actions, display):
     display.finish()
 
 def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraining = 0,
-        catchExceptions = False, timeout = 30, **kwargs):
+        catchExceptions = False, timeout = 30, simulation = False, trainingProcesses = 1,
+        profiler = None, **kwargs):
+    """
+    Play the games.
+    If there is a `pacai.core.profiler.Profiler`, the games played in this process are recorded
+    (the caller is responsible for starting and stopping it).
+    """
+
     rules = ClassicGameRules(timeout)
     games = []
 
+    gameOptions = getGameOptions(simulation, catchExceptions)
+
+    path = None
+    if (record):
+        path = 'pacman.replay'
+        if (isinstance(record, str)):
+            path = record
+
     nullView = None
     if (numTraining > 0):
         logging.info('Playing %d training games.' % numTraining)
         nullView = PacmanNullView()
 
-    for i in range(numGames):
+    firstGame = 0
+    if (numTraining > 0 and trainingProcesses > 1):
+        if (not isinstance(pacman, ReinforcementAgent)):
+            raise ValueError('Only reinforcement agents can train with multiple processes.')
+
+        def runTrainingGame(agent):
+            game = rules.newGame(layout, agent, ghosts, nullView, catchExceptions, **gameOptions)
+            game.run()
+
+            return game.state.getScore()
+
+        numTrainingGames = min(numTraining, numGames)
+        logging.info('Training with %d processes.' % (trainingProcesses))
+        training.train(pacman, runTrainingGame, numTrainingGames, trainingProcesses,
+                sharedObjects = [layout])
+
+        firstGame = numTrainingGames
+
+    for i in range(firstGame, numGames):
         isTraining = (i < numTraining)
 
         if (isTraining):
@@ -530,21 +705,21 @@ def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraini
         else:
             gameDisplay = display
 
-        game = rules.newGame(layout, pacman, ghosts, gameDisplay, catchExceptions)
-        game.run()
+        replayWriter = None
+        if (path is not None):
+            replayWriter = replay.ReplayWriter(path, layout)
+
+        try:
+            game = rules.newGame(layout, pacman, ghosts, gameDisplay, catchExceptions,
+                    replayWriter = replayWriter, profiler = profiler, **gameOptions)
+            game.run()
+        finally:
+            if (replayWriter is not None):
+                replayWriter.close()
 
         if (not isTraining):
             games.append(game)
 
-        if (record):
-            path = 'pacman.replay'
-            if (isinstance(record, str)):
-                path = record
-
-            components = {'layout': layout, 'actions': game.moveHistory}
-            with open(path, 'wb') as file:
-                pickle.dump(components, file)
-
     if ((numGames - numTraining) > 0):
         scores = [game.state.getScore() for game in games]
         wins = [game.state.isWin() for game in games]
@@ -572,15 +747,26 @@ def main(argv):
         logging.info('Replaying recorded game %s.' % args['gameToReplay'])
 
         recorded = None
-        with open(args['gameToReplay'], 'rb') as file:
-            recorded = pickle.load(file)
+        if (replay.isReplayFile(args['gameToReplay'])):
+            reader = replay.ReplayReader(args['gameToReplay'])
+            recorded = {'layout': reader.getLayout(), 'actions': reader.getMoves()}
+        else:
+            # Older replays are a pickled dict.
+            with open(args['gameToReplay'], 'rb') as file:
+                recorded = pickle.load(file)
 
         recorded['display'] = args['display']
         replayGame(**recorded)
 
         return
 
-    return runGames(**args)
+    profiler = args['profiler']
+    if (profiler is None):
+        return runGames(**args)
+
+    profiler.instrument(PacmanGameState)
+    with profiler:
+        return runGames(**args)
 
 if __name__ == '__main__':
     main(sys.argv[1:])
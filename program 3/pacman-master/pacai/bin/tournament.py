@@ -0,0 +1,339 @@
+"""
+Run a round robin tournament of capture games between several teams.
+
+Every ordered pair of teams (so each team plays both red and blue) plays one game
+on every layout with every seed.
+Games are independent, so they are spread across a pool of worker processes
+(one game per worker process).
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import textwrap
+
+from pacai.bin import capture
+from pacai.core import replay
+from pacai.util.logs import initLogging
+from pacai.util.logs import updateLoggingLevel
+
+DEFAULT_LAYOUTS = ['defaultCapture']
+DEFAULT_SEEDS = [0]
+DEFAULT_TEAMS = ['pacai.core.baselineTeam', 'pacai.student.myTeam']
+
+def runTournament(teams, layouts, seeds, length = 1200, numWorkers = None,
+        catchExceptions = True, workerLoggingLevel = logging.WARNING, replayDir = None):
+    """
+    Play all the games in the tournament and return a list of per-game results
+    (see `playGame`), in schedule order.
+    If a replay directory is given, every game is recorded there (see `pacai.core.replay`).
+    """
+
+    schedule = buildSchedule(teams, layouts, seeds, length, catchExceptions, workerLoggingLevel,
+            replayDir)
+
+    if (numWorkers is None):
+        numWorkers = multiprocessing.cpu_count()
+    numWorkers = max(1, min(numWorkers, len(schedule)))
+
+    logging.info('Playing %d games with %d workers.' % (len(schedule), numWorkers))
+
+    # Each worker process only ever plays a single game,
+    # so no agent state (or leaked memory) carries over between games.
+    results = []
+    with multiprocessing.Pool(processes = numWorkers, maxtasksperchild = 1) as pool:
+        for result in pool.imap_unordered(playGame, schedule):
+            logging.info('Finished game %d: %s (red) vs %s (blue) on %s (seed %d), score %d.' %
+                    (result['id'], result['red'], result['blue'], result['layout'],
+                    result['seed'], result['score']))
+            results.append(result)
+
+    results.sort(key = lambda result: result['id'])
+    return results
+
+def buildSchedule(teams, layouts, seeds, length, catchExceptions,
+        workerLoggingLevel = logging.WARNING, replayDir = None):
+    """
+    Build a list of games, one for every (red, blue, layout, seed) combination.
+    """
+
+    schedule = []
+
+    for red in teams:
+        for blue in teams:
+            if (red == blue):
+                continue
+
+            for layout in layouts:
+                for seed in seeds:
+                    replayPath = None
+                    if (replayDir is not None):
+                        replayPath = os.path.join(replayDir, 'game-%05d.replay' % (len(schedule)))
+
+                    schedule.append({
+                        'id': len(schedule),
+                        'red': red,
+                        'blue': blue,
+                        'layout': layout,
+                        'seed': seed,
+                        'length': length,
+                        'catchExceptions': catchExceptions,
+                        'loggingLevel': workerLoggingLevel,
+                        'replayPath': replayPath,
+                    })
+
+    return schedule
+
+def playGame(game):
+    """
+    Play a single scheduled game (an entry from `buildSchedule`).
+    This is run inside of a worker process.
+
+    Returns a dict describing the result of the game.
+    """
+
+    updateLoggingLevel(game['loggingLevel'])
+    random.seed(game['seed'])
+
+    layout = capture.loadCaptureLayout(game['layout'])
+
+    redAgents = capture.loadAgents(True, game['red'], True, {})
+    blueAgents = capture.loadAgents(False, game['blue'], True, {})
+    agents = sum([list(pair) for pair in zip(redAgents, blueAgents)], [])
+
+    replayWriter = None
+    if (game['replayPath'] is not None):
+        info = {
+            'agents': [agent.__class__.__name__ for agent in agents],
+            'length': game['length'],
+            'redTeamName': game['red'],
+            'blueTeamName': game['blue'],
+        }
+        replayWriter = replay.ReplayWriter(game['replayPath'], layout, info = info)
+
+    # Play headless: no display and no move history, but keep timing for the summary.
+    rules = capture.CaptureRules()
+    instance = rules.newGame(layout, agents, None, game['length'], game['catchExceptions'],
+            simulation = True, recordHistory = False, replayWriter = replayWriter)
+
+    try:
+        instance.run()
+    finally:
+        if (replayWriter is not None):
+            replayWriter.close()
+
+    state = instance.state
+
+    return {
+        'id': game['id'],
+        'red': game['red'],
+        'blue': game['blue'],
+        'layout': game['layout'],
+        'seed': game['seed'],
+        'score': state.getScore(),
+        'moves': game['length'] - state.getTimeleft(),
+        'agentTimes': list(instance.totalAgentTimes),
+        'agentTimeWarnings': list(instance.totalAgentTimeWarnings),
+        'agentCrashed': instance.agentCrashed,
+        'agentTimeout': instance.agentTimeout,
+        'replay': game['replayPath'],
+    }
+
+def summarize(teams, results):
+    """
+    Aggregate per-game results into per-team records.
+    Agent times are reported per team slot (first and second agent on the team).
+
+    Returns: {team: {...}, ...}
+    """
+
+    summary = {}
+    for team in teams:
+        summary[team] = {
+            'games': 0,
+            'wins': 0,
+            'losses': 0,
+            'ties': 0,
+            'totalScore': 0,
+            'crashes': 0,
+            'agentTimes': [[], []],
+        }
+
+    for result in results:
+        for (team, isRed) in ((result['red'], True), (result['blue'], False)):
+            record = summary[team]
+
+            # Scores are from red's perspective.
+            score = result['score']
+            if (not isRed):
+                score = -score
+
+            record['games'] += 1
+            record['totalScore'] += score
+
+            if (score > 0):
+                record['wins'] += 1
+            elif (score < 0):
+                record['losses'] += 1
+            else:
+                record['ties'] += 1
+
+            # Red agents are at even indexes, blue at odd.
+            offset = 0 if isRed else 1
+            for slot in range(2):
+                record['agentTimes'][slot].append(result['agentTimes'][2 * slot + offset])
+
+        if (result['agentCrashed']):
+            # Crashes are scored as a loss for the crashing team, so credit the loser.
+            loser = result['blue'] if (result['score'] > 0) else result['red']
+            summary[loser]['crashes'] += 1
+
+    return summary
+
+def logSummary(summary):
+    header = '%-40s %5s %4s %4s %4s %9s %7s %13s %13s' % ('Team', 'Games', 'W', 'L', 'T',
+            'Avg Score', 'Crashes', 'Agent 1 (s)', 'Agent 2 (s)')
+    logging.info(header)
+    logging.info('-' * len(header))
+
+    rows = sorted(summary.items(), key = lambda item: (-item[1]['wins'], -item[1]['totalScore']))
+    for (team, record) in rows:
+        games = max(1, record['games'])
+
+        times = []
+        for slotTimes in record['agentTimes']:
+            if (len(slotTimes) == 0):
+                times.append('-')
+            else:
+                times.append('%.2f/%.2f' % (sum(slotTimes) / len(slotTimes), max(slotTimes)))
+
+        logging.info('%-40s %5d %4d %4d %4d %9.2f %7d %13s %13s' %
+                (team, record['games'], record['wins'], record['losses'], record['ties'],
+                record['totalScore'] / games, record['crashes'], times[0], times[1]))
+
+    logging.info('Agent times are the mean/max seconds of computation per game.')
+
+def parseOptions(argv):
+    """
+    Processes the command used to run a tournament from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program will run a round robin tournament of capture games.
+        Every team plays every other team as both red and blue,
+        on every layout with every seed.
+        Games are played in parallel (one game per worker process).
+
+    EXAMPLES:
+        (1) python -m pacai.bin.tournament
+            - Plays the baseline team against pacai.student.myTeam.
+        (2) python -m pacai.bin.tournament --teams pacai.core.baselineTeam pacai.student.myTeam \\
+                --layouts defaultCapture RANDOM13 --seeds 1 2 3
+            - Plays 12 games across two layouts and three seeds.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+        prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('-d', '--debug', dest = 'debug',
+            action = 'store_true', default = False,
+            help = 'set logging level to debug (default: %(default)s)')
+
+    parser.add_argument('-l', '--layouts', dest = 'layouts',
+            action = 'store', type = str, nargs = '+', default = DEFAULT_LAYOUTS,
+            help = 'the layouts to play on, RANDOM<seed> layouts are allowed '
+                + '(default: %(default)s)')
+
+    parser.add_argument('-q', '--quiet', dest = 'quiet',
+            action = 'store_true', default = False,
+            help = 'set logging level to warning (default: %(default)s)')
+
+    parser.add_argument('-s', '--seeds', dest = 'seeds',
+            action = 'store', type = int, nargs = '+', default = DEFAULT_SEEDS,
+            help = 'the seeds to play each pairing with (default: %(default)s)')
+
+    parser.add_argument('-t', '--teams', dest = 'teams',
+            action = 'store', type = str, nargs = '+', default = DEFAULT_TEAMS,
+            help = 'the team modules in the tournament (default: %(default)s)')
+
+    parser.add_argument('-w', '--num-workers', dest = 'numWorkers',
+            action = 'store', type = int, default = None,
+            help = 'the number of worker processes (default: the number of cores)')
+
+    parser.add_argument('--max-moves', dest = 'maxMoves',
+            action = 'store', type = int, default = 1200,
+            help = 'set maximum number of moves in a game (default: %(default)s)')
+
+    parser.add_argument('--no-catch-exceptions', dest = 'catchExceptions',
+            action = 'store_false', default = True,
+            help = 'let agent exceptions (and timeouts) stop the tournament')
+
+    parser.add_argument('--replay-dir', dest = 'replayDir',
+            action = 'store', type = str, default = None,
+            help = 'record every game to a replay file in this directory (default: %(default)s)')
+
+    parser.add_argument('--output', dest = 'output',
+            action = 'store', type = str, default = None,
+            help = 'write the results and summary as JSON to the specified path '
+                + '(default: %(default)s)')
+
+    options, otherjunk = parser.parse_known_args(argv)
+
+    if len(otherjunk) != 0:
+        raise ValueError('Unrecognized options: \'%s\'.' % (str(otherjunk)))
+
+    if options.quiet and options.debug:
+        raise ValueError('Logging cannont be set to both debug and quiet.')
+
+    if options.quiet:
+        updateLoggingLevel(logging.WARNING)
+    elif options.debug:
+        updateLoggingLevel(logging.DEBUG)
+
+    if (len(set(options.teams)) < 2):
+        raise ValueError('A tournament needs at least two different teams.')
+
+    return options
+
+def main(argv):
+    """
+    Entry point for a tournament.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    initLogging()
+
+    options = parseOptions(argv)
+
+    workerLoggingLevel = logging.WARNING
+    if (options.debug):
+        workerLoggingLevel = logging.DEBUG
+
+    teams = list(dict.fromkeys(options.teams))
+
+    if (options.replayDir is not None):
+        os.makedirs(options.replayDir, exist_ok = True)
+
+    results = runTournament(teams, options.layouts, options.seeds,
+            length = options.maxMoves, numWorkers = options.numWorkers,
+            catchExceptions = options.catchExceptions, workerLoggingLevel = workerLoggingLevel,
+            replayDir = options.replayDir)
+
+    summary = summarize(teams, results)
+    logSummary(summary)
+
+    if (options.output is not None):
+        with open(options.output, 'w') as file:
+            json.dump({'results': results, 'summary': summary}, file, indent = 4)
+
+        logging.info("Results written to: '%s'." % (options.output))
+
+    return results
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
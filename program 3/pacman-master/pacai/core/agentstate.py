@@ -9,13 +9,19 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Game states create a very large number of these (one per agent per successor),
+    so agent states use __slots__ instead of a per-object __dict__.
+    Successor states share agent states with their parent,
+    and only copy the ones that change (see `pacai.core.gamestate.AbstractGameState`).
     """
 
+    __slots__ = ('_start', '_position', '_direction', '_isPacman', '_scaredTimer')
+
     def __init__(self, position, direction, isPacman):
-        # Save the starting information for later use.
-        self._startPosition = position
-        self._startDirection = direction
-        self._startIsPacman = isPacman
+        # Save the starting information for later use (position, direction, isPacman).
+        # This never changes, so it is shared between copies.
+        self._start = (position, direction, isPacman)
 
         self._position = position
         self._direction = direction
@@ -24,8 +30,10 @@ class AgentState:
         self._scaredTimer = 0
 
     def copy(self):
-        state = AgentState(self._startPosition, self._startDirection, self._startIsPacman)
+        # Skip __init__, every slot is about to be assigned.
+        state = AgentState.__new__(AgentState)
 
+        state._start = self._start
         state._isPacman = self._isPacman
         state._position = self._position
         state._direction = self._direction
@@ -85,9 +93,7 @@ class AgentState:
         This agent was killed, respawn it at the start as a pacman.
         """
 
-        self._position = self._startPosition
-        self._direction = self._startDirection
-        self._isPacman = self._startIsPacman
+        self._position, self._direction, self._isPacman = self._start
         self._scaredTimer = 0
 
     def updatePosition(self, vector):
@@ -105,6 +111,33 @@ class AgentState:
             # If this is a zero vector, face the same direction as before.
             self._direction = direction
 
+    def _getCheckpoint(self):
+        """
+        Get everything that changes about this agent as plain (JSON-serializable) data.
+        """
+
+        position = self._position
+        if (position is not None):
+            position = list(position)
+
+        return [position, self._direction, self._isPacman, self._scaredTimer]
+
+    def _restoreCheckpoint(self, checkpoint):
+        """
+        Set this agent to match a checkpoint from _getCheckpoint().
+        """
+
+        position, direction, isPacman, scaredTimer = checkpoint
+
+        if (position is not None):
+            x, y = position
+            position = (x, y)
+
+        self._position = position
+        self._direction = direction
+        self._isPacman = bool(isPacman)
+        self._scaredTimer = int(scaredTimer)
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -127,4 +160,4 @@ class AgentState:
             scaredString = '!'
 
         return "%s%s: Position: %s, Direction: %s" % (typeString, scaredString,
-                str(self._position), str(self.direction))
+                str(self._position), str(self._direction))
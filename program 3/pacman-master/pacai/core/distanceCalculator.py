@@ -1,10 +1,33 @@
+import array
+import logging
+import os
+import struct
 import sys
 
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
+from pacai.util import util
 
 DEFAULT_DISTANCE = 10000
 
+# Unreachable cells are marked with the largest value an unsigned short can hold.
+UNREACHABLE = 0xFFFF
+DISTANCE_TYPECODE = 'H'
+
+CACHE_VERSION = 2
+
+# Cache files are a fixed header (magic, version, number of cells),
+# followed by the raw (little-endian) distances.
+# They only hold numbers, so a bad file can never do more than fail to load.
+CACHE_MAGIC = b'PDST'
+CACHE_HEADER = struct.Struct('<4sHI')
+
+# By default, computed tables are saved in the user's own cache directory.
+DEFAULT_CACHE_DIR = os.path.join(util.CACHE_DIR, 'distances')
+
+# Tables are immutable, so one table is shared by every agent in the process.
+# {wallsKey: DistanceTable, ...}
+_tableCache = {}
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -16,9 +39,9 @@ class Distancer(object):
     ```
     """
 
-    def __init__(self, layout):
+    def __init__(self, layout, cacheDir = DEFAULT_CACHE_DIR):
         self._distances = None
-        self.dc = DistanceCalculator(layout, self)
+        self.dc = DistanceCalculator(layout, self, cacheDir)
 
     def getMazeDistances(self):
         self.dc.run()
@@ -48,11 +71,11 @@ class Distancer(object):
         return bestDistance
 
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        distance = self._distances.getDistance(pos1, pos2)
+        if (distance is not None):
+            return distance
 
-        raise Exception("Position not in grid: " + str(key))
+        raise Exception("Position not in grid: " + str((pos1, pos2)))
 
     def isReadyForMazeDistance(self):
         return (self._distances is not None)
@@ -78,79 +101,178 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
-distanceMap = {}
+class DistanceTable(object):
+    """
+    All-pairs maze distances for a layout.
+    Distances are kept in a dense array indexed by
+    `pacai.core.mazegraph.MazeGraph` cell ids: table[source * numCells + target].
+    """
+
+    def __init__(self, graph, distances):
+        self._graph = graph
+        self._numCells = graph.getNumCells()
+        self._distances = distances
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two integral positions.
+        Returns None if either position is not an open cell.
+        """
+
+        cell1 = self._graph.getCellId(pos1)
+        cell2 = self._graph.getCellId(pos2)
+
+        if (cell1 is None or cell2 is None):
+            return None
+
+        return self.getDistanceById(cell1, cell2)
+
+    def getDistanceById(self, cell1, cell2):
+        distance = self._distances[cell1 * self._numCells + cell2]
+        if (distance == UNREACHABLE):
+            return DEFAULT_DISTANCE
+
+        return distance
+
+    def getGraph(self):
+        return self._graph
+
+    def getRow(self, cellId):
+        """
+        Get the distances from one cell to every other cell (indexed by cell id).
+        Unreachable cells hold `UNREACHABLE`.
+        """
+
+        start = cellId * self._numCells
+        return self._distances[start:start + self._numCells]
 
 class DistanceCalculator:
-    def __init__(self, layout, distancer):
+    def __init__(self, layout, distancer, cacheDir = DEFAULT_CACHE_DIR):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
+        self.cacheDir = cacheDir
 
     def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+        self.distancer._distances = getDistanceTable(self.layout, self.cacheDir)
 
-        self.distancer._distances = self.cache[self.layout.walls]
-
-def computeDistances(layout):
+def getDistanceTable(layout, cacheDir = DEFAULT_CACHE_DIR):
     """
-    Runs UCS to all other positions from each position.
+    Get the distance table for a layout.
+    Tables are shared by everyone in the process,
+    and (if cacheDir is not None) saved to disk keyed by a hash of the walls
+    so that later games on the same layout can skip the computation.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    graph = layout.getMazeGraph()
+    key = graph.getKey()
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+    if (key in _tableCache):
+        return _tableCache[key]
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+    table = None
+    if (cacheDir is not None):
+        table = _loadTable(graph, cacheDir)
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+    if (table is None):
+        table = computeDistances(layout)
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+        if (cacheDir is not None):
+            _saveTable(table, cacheDir)
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+    _tableCache[key] = table
+    return table
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+def computeDistances(layout):
+    """
+    Runs BFS to all other positions from each position.
+    Returns a `DistanceTable`.
+    """
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+    graph = layout.getMazeGraph()
+    neighbors = graph.getAllNeighbors()
+    numCells = graph.getNumCells()
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+    distances = array.array(DISTANCE_TYPECODE, [UNREACHABLE]) * (numCells * numCells)
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+    for source in range(numCells):
+        base = source * numCells
+        distances[base + source] = 0
 
-            for other in adjacent:
-                if other not in dist:
-                    continue
+        frontier = [source]
+        depth = 0
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+        while (len(frontier) > 0):
+            depth += 1
+            nextFrontier = []
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+            for cell in frontier:
+                for other in neighbors[cell]:
+                    if (distances[base + other] == UNREACHABLE):
+                        distances[base + other] = depth
+                        nextFrontier.append(other)
 
-    return distances
+            frontier = nextFrontier
 
-def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-        return distances[key]
+    return DistanceTable(graph, distances)
 
-    return DEFAULT_DISTANCE
+def getDistanceOnGrid(distances, pos1, pos2):
+    distance = distances.getDistance(pos1, pos2)
+    if (distance is None):
+        return DEFAULT_DISTANCE
+
+    return distance
+
+def _cachePath(graph, cacheDir):
+    return os.path.join(cacheDir, '%s.distances' % (graph.getKey()))
+
+def _loadTable(graph, cacheDir):
+    path = _cachePath(graph, cacheDir)
+    if (not os.path.isfile(path)):
+        return None
+
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(CACHE_HEADER.size)
+            if (len(header) != CACHE_HEADER.size):
+                return None
+
+            magic, version, numCells = CACHE_HEADER.unpack(header)
+            if (magic != CACHE_MAGIC or version != CACHE_VERSION
+                    or numCells != graph.getNumCells()):
+                return None
+
+            distances = array.array(DISTANCE_TYPECODE)
+            distances.frombytes(file.read())
+    except Exception as ex:
+        logging.warning("Unable to load cached distances '%s'. -- %s" % (path, str(ex)))
+        return None
+
+    if (len(distances) != numCells ** 2):
+        return None
+
+    if (sys.byteorder != 'little'):
+        distances.byteswap()
+
+    logging.debug("Loaded cached distances from '%s'." % (path))
+    return DistanceTable(graph, distances)
+
+def _saveTable(table, cacheDir):
+    path = _cachePath(table.getGraph(), cacheDir)
+
+    distances = table._distances
+    if (sys.byteorder != 'little'):
+        distances = array.array(DISTANCE_TYPECODE, distances)
+        distances.byteswap()
+
+    # Write to a temp file first so a concurrent reader never sees a partial table.
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+
+    try:
+        util.makePrivateDirs(cacheDir)
+        with open(tempPath, 'wb') as file:
+            file.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION,
+                    table.getGraph().getNumCells()))
+            distances.tofile(file)
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.warning("Unable to cache distances to '%s'. -- %s" % (path, str(ex)))
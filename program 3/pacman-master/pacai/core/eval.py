@@ -1,7 +1,15 @@
 """
 Evaluation functions take a game state and create a score based on that state.
+
+Searchers usually evaluate all the children of a state together (e.g. at the bottom of a tree),
+and those children have most of their features in common with their parent.
+So, an evaluation function can also be a `BatchEvaluator`,
+which computes what it needs from the parent once and then scores all the children.
+Use `evaluateAll` to score a batch of states with any kind of evaluation function.
 """
 
+import abc
+
 def score(gameState):
     """
     This default evaluation function just returns the score of the state.
@@ -12,3 +20,79 @@ def score(gameState):
     """
 
     return gameState.getScore()
+
+def evaluateAll(evaluationFunction, parentState, gameStates):
+    """
+    Score a list of states that all come from the same parent state,
+    and return the list of scores.
+    `BatchEvaluator`s (or anything else with an evaluateAll(parentState, gameStates) method)
+    score the whole batch at once, any other evaluation function is called on each state.
+    """
+
+    batchFunction = getattr(evaluationFunction, 'evaluateAll', None)
+    if (batchFunction is not None):
+        return batchFunction(parentState, gameStates)
+
+    return [evaluationFunction(gameState) for gameState in gameStates]
+
+class BatchEvaluator(abc.ABC):
+    """
+    An evaluation function that shares work between states with the same parent.
+
+    `BatchEvaluator.prepare` computes whatever the states can share from their parent
+    (food lists, distances, etc.), and `BatchEvaluator.evaluate` scores each state with it.
+    An evaluator can also be called on a single state, like any other evaluation function
+    (the state is then its own parent).
+
+    Search agents that are given the name of an evaluator class will make an instance of it.
+    """
+
+    def evaluateAll(self, parentState, gameStates):
+        shared = self.prepare(parentState)
+        return [self.evaluate(gameState, shared) for gameState in gameStates]
+
+    @abc.abstractmethod
+    def evaluate(self, gameState, shared):
+        """
+        Score a state, given what `BatchEvaluator.prepare` returned for its parent.
+        """
+
+        pass
+
+    def prepare(self, parentState):
+        """
+        Compute anything that can be shared by the children of this state.
+        """
+
+        return None
+
+    def __call__(self, gameState):
+        return self.evaluate(gameState, self.prepare(gameState))
+
+class ClosestFoodEvaluator(BatchEvaluator):
+    """
+    For pacman states: the score, minus the maze distance from pacman to the closest food.
+
+    The distances come from the parent's `pacai.core.fooddistance.FoodDistanceField`,
+    which is only updated for the children that ate something.
+    """
+
+    def __init__(self, foodWeight = 1.0):
+        self._foodWeight = float(foodWeight)
+
+    def evaluate(self, gameState, foodDistances):
+        x, y = gameState.getPacmanPosition()
+        x = int(x)
+        y = int(y)
+
+        if (not gameState.hasFood(x, y)):
+            foodDistances = foodDistances.withoutFood((x, y))
+
+        distance = foodDistances.getDistance((x, y))
+        if (distance is None):
+            return gameState.getScore()
+
+        return gameState.getScore() - self._foodWeight * distance
+
+    def prepare(self, parentState):
+        return parentState.getFoodDistances()
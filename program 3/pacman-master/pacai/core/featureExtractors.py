@@ -5,15 +5,22 @@ Feature extractors for game states.
 import abc
 
 from pacai.core.actions import Actions
-from pacai.core.search import search
-from pacai.student.searchAgents import AnyFoodSearchProblem
+from pacai.core.features import FeatureIndex
+from pacai.core.features import FeatureVector
 
 class FeatureExtractor(abc.ABC):
     """
     A class that takes a `pacai.core.gamestate.AbstractGameState` and `pacai.core.actions.Actions`,
     and returns a dict of features.
+
+    Extractors also provide their features as a `pacai.core.features.FeatureVector`
+    (see `FeatureExtractor.getFeatureVector`), with names interned in the extractor's
+    `pacai.core.features.FeatureIndex`.
     """
 
+    def __init__(self):
+        self._featureIndex = FeatureIndex()
+
     @abc.abstractmethod
     def getFeatures(self, state, action):
         """
@@ -24,6 +31,18 @@ class FeatureExtractor(abc.ABC):
 
         pass
 
+    def getFeatureIndex(self):
+        return self._featureIndex
+
+    def getFeatureVector(self, state, action):
+        """
+        Returns the features as a `pacai.core.features.FeatureVector`.
+        By default, this interns the names from `FeatureExtractor.getFeatures`.
+        Extractors that know their features up front can build the vector directly instead.
+        """
+
+        return FeatureVector.fromDict(self._featureIndex, self.getFeatures(state, action))
+
 class IdentityExtractor(FeatureExtractor):
     def getFeatures(self, state, action):
         feats = {}
@@ -36,35 +55,46 @@ class SimpleExtractor(FeatureExtractor):
     Returns simple features for a basic reflex Pacman.
     """
 
+    # All features are scaled down by this much.
+    SCALE = 10.0
+
+    def __init__(self):
+        super().__init__()
+
+        self._bias = self._featureIndex.register('bias')
+        self._ghosts = self._featureIndex.register('#-of-ghosts-1-step-away')
+        self._eatsFood = self._featureIndex.register('eats-food')
+        self._closestFood = self._featureIndex.register('closest-food')
+
     def getFeatures(self, state, action):
-        # Extract the grid of food and wall locations and get the ghost locations.
-        food = state.getFood()
+        return self.getFeatureVector(state, action).asDict(self._featureIndex)
+
+    def getFeatureVector(self, state, action):
+        # Extract the grid of wall locations and get the ghost locations.
         walls = state.getWalls()
         ghosts = state.getGhostPositions()
 
-        features = {}
-        features["bias"] = 1.0
-
         # Compute the location of pacman after he takes the action.
         x, y = state.getPacmanPosition()
         dx, dy = Actions.directionToVector(action)
         next_x, next_y = int(x + dx), int(y + dy)
 
         # Count the number of ghosts 1-step away.
-        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in
+        numGhosts = sum((next_x, next_y) in
                 Actions.getLegalNeighbors(g, walls) for g in ghosts)
 
+        indexes = [self._bias, self._ghosts]
+        values = [1.0 / self.SCALE, numGhosts / self.SCALE]
+
         # If there is no danger of ghosts then add the food feature.
-        if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
-            features["eats-food"] = 1.0
+        if not numGhosts and state.hasFood(next_x, next_y):
+            indexes.append(self._eatsFood)
+            values.append(1.0 / self.SCALE)
 
-        prob = AnyFoodSearchProblem(state, start = (next_x, next_y))
-        dist = len(search.bfs(prob))
+        dist = state.getFoodDistances().getDistance((next_x, next_y))
         if dist is not None:
             # Make the distance a number less than one otherwise the update will diverge wildly.
-            features["closest-food"] = float(dist) / (walls.getWidth() * walls.getHeight())
-
-        for key in features:
-            features[key] /= 10.0
+            indexes.append(self._closestFood)
+            values.append(float(dist) / (walls.getWidth() * walls.getHeight()) / self.SCALE)
 
-        return features
+        return FeatureVector(indexes, values)
@@ -0,0 +1,209 @@
+"""
+Sparse feature vectors and dense weight vectors for linear evaluation functions.
+
+Feature names are interned into integer indexes by a `FeatureIndex`
+(usually once, when an extractor is created),
+so feature vectors are just parallel lists of indexes and values
+and weights live in a flat list.
+Dot products and updates then only touch the features that are actually present,
+without hashing any names.
+"""
+
+class FeatureIndex(object):
+    """
+    A two-way mapping between feature names and (dense) integer indexes.
+    """
+
+    def __init__(self, names = ()):
+        self._indexes = {}
+        self._names = []
+
+        for name in names:
+            self.register(name)
+
+    def getIndex(self, name):
+        """
+        Get the index of a registered feature, or None.
+        """
+
+        return self._indexes.get(name)
+
+    def getName(self, index):
+        return self._names[index]
+
+    def getNames(self):
+        return list(self._names)
+
+    def register(self, name):
+        """
+        Get the index of a feature, registering it if it is new.
+        """
+
+        index = self._indexes.get(name)
+        if (index is None):
+            index = len(self._names)
+            self._indexes[name] = index
+            self._names.append(name)
+
+        return index
+
+    def __contains__(self, name):
+        return name in self._indexes
+
+    def __len__(self):
+        return len(self._names)
+
+class FeatureVector(object):
+    """
+    A sparse vector of feature values, as parallel lists of feature indexes and values.
+    The lists must be the same length, and an index should only appear once.
+    """
+
+    __slots__ = ('_indexes', '_values')
+
+    def __init__(self, indexes = None, values = None):
+        """
+        Args:
+            indexes: The feature indexes (the vector takes ownership of the list).
+            values: The values for each index (the vector takes ownership of the list).
+        """
+
+        # Vectors are made for every (state, action), so the lists are not checked.
+        self._indexes = indexes if (indexes is not None) else []
+        self._values = values if (values is not None) else []
+
+    def add(self, index, value):
+        self._indexes.append(index)
+        self._values.append(value)
+
+    def asDict(self, featureIndex):
+        """
+        Get this vector as a dict of {name: value}.
+        """
+
+        return {featureIndex.getName(index): value
+                for (index, value) in zip(self._indexes, self._values)}
+
+    def get(self, index, default = 0.0):
+        for (i, value) in zip(self._indexes, self._values):
+            if (i == index):
+                return value
+
+        return default
+
+    def getIndexes(self):
+        return self._indexes
+
+    def getValues(self):
+        return self._values
+
+    def items(self):
+        return zip(self._indexes, self._values)
+
+    def scale(self, factor):
+        """
+        Multiply every value by a factor (in place).
+        """
+
+        self._values = [value * factor for value in self._values]
+
+    def __len__(self):
+        return len(self._indexes)
+
+    @staticmethod
+    def fromDict(featureIndex, features):
+        """
+        Make a vector from a dict of {name: value}, registering any new names.
+        """
+
+        register = featureIndex.register
+        return FeatureVector([register(name) for name in features], list(features.values()))
+
+class WeightVector(object):
+    """
+    A dense vector of weights for the features in a `FeatureIndex`.
+    Features registered after the weights were made start with a weight of 0.0.
+    """
+
+    def __init__(self, featureIndex):
+        self._featureIndex = featureIndex
+        self._weights = [0.0] * len(featureIndex)
+
+    def asDict(self):
+        """
+        Get the non-zero weights as a dict of {name: weight}.
+        """
+
+        self._grow()
+
+        getName = self._featureIndex.getName
+        return {getName(index): weight for (index, weight) in enumerate(self._weights)
+                if (weight != 0.0)}
+
+    def dot(self, vector):
+        return self.dotAll((vector,))[0]
+
+    def dotAll(self, vectors):
+        """
+        Get the dot product of these weights with each of the vectors.
+        """
+
+        self._grow()
+        weights = self._weights
+
+        results = []
+        for vector in vectors:
+            total = 0.0
+            for (index, value) in zip(vector._indexes, vector._values):
+                total += weights[index] * value
+
+            results.append(total)
+
+        return results
+
+    def get(self, name):
+        index = self._featureIndex.getIndex(name)
+        if (index is None or index >= len(self._weights)):
+            return 0.0
+
+        return self._weights[index]
+
+    def getFeatureIndex(self):
+        return self._featureIndex
+
+    def set(self, name, weight):
+        index = self._featureIndex.register(name)
+        self._grow()
+
+        self._weights[index] = weight
+
+    def update(self, vector, scale):
+        """
+        Add scale * vector to the weights (e.g. a gradient step).
+        """
+
+        self._grow()
+
+        weights = self._weights
+        for (index, value) in zip(vector._indexes, vector._values):
+            weights[index] += scale * value
+
+    def _grow(self):
+        missing = len(self._featureIndex) - len(self._weights)
+        if (missing > 0):
+            self._weights.extend([0.0] * missing)
+
+    def __len__(self):
+        return len(self._weights)
+
+    @staticmethod
+    def fromDict(featureIndex, weights):
+        """
+        Make weights from a dict of {name: weight}, registering any new names.
+        """
+
+        vector = WeightVector(featureIndex)
+        for (name, weight) in weights.items():
+            vector.set(name, weight)
+
+        return vector
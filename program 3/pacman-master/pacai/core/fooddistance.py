@@ -0,0 +1,217 @@
+"""
+Maze distances from every position to the closest food.
+
+A `FoodDistanceField` is built once with a multi-source BFS (from every piece of food at once).
+When a piece of food is eaten, only the cells whose closest food was that piece are recomputed
+(see `FoodDistanceField.withoutFood`), instead of searching the whole maze again.
+Fields are immutable, and are cached by (walls, food) so that every state in the process
+with the same food shares the same field, no matter what order the food was eaten in.
+
+Game states keep their field up to date as food is eaten,
+see `pacai.core.gamestate.AbstractGameState.getFoodDistances`.
+"""
+
+import collections
+import heapq
+
+from pacai.core import mazegraph
+from pacai.core import zobrist
+
+# The distance stored for cells that cannot reach any food.
+UNREACHABLE = 2 ** 31
+
+MAX_CACHED_FIELDS = 1000
+
+# {(wallsKey, foodHash): FoodDistanceField, ...}
+_fieldCache = collections.OrderedDict()
+
+class FoodDistanceField(object):
+    """
+    The maze distance from every open cell to the closest food.
+    Use `getFoodDistances` (or a game state) to get one.
+    """
+
+    def __init__(self, graph, zobristKeys, isFood, foodHash, distances):
+        self._graph = graph
+        self._zobristKeys = zobristKeys
+
+        # Indexed by cell id.
+        self._isFood = isFood
+        self._distances = distances
+
+        # A Zobrist hash of just the food (see `pacai.core.zobrist`).
+        self._foodHash = foodHash
+
+    def getCellDistance(self, cellId):
+        """
+        Get the distance from a cell (see `pacai.core.mazegraph.MazeGraph`) to the closest food,
+        or None if no food can be reached.
+        """
+
+        distance = self._distances[cellId]
+        if (distance >= UNREACHABLE):
+            return None
+
+        return distance
+
+    def getDistance(self, position):
+        """
+        Get the maze distance from an integral position to the closest food,
+        or None if the position is a wall or no food can be reached.
+        """
+
+        cellId = self._graph.getCellId(position)
+        if (cellId is None):
+            return None
+
+        return self.getCellDistance(cellId)
+
+    def getGraph(self):
+        return self._graph
+
+    def withoutFood(self, position):
+        """
+        Get the field for the same food, but without the food at this position.
+        """
+
+        cellId = self._graph.getCellId(position)
+        if (cellId is None or not self._isFood[cellId]):
+            return self
+
+        x, y = self._graph.getPosition(cellId)
+        foodHash = self._foodHash ^ self._zobristKeys.food(x, y)
+
+        key = (self._graph.getKey(), foodHash)
+        field = _getCachedField(key)
+        if (field is not None):
+            return field
+
+        isFood = bytearray(self._isFood)
+        isFood[cellId] = 0
+
+        distances = list(self._distances)
+        _removeSource(self._graph, distances, cellId)
+
+        field = FoodDistanceField(self._graph, self._zobristKeys, isFood, foodHash, distances)
+        _cacheField(key, field)
+
+        return field
+
+def getFoodDistances(walls, food, graph = None):
+    """
+    Get the (shared) field for the given walls and food grids.
+    If the caller already has the `pacai.core.mazegraph.MazeGraph` for the walls
+    (e.g. from `pacai.core.layout.Layout.getMazeGraph`), it can be passed in.
+    """
+
+    if (graph is None):
+        graph = mazegraph.getMazeGraph(walls)
+    zobristKeys = zobrist.getKeys(walls.getWidth(), walls.getHeight())
+
+    foodPositions = food.asList()
+    foodHash = zobristKeys.hashBoard(food, [])
+
+    key = (graph.getKey(), foodHash)
+    field = _getCachedField(key)
+    if (field is not None):
+        return field
+
+    isFood = bytearray(graph.getNumCells())
+    for position in foodPositions:
+        cellId = graph.getCellId(position)
+        if (cellId is not None):
+            isFood[cellId] = 1
+
+    distances = _multiSourceBFS(graph, [cellId for cellId in range(len(isFood)) if isFood[cellId]])
+
+    field = FoodDistanceField(graph, zobristKeys, isFood, foodHash, distances)
+    _cacheField(key, field)
+
+    return field
+
+def _cacheField(key, field):
+    _fieldCache[key] = field
+
+    if (len(_fieldCache) > MAX_CACHED_FIELDS):
+        _fieldCache.popitem(last = False)
+
+def _getCachedField(key):
+    field = _fieldCache.get(key)
+    if (field is not None):
+        _fieldCache.move_to_end(key)
+
+    return field
+
+def _multiSourceBFS(graph, sources):
+    neighbors = graph.getAllNeighbors()
+    distances = [UNREACHABLE] * graph.getNumCells()
+
+    for source in sources:
+        distances[source] = 0
+
+    frontier = list(sources)
+    distance = 0
+
+    while (len(frontier) > 0):
+        distance += 1
+        nextFrontier = []
+
+        for cellId in frontier:
+            for neighbor in neighbors[cellId]:
+                if (distances[neighbor] == UNREACHABLE):
+                    distances[neighbor] = distance
+                    nextFrontier.append(neighbor)
+
+        frontier = nextFrontier
+
+    return distances
+
+def _removeSource(graph, distances, source):
+    """
+    Update distances (in place) after a source (food) is removed.
+
+    Only cells that are reached from the source by always moving one step further from food
+    can have had all their shortest paths end at the source,
+    every other cell still has a shortest path to some other food.
+    So, those cells are reset and then filled back in from the cells around them.
+    """
+
+    neighbors = graph.getAllNeighbors()
+
+    inRegion = bytearray(len(distances))
+    inRegion[source] = 1
+    region = [source]
+
+    for cellId in region:
+        nextDistance = distances[cellId] + 1
+        for neighbor in neighbors[cellId]:
+            if (not inRegion[neighbor] and distances[neighbor] == nextDistance):
+                inRegion[neighbor] = 1
+                region.append(neighbor)
+
+    for cellId in region:
+        distances[cellId] = UNREACHABLE
+
+    # Seed the region from its border.
+    queue = []
+    for cellId in region:
+        best = UNREACHABLE
+        for neighbor in neighbors[cellId]:
+            if (not inRegion[neighbor] and distances[neighbor] + 1 < best):
+                best = distances[neighbor] + 1
+
+        if (best < UNREACHABLE):
+            distances[cellId] = best
+            queue.append((best, cellId))
+
+    heapq.heapify(queue)
+
+    while (len(queue) > 0):
+        distance, cellId = heapq.heappop(queue)
+        if (distance > distances[cellId]):
+            continue
+
+        for neighbor in neighbors[cellId]:
+            if (inRegion[neighbor] and distance + 1 < distances[neighbor]):
+                distances[neighbor] = distance + 1
+                heapq.heappush(queue, (distance + 1, neighbor))
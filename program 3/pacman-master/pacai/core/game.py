@@ -5,12 +5,36 @@ The core of a pacman-style game.
 import logging
 import time
 
+from pacai.core.profiler import SECTION_PROCESS
+from pacai.core.profiler import SECTION_SUCCESSOR
+from pacai.core.profiler import SECTION_VIEW
+
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__(self, agents, display, rules, startingIndex = 0, catchExceptions = False):
+    def __init__(self, agents, display, rules, startingIndex = 0, catchExceptions = False,
+            simulation = False, recordHistory = True, timer = time.time, replayWriter = None,
+            profiler = None):
+        """
+        Args:
+            simulation: Run in headless simulation mode.
+                The display is never initialized, updated, or finished,
+                so only agent computation and rules processing are paid for.
+            recordHistory: Keep every (agentIndex, action) in `Game.moveHistory`
+                (e.g. to inspect the game afterwards).
+                Replays do not need this, they are streamed through replayWriter.
+            timer: A function that returns the current time in seconds,
+                used to time agents (see `Game.totalAgentTimes`).
+                Use None to skip timing moves entirely
+                (timeouts cannot be enforced without a timer).
+            replayWriter: A `pacai.core.replay.ReplayWriter` to stream the game to as it is played.
+                The caller is responsible for closing it.
+            profiler: A `pacai.core.profiler.Profiler` to record agent moves
+                and engine timings with.
+        """
+
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -25,6 +49,15 @@ class Game:
         self.enforceTimeouts = catchExceptions
         self.catchExceptions = catchExceptions
 
+        self.simulation = simulation
+        self.recordHistory = recordHistory
+        self.timer = timer
+        self.replayWriter = replayWriter
+        self.profiler = profiler
+
+        if (self.enforceTimeouts and self.timer is None):
+            raise ValueError('A timer is required to enforce timeouts.')
+
     def run(self):
         """
         Main control loop for game play.
@@ -35,40 +68,77 @@ class Game:
         agentIndex = self.startingIndex
         numAgents = len(self.agents)
 
-        self.display.initialize(self.state)
+        # Resolve the optional parts of the loop once, instead of on every move.
+        display = self.display
+        if (self.simulation):
+            display = None
+
+        timer = self.timer
+        moveHistory = None
+        if (self.recordHistory):
+            moveHistory = self.moveHistory
+
+        replayWriter = self.replayWriter
+        if (replayWriter is not None):
+            replayWriter.start(self.state)
+
+        profiler = self.profiler
+        if (profiler is not None):
+            profiler.startGame(self.agents)
+            clock = profiler.clock
+
+        if (display is not None):
+            self._updateDisplay(display.initialize)
 
         if (not self._registerInitialState()):
             return False
 
         # Draw the initial frame.
-        self.display.update(self.state)
+        if (display is not None):
+            self._updateDisplay(display.update)
 
         while (not self.gameOver):
             # Fetch the next agent
             agent = self.agents[agentIndex]
 
             action = None
-            startTime = time.time()
+            if (timer is not None):
+                startTime = timer()
+
+            if (profiler is not None):
+                profiler.startMove(agentIndex)
 
             # Get an action from the agent.
             try:
                 agent.observationFunction(self.state)
                 action = agent.getAction(self.state)
             except Exception as ex:
+                if (profiler is not None):
+                    profiler.endMove(agentIndex)
+
                 if (not self.catchExceptions):
                     raise ex
 
                 self._agentCrash(agentIndex, ex)
                 return False
 
-            timeTaken = time.time() - startTime
-            self.totalAgentTimes[agentIndex] += timeTaken
+            if (profiler is not None):
+                profiler.endMove(agentIndex)
 
-            if (self._checkForTimeouts(agentIndex, timeTaken)):
-                return False
+            if (timer is not None):
+                timeTaken = timer() - startTime
+                self.totalAgentTimes[agentIndex] += timeTaken
+
+                if (self._checkForTimeouts(agentIndex, timeTaken)):
+                    return False
 
             # Execute the action.
-            self.moveHistory.append((agentIndex, action))
+            if (moveHistory is not None):
+                moveHistory.append((agentIndex, action))
+
+            if (profiler is not None):
+                sectionStart = clock()
+
             try:
                 self.state = self.state.generateSuccessor(agentIndex, action)
             except Exception as ex:
@@ -78,11 +148,23 @@ class Game:
                 self._agentCrash(agentIndex, ex)
                 return False
 
+            if (profiler is not None):
+                profiler.addTime(SECTION_SUCCESSOR, clock() - sectionStart)
+
+            if (replayWriter is not None):
+                replayWriter.recordMove(agentIndex, action, self.state)
+
             # Update the display.
-            self.display.update(self.state)
+            if (display is not None):
+                self._updateDisplay(display.update)
 
             # Allow for game specific conditions (winning, losing, etc.).
-            self.rules.process(self.state, self)
+            if (profiler is not None):
+                sectionStart = clock()
+                self.rules.process(self.state, self)
+                profiler.addTime(SECTION_PROCESS, clock() - sectionStart)
+            else:
+                self.rules.process(self.state, self)
 
             # Track progress.
             if (agentIndex == numAgents + 1):
@@ -94,7 +176,21 @@ class Game:
         if (not self._registerFinalState()):
             return False
 
-        self.display.finish()
+        if (display is not None):
+            self._updateDisplay(lambda state: display.finish())
+
+    def _updateDisplay(self, function):
+        """
+        Call a display function with the current state (charging the time to the profiler).
+        """
+
+        if (self.profiler is None):
+            function(self.state)
+            return
+
+        startTime = self.profiler.clock()
+        function(self.state)
+        self.profiler.addTime(SECTION_VIEW, self.profiler.clock() - startTime)
 
     def _agentCrash(self, agentIndex, exception = None):
         """
@@ -108,6 +204,14 @@ class Game:
         self.agentCrashed = True
         self.rules.agentCrash(self, agentIndex)
 
+        if (self.profiler is not None):
+            kind = 'crash'
+            if (self.agentTimeout):
+                kind = 'timeout'
+
+            self.profiler.recordEvent(agentIndex, kind, message = str(exception or ''),
+                    agentTime = self.totalAgentTimes[agentIndex])
+
     def _checkForTimeouts(self, agentIndex, timeTaken):
         """
         Check if an agent timed out.
@@ -164,6 +268,8 @@ class Game:
                 self._agentCrash(agentIndex)
                 return False
 
+            agent.setMoveWarningTime(self.rules.getMoveWarningTime(agentIndex))
+
             maxStartupTime = int(self.rules.getMaxStartupTime(agentIndex))
             startTime = time.time()
 
@@ -179,6 +285,9 @@ class Game:
             timeTaken = time.time() - startTime
             self.totalAgentTimes[agentIndex] += timeTaken
 
+            if (self.profiler is not None):
+                self.profiler.addStartupTime(agentIndex, timeTaken)
+
             if (self.enforceTimeouts and timeTaken > maxStartupTime):
                 logging.warning('Agent %d ran out of time on startup!' % agentIndex)
                 self.agentTimeout = True
@@ -2,7 +2,10 @@ import abc
 import copy
 
 from pacai.core.agentstate import AgentState
+from pacai.core import fooddistance
+from pacai.core import zobrist
 from pacai.core.directions import Directions
+from pacai.core.grid import BitGrid
 from pacai.util import util
 
 class AbstractGameState(abc.ABC):
@@ -22,7 +25,7 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
+        # Keep a copy of the hash.
         # Any children should be sure to clear the hash when modifications are made.
         self._hash = None
 
@@ -33,6 +36,11 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # Distances to the closest food (see getFoodDistances), only made when asked for.
+        # Successors share this, along with the positions of any food eaten since it was made.
+        self._foodDistances = None
+        self._foodEatenSinceDistances = ()
+
         self._capsulesCopied = False
         self._capsules = layout.capsules.copy()
         self._lastCapsuleEaten = None
@@ -45,8 +53,22 @@ class AbstractGameState(abc.ABC):
         for (isPacman, position) in layout.agentPositions:
             self._agentStates.append(AgentState(position, Directions.STOP, isPacman))
 
+        # A bitmask of the agent states this state owns (may modify).
+        # Agent states that are not owned are shared with the parent state (see _initSuccessor).
+        self._ownedAgentStates = (1 << len(self._agentStates)) - 1
+
         self._score = 0
 
+        # A Zobrist hash of the food and capsules on the board.
+        # Eating food or a capsule updates it with a single XOR,
+        # so hashing a state never has to look at the whole board.
+        self._zobristKeys = zobrist.getKeys(layout.width, layout.height)
+        self._boardHash = self._zobristKeys.hashBoard(self._food, self._capsules)
+
+        # While a move is being made in place (see makeMove),
+        # a list of the changes it made that are not in the move record (see _undoChange).
+        self._changes = None
+
     @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
@@ -59,7 +81,26 @@ class AbstractGameState(abc.ABC):
     @abc.abstractmethod
     def getLegalActions(self, agentIndex = 0):
         """
-        Gets the legal actions for the agent specified.
+        Gets the legal actions for the agent specified,
+        as a tuple (empty if the game is over).
+        Legal actions are shared between states, so the tuple can not be modified.
+        """
+
+        pass
+
+    @abc.abstractmethod
+    def getRolloutState(self):
+        """
+        Get a `pacai.core.rollout.RolloutState` that starts at this state,
+        for playing out games quickly.
+        """
+
+        pass
+
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action):
+        """
+        Apply the action to the context state (self).
         """
 
         pass
@@ -76,12 +117,16 @@ class AbstractGameState(abc.ABC):
         if (not self.hasCapsule(x, y)):
             return False
 
+        index = self._capsules.index((x, y))
+        self._logChange(('capsule', x, y, index, self._capsules, self._capsulesCopied))
+
         if (not self._capsulesCopied):
             self._capsules = self._capsules.copy()
             self._capsulesCopied = True
 
-        self._capsules.remove((x, y))
+        del self._capsules[index]
         self._lastCapsuleEaten = (x, y)
+        self._boardHash ^= self._zobristKeys.capsule(x, y)
 
         self._hash = None
         return True
@@ -94,12 +139,18 @@ class AbstractGameState(abc.ABC):
         if (not self.hasFood(x, y)):
             return False
 
+        self._logChange(('food', x, y, self._food, self._foodCopied))
+
         if (not self._foodCopied):
             self._food = self._food.copy()
             self._foodCopied = True
 
-        self._food[x][y] = False
+        self._food.set(x, y, False)
         self._lastFoodEaten = (x, y)
+        self._boardHash ^= self._zobristKeys.food(x, y)
+
+        if (self._foodDistances is not None):
+            self._foodEatenSinceDistances = self._foodEatenSinceDistances + ((x, y),)
 
         self._hash = None
         return True
@@ -149,6 +200,26 @@ class AbstractGameState(abc.ABC):
 
         return self._food.copy()
 
+    def getFoodDistances(self):
+        """
+        Get a `pacai.core.fooddistance.FoodDistanceField` for the food left on the board,
+        which gives the maze distance from any position to the closest food.
+
+        The field is made the first time it is asked for,
+        and successors update it (instead of building a new one) as food is eaten.
+        """
+
+        if (self._foodDistances is None):
+            self._foodDistances = fooddistance.getFoodDistances(self._layout.walls, self._food,
+                    graph = self._layout.getMazeGraph())
+        else:
+            for position in self._foodEatenSinceDistances:
+                self._foodDistances = self._foodDistances.withoutFood(position)
+
+        self._foodEatenSinceDistances = ()
+
+        return self._foodDistances
+
     def getHighlightLocations(self):
         return self._highlightLocations
 
@@ -217,7 +288,7 @@ class AbstractGameState(abc.ABC):
         Returns true if the location (x, y) has food.
         """
 
-        return self._food[x][y]
+        return self._food.get(x, y)
 
     def hasWall(self, x, y):
         """
@@ -235,6 +306,40 @@ class AbstractGameState(abc.ABC):
     def isWin(self):
         return self.isOver() and self._win
 
+    def makeMove(self, agentIndex, action):
+        """
+        Apply an action to this state in place (instead of making a successor),
+        and return an undo record that `AbstractGameState.unmakeMove` takes the move back with.
+        Moves must be taken back in the opposite order that they were made.
+
+        This lets a depth-first search walk the game tree with a single state,
+        and each move only saves what it changes (instead of copying the state).
+        While a move is made, the state should not be used anywhere that expects it to stay the same
+        (e.g. kept in a transposition table or a history),
+        generateSuccessor() is still the safe way to get the next state.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't make moves on a terminal state.")
+
+        record = self._getMoveRecord()
+        changes = []
+
+        # Any agent state the move changes is copied (and logged), so the old one can be put back.
+        self._ownedAgentStates = 0
+        self._changes = changes
+
+        try:
+            self._applySuccessorAction(agentIndex, action)
+        except Exception:
+            # Illegal actions are caught before anything changes, but be sure.
+            self.unmakeMove((record, changes))
+            raise
+        finally:
+            self._changes = None
+
+        return (record, changes)
+
     def setHighlightLocations(self, locations):
         self._highlightLocations = list(locations)
 
@@ -242,6 +347,155 @@ class AbstractGameState(abc.ABC):
         self._score = score
         self._hash = None
 
+    def unmakeMove(self, undo):
+        """
+        Take back a move made with `AbstractGameState.makeMove`,
+        putting this state back exactly as it was.
+        """
+
+        record, changes = undo
+
+        for change in reversed(changes):
+            self._undoChange(change)
+
+        self._restoreMoveRecord(record)
+
+    def _getRecord(self):
+        """
+        Get a compact record of the parts of this state that are not on the board
+        (see `pacai.core.history.ObservationHistory`).
+        Agent states are never changed once a state has been made, so they are shared.
+        """
+
+        return (self._score, self._gameover, self._win, self._lastAgentMoved,
+                tuple(self._agentStates))
+
+    def _restoreRecord(self, record):
+        """
+        Set this state to match a record from _getRecord().
+        """
+
+        self._score, self._gameover, self._win, self._lastAgentMoved, agentStates = record
+
+        self._agentStates = list(agentStates)
+        self._ownedAgentStates = 0
+
+        self._hash = None
+
+    def _getCheckpoint(self):
+        """
+        Get everything about this state that is not in the layout as plain (JSON-serializable) data,
+        e.g. for replays (see `pacai.core.replay`).
+        """
+
+        return {
+            'agents': [agentState._getCheckpoint() for agentState in self._agentStates],
+            'food': self._food.getBits(),
+            'capsules': [list(capsule) for capsule in self._capsules],
+            'score': self._score,
+            'gameover': self._gameover,
+            'win': self._win,
+            'lastAgentMoved': self._lastAgentMoved,
+            'lastFoodEaten': _toList(self._lastFoodEaten),
+            'lastCapsuleEaten': _toList(self._lastCapsuleEaten),
+        }
+
+    def _restoreCheckpoint(self, checkpoint):
+        """
+        Set this (new) state to match a checkpoint from _getCheckpoint().
+        """
+
+        agents = checkpoint['agents']
+        if (len(agents) != len(self._agentStates)):
+            raise ValueError('Checkpoint has %d agents, but the layout has %d.'
+                    % (len(agents), len(self._agentStates)))
+
+        for (index, agent) in enumerate(agents):
+            self._getMutableAgentState(index)._restoreCheckpoint(agent)
+
+        self._food = BitGrid.fromBits(self._layout.width, self._layout.height, checkpoint['food'])
+        self._foodCopied = True
+        self._capsules = [(x, y) for (x, y) in checkpoint['capsules']]
+        self._capsulesCopied = True
+        self._boardHash = self._zobristKeys.hashBoard(self._food, self._capsules)
+
+        self._foodDistances = None
+        self._foodEatenSinceDistances = ()
+
+        self._score = checkpoint['score']
+        self._gameover = bool(checkpoint['gameover'])
+        self._win = bool(checkpoint['win'])
+        self._lastAgentMoved = checkpoint['lastAgentMoved']
+        self._lastFoodEaten = _toTuple(checkpoint['lastFoodEaten'])
+        self._lastCapsuleEaten = _toTuple(checkpoint['lastCapsuleEaten'])
+
+        self._hash = None
+
+    def _getMoveRecord(self):
+        """
+        Get the fields that a move can change and that can just be set back
+        (see makeMove() and _restoreMoveRecord()).
+        Changes to the board and agent states are logged as they are made (see _undoChange()).
+        """
+
+        return (self._score, self._gameover, self._win, self._lastAgentMoved,
+                self._lastFoodEaten, self._lastCapsuleEaten, self._boardHash, self._hash,
+                self._foodDistances, self._foodEatenSinceDistances, self._ownedAgentStates)
+
+    def _restoreMoveRecord(self, record):
+        self._score, self._gameover, self._win, self._lastAgentMoved = record[:4]
+        self._lastFoodEaten, self._lastCapsuleEaten, self._boardHash, self._hash = record[4:8]
+        self._foodDistances, self._foodEatenSinceDistances, self._ownedAgentStates = record[8:]
+
+    def _logChange(self, change):
+        """
+        Note a change for unmakeMove() to undo, if a move is being made in place.
+        """
+
+        if (self._changes is not None):
+            self._changes.append(change)
+
+    def _undoChange(self, change):
+        """
+        Undo a single change logged while making a move.
+        Children that log their own kinds of changes should handle them and defer the rest here.
+
+        Something eaten was either removed from a food grid or capsule list this state owned,
+        or from a copy (and the original was left alone).
+        If it was removed in place, a successor may have started sharing the container since,
+        so it is copied before the eaten item is put back.
+        """
+
+        kind = change[0]
+
+        if (kind == 'agent'):
+            kind, index, agentState = change
+            self._agentStates[index] = agentState
+        elif (kind == 'food'):
+            kind, x, y, food, foodCopied = change
+            if (foodCopied):
+                if (not self._foodCopied):
+                    self._food = self._food.copy()
+                    self._foodCopied = True
+
+                self._food.set(x, y, True)
+            else:
+                self._food = food
+                self._foodCopied = False
+        elif (kind == 'capsule'):
+            kind, x, y, index, capsules, capsulesCopied = change
+            if (capsulesCopied):
+                if (not self._capsulesCopied):
+                    self._capsules = self._capsules.copy()
+                    self._capsulesCopied = True
+
+                self._capsules.insert(index, (x, y))
+            else:
+                self._capsules = capsules
+                self._capsulesCopied = False
+        else:
+            raise ValueError('Unknown kind of change: %s.' % (str(kind)))
+
     def _initSuccessor(self):
         """
         Get a state that will eventually serve as a successor.
@@ -256,11 +510,38 @@ class AbstractGameState(abc.ABC):
         successor._foodCopied = False
         successor._capsulesCopied = False
 
-        # Agent states need to be deep copied.
-        successor._agentStates = [agentState.copy() for agentState in self._agentStates]
+        # Copies drop the food distances (see __getstate__), but successors can share them.
+        successor._foodDistances = self._foodDistances
+        successor._foodEatenSinceDistances = self._foodEatenSinceDistances
+
+        # Share agent states with this state, they will be copied on write.
+        # Typically, only the moving agent ends up being copied.
+        successor._agentStates = list(self._agentStates)
+        successor._ownedAgentStates = 0
+
+        # This state now shares everything with the successor,
+        # so it also has to copy on write if it is changed in place (see makeMove).
+        self._foodCopied = False
+        self._capsulesCopied = False
+        self._ownedAgentStates = 0
 
         return successor
 
+    def _getMutableAgentState(self, index):
+        """
+        Get an agent state that is safe to modify.
+        Rules must use this (instead of getAgentState()) for any agent state they change,
+        since a successor shares its unchanged agent states with its parent.
+        """
+
+        bit = 1 << index
+        if (not (self._ownedAgentStates & bit)):
+            self._logChange(('agent', index, self._agentStates[index]))
+            self._agentStates[index] = self._agentStates[index].copy()
+            self._ownedAgentStates |= bit
+
+        return self._agentStates[index]
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -272,6 +553,10 @@ class AbstractGameState(abc.ABC):
         if (type(self) != type(other)):
             return False
 
+        # Hashes are cheap (see __hash__), so use them to reject most unequal states.
+        if (hash(self) != hash(other)):
+            return False
+
         # Note that not all fields are being used because we are checking if two states are equal,
         # not is they got to this confiruation in the same way.
 
@@ -287,9 +572,35 @@ class AbstractGameState(abc.ABC):
                 and self._agentStates == other._agentStates
                 and self._layout == other._layout)
 
+    def __getstate__(self):
+        # Food distances can always be rebuilt, so don't pickle them (e.g. into replays).
+        state = self.__dict__.copy()
+        state['_foodDistances'] = None
+        state['_foodEatenSinceDistances'] = ()
+
+        return state
+
     def __hash__(self):
+        """
+        The board (food and capsules) is covered by an incrementally maintained Zobrist hash,
+        so computing this only costs a constant amount of work per agent.
+        """
+
         if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+            self._hash = util.buildHash(self._score, self._gameover, self._win, self._boardHash,
+                *self._agentStates, self._layout)
 
         return self._hash
+
+def _toList(position):
+    if (position is None):
+        return None
+
+    return list(position)
+
+def _toTuple(position):
+    if (position is None):
+        return None
+
+    x, y = position
+    return (x, y)
@@ -51,10 +51,19 @@ class Grid:
 
         return x, y
 
+    def get(self, x, y):
+        return self._data[x][y]
+
+    def set(self, x, y, value):
+        self._data[x][y] = value
+
     def __eq__(self, other):
         if (other is None):
             return False
 
+        if (not isinstance(other, Grid)):
+            return NotImplemented
+
         return self._data == other._data
 
     def __getitem__(self, i):
@@ -82,3 +91,218 @@ class Grid:
         out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class BitGrid:
+    """
+    A 2-dimensional array of booleans backed by a single integer bitboard.
+    Cell (x, y) is stored in bit (x * height + y),
+    which is the same ordering `Grid.__hash__` uses,
+    so a `BitGrid` and a `Grid` with the same contents hash the same.
+
+    Data is accessed via grid[x][y] (just like `Grid`),
+    but copies, counts, equality checks, and hashes work on the whole integer at once
+    instead of visiting every cell.
+    This makes a `BitGrid` a good fit for boards that get copied often (like food).
+    """
+
+    def __init__(self, width, height, initialValue = False):
+        if (not isinstance(initialValue, bool)):
+            raise ValueError('Grids can only contain booleans')
+
+        self._width = width
+        self._height = height
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = self._fullMask()
+
+    @staticmethod
+    def fromGrid(grid):
+        """
+        Build a BitGrid with the same contents as any other grid.
+        """
+
+        bitGrid = BitGrid(grid.getWidth(), grid.getHeight())
+
+        for (x, y) in grid.asList(True):
+            bitGrid._bits |= (1 << bitGrid._index(x, y))
+
+        return bitGrid
+
+    @staticmethod
+    def fromBits(width, height, bits):
+        """
+        Build a BitGrid from the integer of another BitGrid with the same size
+        (see `BitGrid.getBits`).
+        """
+
+        bitGrid = BitGrid(width, height)
+        if (bits < 0 or bits > bitGrid._fullMask()):
+            raise ValueError('Bits do not fit in a %dx%d grid.' % (width, height))
+
+        bitGrid._bits = bits
+        return bitGrid
+
+    def asList(self, key = True):
+        bits = self._bits
+        if (not key):
+            bits = ~bits & self._fullMask()
+
+        values = []
+
+        while (bits):
+            lowBit = bits & -bits
+            index = lowBit.bit_length() - 1
+            values.append((index // self._height, index % self._height))
+            bits ^= lowBit
+
+        return values
+
+    def copy(self):
+        grid = BitGrid(self._width, self._height)
+        grid._bits = self._bits
+        return grid
+
+    def count(self, item = True):
+        numSet = _popcount(self._bits)
+
+        if (item):
+            return numSet
+
+        return self._width * self._height - numSet
+
+    def deepCopy(self):
+        return self.copy()
+
+    def get(self, x, y):
+        """
+        Get the value at (x, y) without building a column view.
+        """
+
+        return bool((self._bits >> self._index(x, y)) & 1)
+
+    def getBits(self):
+        """
+        Get the whole grid as a single integer (e.g. to save it as plain data).
+        """
+
+        return self._bits
+
+    def getHeight(self):
+        return self._height
+
+    def getWidth(self):
+        return self._width
+
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y) without building a column view.
+        """
+
+        bit = 1 << self._index(x, y)
+
+        if (value):
+            self._bits |= bit
+        else:
+            self._bits &= ~bit
+
+    def shallowCopy(self):
+        # Ints are immutable, so a shallow copy is the same as a full copy.
+        return self.copy()
+
+    def _fullMask(self):
+        return (1 << (self._width * self._height)) - 1
+
+    def _index(self, x, y):
+        if (x < 0 or x >= self._width or y < 0 or y >= self._height):
+            raise IndexError('Grid index out of range: (%d, %d).' % (x, y))
+
+        return x * self._height + y
+
+    def __and__(self, other):
+        """
+        Get a new grid with only the cells that are set in both grids (of the same size).
+        """
+
+        if (self._width != other._width or self._height != other._height):
+            raise ValueError('Grid sizes do not match: %dx%d and %dx%d.' %
+                    (self._width, self._height, other._width, other._height))
+
+        grid = BitGrid(self._width, self._height)
+        grid._bits = self._bits & other._bits
+        return grid
+
+    def __eq__(self, other):
+        if (other is None):
+            return False
+
+        if (isinstance(other, BitGrid)):
+            return (self._width == other._width
+                    and self._height == other._height
+                    and self._bits == other._bits)
+
+        if (isinstance(other, Grid)):
+            return self == BitGrid.fromGrid(other)
+
+        return NotImplemented
+
+    def __getitem__(self, x):
+        if (x < 0):
+            x += self._width
+
+        if (x < 0 or x >= self._width):
+            raise IndexError('Grid index out of range: %d.' % (x))
+
+        return _BitGridColumn(self, x)
+
+    def __hash__(self):
+        return hash(self._bits)
+
+    def __lt__(self, other):
+        return self.__hash__() < other.__hash__()
+
+    def __setitem__(self, x, column):
+        for y in range(self._height):
+            self.set(x, y, column[y])
+
+    def __str__(self):
+        out = [[str(self.get(x, y))[0] for x in range(self._width)] for y in range(self._height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+class _BitGridColumn:
+    """
+    A view of a single column of a `BitGrid`.
+    This is what allows a `BitGrid` to support the grid[x][y] notation.
+    """
+
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+
+    def __getitem__(self, y):
+        if (y < 0):
+            y += self._grid._height
+
+        return self._grid.get(self._x, y)
+
+    def __iter__(self):
+        for y in range(self._grid._height):
+            yield self._grid.get(self._x, y)
+
+    def __len__(self):
+        return self._grid._height
+
+    def __setitem__(self, y, value):
+        if (y < 0):
+            y += self._grid._height
+
+        self._grid.set(self._x, y, value)
+
+def _popcount(bits):
+    if (hasattr(bits, 'bit_count')):
+        return bits.bit_count()
+
+    return bin(bits).count('1')
@@ -0,0 +1,137 @@
+"""
+A bounded history of the game states an agent has observed.
+
+Keeping every observed state alive for a whole game adds up
+(especially in tournaments that play many games in one process),
+and agents almost always only look at the last couple of states.
+So, an `ObservationHistory` only keeps the last few states.
+
+Optionally, it can also keep a compact record of every observation
+(the agent states, score, and the food and capsules eaten since the observation before it).
+Older observations are then rebuilt from the first state on demand.
+"""
+
+import collections
+
+# The number of states kept by default.
+DEFAULT_MAX_STATES = 10
+
+class ObservationHistory(object):
+    """
+    The states observed by an agent, in order.
+    Index it like a list (negative indexes count back from the most recent observation).
+    """
+
+    def __init__(self, maxStates = DEFAULT_MAX_STATES, keepDeltas = False):
+        """
+        Args:
+            maxStates: The number of recent states to keep. Use None to keep every state.
+            keepDeltas: Keep a compact record of each observation,
+                so older observations can be rebuilt.
+        """
+
+        if (maxStates is not None):
+            maxStates = int(maxStates)
+            if (maxStates < 1):
+                raise ValueError('An observation history must keep at least one state, got %d.'
+                        % (maxStates))
+
+        self._maxStates = maxStates
+        self._keepDeltas = keepDeltas
+
+        self._states = collections.deque(maxlen = maxStates)
+        self._numObservations = 0
+
+        # The first state, and a record for every observation (see _makeRecord()).
+        self._firstState = None
+        self._records = []
+
+    def append(self, gameState):
+        if (self._keepDeltas):
+            if (self._numObservations == 0):
+                self._firstState = gameState
+                self._records.append(None)
+            else:
+                self._records.append(self._makeRecord(self._states[-1], gameState))
+
+        self._states.append(gameState)
+        self._numObservations += 1
+
+    def clear(self):
+        self._states.clear()
+        self._numObservations = 0
+
+        self._firstState = None
+        self._records = []
+
+    def getNumKept(self):
+        """
+        Get the number of states that are kept (and not rebuilt).
+        """
+
+        return len(self._states)
+
+    def _makeRecord(self, previousState, gameState):
+        """
+        Record what changed from the previous observation:
+        (food eaten, capsules eaten, the rest of the state).
+        """
+
+        eatenFood = ()
+        if (previousState.getNumFood() != gameState.getNumFood()):
+            eatenFood = tuple([position for position in previousState.getFood().asList()
+                    if (not gameState.hasFood(*position))])
+
+        eatenCapsules = ()
+        if (previousState.getNumCapsules() != gameState.getNumCapsules()):
+            capsules = gameState.getCapsules()
+            eatenCapsules = tuple([position for position in previousState.getCapsules()
+                    if (position not in capsules)])
+
+        return (eatenFood, eatenCapsules, gameState._getRecord())
+
+    def _rebuild(self, index):
+        if (index == 0):
+            return self._firstState
+
+        state = self._firstState._initSuccessor()
+        for i in range(1, index + 1):
+            eatenFood, eatenCapsules, record = self._records[i]
+
+            for (x, y) in eatenFood:
+                state.eatFood(x, y)
+
+            for (x, y) in eatenCapsules:
+                state.eatCapsule(x, y)
+
+        state._restoreRecord(record)
+
+        return state
+
+    def __getitem__(self, index):
+        if (index < 0):
+            index += self._numObservations
+
+        if (index < 0 or index >= self._numObservations):
+            raise IndexError('Observation index out of range.')
+
+        firstKept = self._numObservations - len(self._states)
+        if (index >= firstKept):
+            return self._states[index - firstKept]
+
+        if (not self._keepDeltas):
+            raise IndexError('Observation %d is no longer kept (only the last %d are).'
+                    % (index, self._maxStates))
+
+        return self._rebuild(index)
+
+    def __iter__(self):
+        start = 0
+        if (not self._keepDeltas):
+            start = self._numObservations - len(self._states)
+
+        for index in range(start, self._numObservations):
+            yield self[index]
+
+    def __len__(self):
+        return self._numObservations
@@ -0,0 +1,262 @@
+"""
+Tracking where opponents (probably) are.
+
+A `Belief` is a probability distribution over the open cells of a maze,
+stored as a flat list indexed by `pacai.core.mazegraph.MazeGraph` cell id.
+Every update works on the whole list at once:
+ - `Belief.elapseTime` moves the mass along the maze's adjacency
+   (an agent stays put or moves to any neighbor with equal probability),
+ - `Belief.observeDistance` weights every cell by how likely a noisy distance reading is
+   from that cell,
+ - `Belief.observePosition` and `Belief.observeNotAt` handle exact sightings (and non-sightings).
+
+An `OpponentTracker` keeps a belief for each opponent of a capture agent,
+and updates them from the states the agent observes.
+"""
+
+import operator
+
+# Noisy distance readings are off by a uniform amount in [-6, 6].
+SONAR_NOISE_RANGE = 13
+
+# Tables shared by every belief over the same maze.
+# {graphKey: _Tables, ...}
+_tablesCache = {}
+
+class Belief(object):
+    """
+    A distribution over the position of one agent.
+    """
+
+    def __init__(self, graph, position = None):
+        """
+        Args:
+            graph: The `pacai.core.mazegraph.MazeGraph` of the maze.
+            position: Where the agent is known to be, or None for anywhere (uniform).
+        """
+
+        self._graph = graph
+        self._tables = _getTables(graph)
+
+        # Indexed by cell id.
+        self._probabilities = None
+
+        if (position is None):
+            self.reset()
+        else:
+            self.observePosition(position)
+
+    def elapseTime(self):
+        """
+        One move passes: the agent stays put or moves to a neighboring cell,
+        all with the same probability.
+        """
+
+        weights = self._tables.moveWeights
+        shares = [probability * weight
+                for (probability, weight) in zip(self._probabilities, weights)]
+
+        self._probabilities = [sum(getSources(shares)) for getSources in self._tables.sources]
+
+    def getDistribution(self):
+        """
+        Get the positions that the agent may be on, as a dict of {position: probability}.
+        """
+
+        cells = self._graph.getCells()
+        return {cells[cellId]: probability
+                for (cellId, probability) in enumerate(self._probabilities)
+                if (probability > 0.0)}
+
+    def getMostLikelyPosition(self):
+        probabilities = self._probabilities
+        return self._graph.getPosition(max(range(len(probabilities)),
+                key = probabilities.__getitem__))
+
+    def getProbability(self, position):
+        cellId = self._graph.getCellId(position)
+        if (cellId is None):
+            return 0.0
+
+        return self._probabilities[cellId]
+
+    def observeDistance(self, position, noisyDistance, noiseModel):
+        """
+        Update on a noisy (manhattan) distance reading taken from a position.
+
+        Args:
+            position: Where the reading was taken from.
+            noisyDistance: The reading.
+            noiseModel: A dict of {error: probability},
+                where error is the reading minus the true distance (see `uniformNoise`).
+        """
+
+        x, y = position
+        xs = self._tables.xs
+        ys = self._tables.ys
+
+        likelihoods = [noiseModel.get(noisyDistance - abs(x - cellX) - abs(y - cellY), 0.0)
+                for (cellX, cellY) in zip(xs, ys)]
+
+        self._setWeighted([probability * likelihood
+                for (probability, likelihood) in zip(self._probabilities, likelihoods)])
+
+    def observeNotAt(self, positions):
+        """
+        The agent is known not to be on any of these positions.
+        """
+
+        probabilities = list(self._probabilities)
+        for position in positions:
+            cellId = self._graph.getCellId(position)
+            if (cellId is not None):
+                probabilities[cellId] = 0.0
+
+        self._setWeighted(probabilities)
+
+    def observePosition(self, position):
+        """
+        The agent is known to be on this position.
+        """
+
+        cellId = self._graph.getCellId(position)
+        if (cellId is None):
+            raise ValueError('Position is not an open cell: %s.' % (str(position)))
+
+        self._probabilities = [0.0] * self._graph.getNumCells()
+        self._probabilities[cellId] = 1.0
+
+    def reset(self):
+        """
+        Forget everything, the agent may be anywhere.
+        """
+
+        numCells = self._graph.getNumCells()
+        self._probabilities = [1.0 / numCells] * numCells
+
+    def _setWeighted(self, weights):
+        """
+        Use the (unnormalized) weights as the new distribution.
+        If no cell has any weight, then the observations disagree with the belief
+        and it starts over from uniform.
+        """
+
+        total = sum(weights)
+        if (total <= 0.0):
+            self.reset()
+            return
+
+        self._probabilities = [weight / total for weight in weights]
+
+class OpponentTracker(object):
+    """
+    Beliefs about the positions of an agent's opponents.
+    Call `OpponentTracker.update` with each state the agent observes
+    (in each, every opponent has moved once since the last).
+    """
+
+    def __init__(self, gameState, opponents, noiseModel = None):
+        """
+        Args:
+            gameState: The initial state, every opponent starts at their initial position.
+            opponents: The indexes of the agents to track.
+            noiseModel: The noise on distance readings (see `Belief.observeDistance`),
+                defaults to `uniformNoise`.
+        """
+
+        if (noiseModel is None):
+            noiseModel = uniformNoise()
+
+        self._graph = gameState.getInitialLayout().getMazeGraph()
+        self._noiseModel = noiseModel
+        self._startPositions = {}
+        self._beliefs = {}
+
+        for opponent in opponents:
+            self._startPositions[opponent] = gameState.getInitialAgentPosition(opponent)
+            self._beliefs[opponent] = Belief(self._graph, self._startPositions[opponent])
+
+    def getBelief(self, opponent):
+        return self._beliefs[opponent]
+
+    def getMostLikelyPosition(self, opponent):
+        return self._beliefs[opponent].getMostLikelyPosition()
+
+    def respawn(self, opponent):
+        """
+        The opponent was eaten and is back at their initial position.
+        """
+
+        self._beliefs[opponent].observePosition(self._startPositions[opponent])
+
+    def update(self, gameState, position = None, noisyDistances = None, notAt = ()):
+        """
+        Move every belief forward one move, then update on what is known.
+        Opponents with a position in the state are known exactly.
+        Otherwise, their belief is updated on their noisy distance (if given)
+        and on the positions they are known not to be on.
+
+        Args:
+            gameState: The observed state.
+            position: Where the noisy distances were measured from.
+            noisyDistances: A dict of {opponent: noisyDistance}.
+            notAt: Positions none of the opponents are on (e.g. what the team can see).
+        """
+
+        if (noisyDistances is not None and position is None):
+            raise ValueError('Noisy distances need the position they were measured from.')
+
+        for (opponent, belief) in self._beliefs.items():
+            belief.elapseTime()
+
+            opponentPosition = gameState.getAgentPosition(opponent)
+            if (opponentPosition is not None):
+                belief.observePosition(opponentPosition)
+                continue
+
+            if (noisyDistances is not None and opponent in noisyDistances):
+                belief.observeDistance(position, noisyDistances[opponent], self._noiseModel)
+
+            if (len(notAt) > 0):
+                belief.observeNotAt(notAt)
+
+def uniformNoise(noiseRange = SONAR_NOISE_RANGE):
+    """
+    Get a noise model (see `Belief.observeDistance`) where readings are off by
+    a uniform amount, centered on zero.
+    """
+
+    if (noiseRange < 1 or noiseRange % 2 == 0):
+        raise ValueError('The noise range must be a positive odd number, got %d.' % (noiseRange))
+
+    halfRange = noiseRange // 2
+    return {error: 1.0 / noiseRange for error in range(-halfRange, halfRange + 1)}
+
+class _Tables(object):
+    def __init__(self, graph):
+        cells = graph.getCells()
+
+        self.xs = [x for (x, y) in cells]
+        self.ys = [y for (x, y) in cells]
+
+        # The mass that leaves each cell for each of its destinations (including itself).
+        self.moveWeights = [1.0 / (len(neighbors) + 1) for neighbors in graph.getAllNeighbors()]
+
+        # For each cell, a function that picks out the values of the cells
+        # that mass can arrive from (moves are reversible).
+        self.sources = []
+        for (cellId, neighbors) in enumerate(graph.getAllNeighbors()):
+            if (len(neighbors) == 0):
+                self.sources.append(_getSingle(cellId))
+            else:
+                self.sources.append(operator.itemgetter(cellId, *neighbors))
+
+def _getSingle(cellId):
+    return lambda values: (values[cellId],)
+
+def _getTables(graph):
+    key = graph.getKey()
+    if (key not in _tablesCache):
+        _tablesCache[key] = _Tables(graph)
+
+    return _tablesCache[key]
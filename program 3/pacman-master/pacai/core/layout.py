@@ -1,7 +1,20 @@
+"""
+Layouts are the static part of a game: the walls, and where the food, capsules, and agents start.
+
+Layout files are only parsed once per process (see `getLayout`),
+so every game and agent that loads the same layout shares one `Layout`,
+along with everything derived from it (legal actions, the maze graph, dead ends, etc.).
+Derived indexes are made the first time they are asked for.
+"""
+
 import os
 import random
 
+from pacai.core import mazegraph
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
+from pacai.core.grid import BitGrid
 from pacai.core.grid import Grid
 
 # By default, the layout directory is adjacent to this file.
@@ -9,6 +22,10 @@ DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '
 
 GHOST_NUMS = ['1', '2', '3', '4']
 
+# Parsed layouts, shared by everyone in the process.
+# {(path, maxGhosts): (modifiedTime, Layout), ...}
+_layoutCache = {}
+
 class Layout(object):
     """
     A Layout manages the static information about the game board.
@@ -17,8 +34,10 @@ class Layout(object):
     def __init__(self, layoutText, maxGhosts = None):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
+        # Walls are read constantly but never copied, so they stay in a list-backed grid.
+        # Food is copied (and hashed) by every state that eats, so it uses a bitboard.
         self.walls = Grid(self.width, self.height, initialValue = False)
-        self.food = Grid(self.width, self.height, initialValue = False)
+        self.food = BitGrid(self.width, self.height, initialValue = False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
@@ -26,9 +45,102 @@ class Layout(object):
 
         self.processLayoutText(layoutText, maxGhosts)
 
+        # Legal actions are asked for by every rule class for every successor,
+        # so they are computed once for every open cell.
+        # {(x, y): (action, ...), ...}
+        self._legalActions = {}
+        # {(x, y): {direction: (action, ...), ...}, ...}
+        self._legalGhostActions = {}
+
+        self._buildActionTables()
+
+        # Derived indexes (see the getters), made when first asked for.
+        self._mazeGraph = None
+        self._deadEnds = None
+        self._chokePoints = None
+        self._sideMasks = None
+
+    def getChokePoints(self):
+        """
+        Get the open positions that split the maze in two when blocked
+        (the articulation points of the maze graph), in cell order.
+        The caller should not modify the list.
+        """
+
+        if (self._chokePoints is None):
+            graph = self.getMazeGraph()
+            cells = _findArticulationPoints(graph.getAllNeighbors())
+            self._chokePoints = [graph.getPosition(cellId) for cellId in cells]
+
+        return self._chokePoints
+
+    def getDeadEnds(self):
+        """
+        Get the open positions with only one open neighbor, in cell order.
+        The caller should not modify the list.
+        """
+
+        if (self._deadEnds is None):
+            graph = self.getMazeGraph()
+            self._deadEnds = [graph.getPosition(cellId) for cellId in range(graph.getNumCells())
+                    if (len(graph.getNeighbors(cellId)) == 1)]
+
+        return self._deadEnds
+
+    def getMazeGraph(self):
+        """
+        Get the `pacai.core.mazegraph.MazeGraph` for these walls:
+        the open cells, their ids, and their neighbors.
+        """
+
+        if (self._mazeGraph is None):
+            self._mazeGraph = mazegraph.getMazeGraph(self.walls)
+
+        return self._mazeGraph
+
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getOpenCells(self):
+        """
+        Get every open (non-wall) position, in cell order.
+        The caller should not modify the list.
+        """
+
+        return self.getMazeGraph().getCells()
+
+    def getSideMask(self, red):
+        """
+        Get a `pacai.core.grid.BitGrid` of every position on the red (left) half of the board,
+        or the blue (right) half.
+        The caller should not modify the grid.
+        """
+
+        if (self._sideMasks is None):
+            redMask = BitGrid(self.width, self.height, initialValue = False)
+            blueMask = BitGrid(self.width, self.height, initialValue = False)
+
+            for x in range(self.width):
+                for y in range(self.height):
+                    if (self.isOnRedSide((x, y))):
+                        redMask.set(x, y, True)
+                    else:
+                        blueMask.set(x, y, True)
+
+            self._sideMasks = (redMask, blueMask)
+
+        if (red):
+            return self._sideMasks[0]
+
+        return self._sideMasks[1]
+
+    def isOnRedSide(self, position):
+        """
+        Red is on the left half of the board, blue on the right.
+        """
+
+        return position[0] < int(self.width / 2)
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -39,6 +151,27 @@ class Layout(object):
     def getWidth(self):
         return self.width
 
+    def getLegalActions(self, position):
+        """
+        Get the legal actions (as a tuple) for an agent on an open, integral position
+        (see `pacai.core.actions.Actions.getPossibleActions`).
+        Returns None for any other position, e.g. an agent between two cells.
+        """
+
+        return self._legalActions.get(position)
+
+    def getLegalGhostActions(self, position, direction):
+        """
+        Like getLegalActions(), but for a ghost that arrived moving in the given direction:
+        ghosts cannot stop, and can only turn around in a dead end.
+        """
+
+        actions = self._legalGhostActions.get(position)
+        if (actions is None):
+            return None
+
+        return actions[direction]
+
     def getRandomLegalPosition(self):
         x = random.choice(list(range(self.width)))
         y = random.choice(list(range(self.height)))
@@ -78,6 +211,45 @@ class Layout(object):
     def deepCopy(self):
         return Layout(self.layoutText[:])
 
+    def _buildActionTables(self):
+        for x in range(self.width):
+            for y in range(self.height):
+                if (self.walls[x][y]):
+                    continue
+
+                actions = []
+                for action, (dx, dy) in Actions._directionsAsList:
+                    nextX = x + dx
+                    nextY = y + dy
+
+                    # Positions off the board are treated as walls.
+                    if (nextX < 0 or nextX >= self.width or nextY < 0 or nextY >= self.height):
+                        continue
+
+                    if (not self.walls[nextX][nextY]):
+                        actions.append(action)
+
+                self._legalActions[(x, y)] = tuple(actions)
+
+                moves = [action for action in actions if (action != Directions.STOP)]
+                ghostActions = {}
+                for direction in Actions._directions:
+                    reverse = Actions.reverseDirection(direction)
+                    if (reverse in moves and len(moves) > 1):
+                        ghostActions[direction] = tuple([move for move in moves
+                                if (move != reverse)])
+                    else:
+                        ghostActions[direction] = tuple(moves)
+
+                self._legalGhostActions[(x, y)] = ghostActions
+
+    def __getstate__(self):
+        # The maze graph is shared through `pacai.core.mazegraph.getMazeGraph`, so it is not saved.
+        state = self.__dict__.copy()
+        state['_mazeGraph'] = None
+
+        return state
+
     def processLayoutText(self, layoutText, maxGhosts):
         """
         Coordinates are flipped from the input format to the (x, y) convention here
@@ -104,9 +276,9 @@ class Layout(object):
 
     def processLayoutChar(self, x, y, layoutChar, maxGhosts):
         if (layoutChar == '%'):
-            self.walls[x][y] = True
+            self.walls.set(x, y, True)
         elif (layoutChar == '.'):
-            self.food[x][y] = True
+            self.food.set(x, y, True)
         elif (layoutChar == 'o'):
             self.capsules.append((x, y))
         elif (layoutChar == 'P'):
@@ -119,6 +291,13 @@ class Layout(object):
             self.numGhosts += 1
 
 def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
+    """
+    Get a layout by name.
+
+    Each layout file is only parsed once per process (unless the file changes),
+    after that the same `Layout` is returned.
+    """
+
     if (not name.endswith('.lay')):
         name += '.lay'
 
@@ -126,6 +305,13 @@ def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
     if (not os.path.isfile(path)):
         raise Exception("Could not locate layout file: '%s'." % (path))
 
+    key = (os.path.realpath(path), maxGhosts)
+    modifiedTime = os.stat(path).st_mtime_ns
+
+    cached = _layoutCache.get(key)
+    if (cached is not None and cached[0] == modifiedTime):
+        return cached[1]
+
     rows = []
     with open(path, 'r') as file:
         for line in file:
@@ -133,4 +319,63 @@ def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
             if (line != ''):
                 rows.append(line)
 
-    return Layout(rows, maxGhosts)
+    layout = Layout(rows, maxGhosts)
+    _layoutCache[key] = (modifiedTime, layout)
+    return layout
+
+def _findArticulationPoints(neighbors):
+    """
+    Get the (sorted) ids of the cells that disconnect the graph when removed,
+    using an iterative version of Tarjan's depth-first search.
+    """
+
+    numCells = len(neighbors)
+    order = [-1] * numCells
+    low = [0] * numCells
+    points = set()
+    count = 0
+
+    for root in range(numCells):
+        if (order[root] != -1):
+            continue
+
+        order[root] = count
+        low[root] = count
+        count += 1
+
+        rootChildren = 0
+        stack = [(root, -1, iter(neighbors[root]))]
+
+        while (len(stack) > 0):
+            cellId, parent, children = stack[-1]
+
+            descended = False
+            for child in children:
+                if (order[child] == -1):
+                    order[child] = count
+                    low[child] = count
+                    count += 1
+
+                    if (cellId == root):
+                        rootChildren += 1
+
+                    stack.append((child, cellId, iter(neighbors[child])))
+                    descended = True
+                    break
+                elif (child != parent):
+                    low[cellId] = min(low[cellId], order[child])
+
+            if (descended):
+                continue
+
+            stack.pop()
+
+            if (parent != -1):
+                low[parent] = min(low[parent], low[cellId])
+                if (parent != root and low[cellId] >= order[parent]):
+                    points.add(parent)
+
+        if (rootChildren > 1):
+            points.add(root)
+
+    return sorted(points)
@@ -0,0 +1,136 @@
+"""
+A compact graph view of a maze.
+Every open (non-wall) position is given an integer cell id,
+so that algorithms can work with flat lists/arrays indexed by cell id
+instead of dicts keyed by position tuples.
+"""
+
+import hashlib
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+# Graphs are immutable, so they can be shared by everyone in the process.
+# {wallsKey: MazeGraph, ...}
+_graphCache = {}
+
+class MazeGraph(object):
+    """
+    The open cells of a maze and the moves that connect them.
+
+    Cell ids are assigned in the same order as `pacai.core.grid.Grid.asList`
+    (increasing x, then increasing y).
+    """
+
+    def __init__(self, walls):
+        self._width = walls.getWidth()
+        self._height = walls.getHeight()
+        self._key = wallsKey(walls)
+
+        # {cellId: (x, y), ...}
+        self._cells = walls.asList(False)
+
+        # Flat index (x * height + y) to cell id (-1 for walls).
+        self._cellIndex = [-1] * (self._width * self._height)
+        for (cellId, (x, y)) in enumerate(self._cells):
+            self._cellIndex[x * self._height + y] = cellId
+
+        # For each cell, the ids of the neighboring cells and the actions that reach them.
+        # Both are ordered by `pacai.core.directions.Directions.CARDINAL`.
+        self._neighbors = []
+        self._neighborActions = []
+
+        for (x, y) in self._cells:
+            neighbors = []
+            actions = []
+
+            for action in Directions.CARDINAL:
+                dx, dy = Actions.directionToVector(action)
+                nextX, nextY = int(x + dx), int(y + dy)
+
+                if (nextX < 0 or nextX >= self._width or nextY < 0 or nextY >= self._height):
+                    continue
+
+                if (walls[nextX][nextY]):
+                    continue
+
+                neighbors.append(self._cellIndex[nextX * self._height + nextY])
+                actions.append(action)
+
+            self._neighbors.append(tuple(neighbors))
+            self._neighborActions.append(tuple(actions))
+
+    def getAllNeighbors(self):
+        """
+        Get the neighbor ids for every cell (indexed by cell id).
+        The caller should not modify the list.
+        """
+
+        return self._neighbors
+
+    def getCellId(self, position):
+        """
+        Get the cell id for an integral position, or None if the position is not open.
+        """
+
+        x, y = int(position[0]), int(position[1])
+        if (x < 0 or x >= self._width or y < 0 or y >= self._height):
+            return None
+
+        cellId = self._cellIndex[x * self._height + y]
+        if (cellId < 0):
+            return None
+
+        return cellId
+
+    def getCells(self):
+        """
+        Get the position of every cell (indexed by cell id).
+        The caller should not modify the list.
+        """
+
+        return self._cells
+
+    def getHeight(self):
+        return self._height
+
+    def getKey(self):
+        """
+        Get a stable key for the walls this graph was built from.
+        """
+
+        return self._key
+
+    def getNeighborActions(self, cellId):
+        return self._neighborActions[cellId]
+
+    def getNeighbors(self, cellId):
+        return self._neighbors[cellId]
+
+    def getNumCells(self):
+        return len(self._cells)
+
+    def getPosition(self, cellId):
+        return self._cells[cellId]
+
+    def getWidth(self):
+        return self._width
+
+def getMazeGraph(walls):
+    """
+    Get the (shared) graph for the given walls.
+    """
+
+    key = wallsKey(walls)
+    if (key not in _graphCache):
+        _graphCache[key] = MazeGraph(walls)
+
+    return _graphCache[key]
+
+def wallsKey(walls):
+    """
+    A stable (across processes) key for a walls grid.
+    """
+
+    text = '%dx%d\n%s' % (walls.getWidth(), walls.getHeight(), str(walls))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
@@ -1,4 +1,7 @@
 import abc
+import array
+import heapq
+import operator
 
 class MarkovDecisionProcess(abc.ABC):
     @abc.abstractmethod
@@ -59,3 +62,368 @@ class MarkovDecisionProcess(abc.ABC):
         """
 
         pass
+
+class CompiledMDP(object):
+    """
+    A `MarkovDecisionProcess` compiled into flat, index based tables.
+    Compiling asks the MDP about every state and action exactly once,
+    so solvers never have to go back through the (possibly slow) MDP methods.
+
+    States are numbered by their position in `MarkovDecisionProcess.getStates`.
+    Every (state, action) pair gets an index into the sparse transition tables,
+    and the pairs for each state are contiguous:
+    the pairs for state `i` are `range(actionOffsets[i], actionOffsets[i + 1])`.
+    """
+
+    def __init__(self, mdp):
+        self._states = list(mdp.getStates())
+        self._stateIndexes = {state: index for (index, state) in enumerate(self._states)}
+
+        # Per state offsets into the (state, action) pair tables.
+        self._actionOffsets = array.array('i', [0])
+
+        # Per (state, action) pair.
+        self._actions = []
+        self._nextStates = []
+        self._probs = []
+        self._rewards = array.array('d')
+
+        for state in self._states:
+            for action in mdp.getPossibleActions(state):
+                nextStates = []
+                probs = []
+                reward = 0.0
+
+                for (nextState, prob) in mdp.getTransitionStatesAndProbs(state, action):
+                    nextStates.append(self._stateIndexes[nextState])
+                    probs.append(prob)
+                    reward += prob * mdp.getReward(state, action, nextState)
+
+                self._actions.append(action)
+                self._nextStates.append(tuple(nextStates))
+                self._probs.append(tuple(probs))
+                self._rewards.append(reward)
+
+            self._actionOffsets.append(len(self._actions))
+
+    def getActionOffsets(self):
+        return self._actionOffsets
+
+    def getActions(self):
+        return self._actions
+
+    def getExpectedRewards(self):
+        """
+        The expected immediate reward for each (state, action) pair.
+        """
+
+        return self._rewards
+
+    def getNextStates(self):
+        """
+        The next state indexes for each (state, action) pair.
+        """
+
+        return self._nextStates
+
+    def getNumStates(self):
+        return len(self._states)
+
+    def getProbs(self):
+        """
+        The transition probabilities for each (state, action) pair,
+        parallel to `CompiledMDP.getNextStates`.
+        """
+
+        return self._probs
+
+    def getStateIndex(self, state):
+        """
+        Get the index of a state, or None if the state is not in the MDP.
+        """
+
+        return self._stateIndexes.get(state)
+
+    def getStates(self):
+        return self._states
+
+class ValueTable(object):
+    """
+    The values of every state in a `CompiledMDP`,
+    with q-values and policies derived from them on demand.
+    This has the same value/q-value/policy methods as
+    `pacai.agents.learning.value.ValueEstimationAgent`, so it can be displayed like an agent.
+
+    States that are not in the MDP (e.g. gridworld walls) have a value of 0 and no policy.
+    """
+
+    def __init__(self, mdp, discountRate, values):
+        """
+        Args:
+            mdp: A `CompiledMDP`.
+            discountRate: The discount applied to future rewards.
+            values: The value of each state (indexed by state index), this should not be modified.
+        """
+
+        self._mdp = mdp
+        self._discountRate = discountRate
+        self._values = values
+
+    def getPolicy(self, state):
+        """
+        The best action in a state (the first one on ties), or None if there are no actions.
+        """
+
+        index = self._mdp.getStateIndex(state)
+        if (index is None):
+            return None
+
+        offsets = self._mdp.getActionOffsets()
+
+        bestAction = None
+        bestValue = None
+
+        for pair in range(offsets[index], offsets[index + 1]):
+            value = self._qValue(pair)
+            if (bestValue is None or value > bestValue):
+                bestAction = self._mdp.getActions()[pair]
+                bestValue = value
+
+        return bestAction
+
+    def getQValue(self, state, action):
+        index = self._mdp.getStateIndex(state)
+        if (index is None):
+            return 0.0
+
+        offsets = self._mdp.getActionOffsets()
+        actions = self._mdp.getActions()
+
+        for pair in range(offsets[index], offsets[index + 1]):
+            if (actions[pair] == action):
+                return self._qValue(pair)
+
+        raise ValueError('Action (%s) is not possible in state (%s).' % (action, str(state)))
+
+    def getValue(self, state):
+        index = self._mdp.getStateIndex(state)
+        if (index is None):
+            return 0.0
+
+        return self._values[index]
+
+    def getValues(self):
+        """
+        Get the values as a dict keyed by state.
+        """
+
+        return dict(zip(self._mdp.getStates(), self._values))
+
+    def _qValue(self, pair):
+        expected = sum(map(operator.mul, self._mdp.getProbs()[pair],
+                map(self._values.__getitem__, self._mdp.getNextStates()[pair])))
+
+        return self._mdp.getExpectedRewards()[pair] + self._discountRate * expected
+
+class ValueIterationSolver(object):
+    """
+    Value iteration over a `CompiledMDP`.
+
+    Three update schemes are available:
+     - `ValueIterationSolver.iterate` (or `ValueIterationSolver.sweeps`): Batch (Jacobi) sweeps,
+       every state is backed up from the previous sweep's values.
+       This matches the textbook algorithm exactly.
+     - `ValueIterationSolver.iterateInPlace`: Gauss-Seidel sweeps,
+       backups immediately use values from the same sweep (usually converges in fewer sweeps).
+     - `ValueIterationSolver.prioritizedSweep`: Back up the states with the largest
+       Bellman error first, and only revisit the predecessors of states that changed.
+
+    States without any actions (e.g. terminal states) always have a value of 0.
+    """
+
+    def __init__(self, mdp, discountRate = 0.9):
+        """
+        Args:
+            mdp: A `MarkovDecisionProcess` or an already `CompiledMDP`.
+            discountRate: The discount applied to future rewards.
+        """
+
+        if (not isinstance(mdp, CompiledMDP)):
+            mdp = CompiledMDP(mdp)
+
+        self._mdp = mdp
+        self._discountRate = discountRate
+        self._values = [0.0] * mdp.getNumStates()
+
+        # Backups are the inner loop, so keep the tables close at hand.
+        self._offsets = mdp.getActionOffsets()
+        self._nextStates = mdp.getNextStates()
+        self._probs = mdp.getProbs()
+        self._rewards = mdp.getExpectedRewards()
+
+        # Built the first time they are needed (only by prioritized sweeping).
+        self._predecessors = None
+
+    def getCompiledMDP(self):
+        return self._mdp
+
+    def getPolicy(self, state):
+        return self.getSnapshot().getPolicy(state)
+
+    def getQValue(self, state, action):
+        return self.getSnapshot().getQValue(state, action)
+
+    def getSnapshot(self):
+        """
+        Get a `ValueTable` of the current values.
+        Snapshots are never changed by later iterations.
+        """
+
+        return ValueTable(self._mdp, self._discountRate, self._values)
+
+    def getValue(self, state):
+        return self.getSnapshot().getValue(state)
+
+    def getValues(self):
+        """
+        Get the current values as a dict keyed by state.
+        """
+
+        return self.getSnapshot().getValues()
+
+    def iterate(self, iters, threshold = 0.0):
+        """
+        Run up to `iters` batch sweeps (see `ValueIterationSolver.sweeps`).
+
+        Returns the number of sweeps that were run.
+        """
+
+        numSweeps = 0
+        for snapshot in self.sweeps(iters, threshold):
+            numSweeps += 1
+
+        return numSweeps
+
+    def sweeps(self, iters, threshold = 0.0):
+        """
+        A generator that runs up to `iters` batch sweeps,
+        and yields a `ValueTable` snapshot after each one.
+        Stops early once no value changes by more than the threshold
+        (use None to always run every sweep).
+
+        Each sweep builds a new list of values, so snapshots share (instead of copy) them.
+        """
+
+        for sweep in range(iters):
+            newValues = [self._backup(index, self._values) for index in range(len(self._values))]
+            delta = max(map(abs, map(operator.sub, newValues, self._values)), default = 0.0)
+
+            self._values = newValues
+            yield self.getSnapshot()
+
+            if (threshold is not None and delta <= threshold):
+                return
+
+    def iterateInPlace(self, iters, threshold = 0.0):
+        """
+        Run up to `iters` Gauss-Seidel sweeps,
+        stopping early once no value changes by more than the threshold.
+
+        Returns the number of sweeps that were run.
+        """
+
+        # Work on a copy, snapshots may be sharing the current values.
+        values = list(self._values)
+        self._values = values
+
+        for sweep in range(iters):
+            delta = 0.0
+
+            for index in range(len(values)):
+                value = self._backup(index, values)
+                delta = max(delta, abs(value - values[index]))
+                values[index] = value
+
+            if (delta <= threshold):
+                return sweep + 1
+
+        return iters
+
+    def prioritizedSweep(self, maxBackups, threshold = 1e-6):
+        """
+        Back up states in order of their Bellman error until no state has an error
+        above the threshold (or `maxBackups` backups have been done).
+
+        Returns the number of backups that were done.
+        """
+
+        # Work on a copy, snapshots may be sharing the current values.
+        values = list(self._values)
+        self._values = values
+
+        predecessors = self._getPredecessors()
+
+        # Max heap (by negated error) with lazy deletion:
+        # an entry is stale if the state's error has changed since it was pushed.
+        errors = [abs(self._backup(index, values) - values[index])
+                for index in range(len(values))]
+        queue = [(-error, index) for (index, error) in enumerate(errors) if (error > threshold)]
+        heapq.heapify(queue)
+
+        numBackups = 0
+        while (len(queue) > 0 and numBackups < maxBackups):
+            negativeError, index = heapq.heappop(queue)
+            if (-negativeError != errors[index]):
+                continue
+
+            values[index] = self._backup(index, values)
+            errors[index] = 0.0
+            numBackups += 1
+
+            for predecessor in predecessors[index]:
+                error = abs(self._backup(predecessor, values) - values[predecessor])
+                if (error == errors[predecessor]):
+                    continue
+
+                errors[predecessor] = error
+                if (error > threshold):
+                    heapq.heappush(queue, (-error, predecessor))
+
+        return numBackups
+
+    def _backup(self, index, values):
+        """
+        The Bellman backup of a single state: the best q-value over its actions.
+        """
+
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+
+        if (start == end):
+            return 0.0
+
+        getValue = values.__getitem__
+        best = None
+
+        for pair in range(start, end):
+            expected = sum(map(operator.mul, self._probs[pair],
+                    map(getValue, self._nextStates[pair])))
+            value = self._rewards[pair] + self._discountRate * expected
+
+            if (best is None or value > best):
+                best = value
+
+        return best
+
+    def _getPredecessors(self):
+        if (self._predecessors is not None):
+            return self._predecessors
+
+        predecessors = [set() for i in range(self._mdp.getNumStates())]
+        for index in range(self._mdp.getNumStates()):
+            for pair in range(self._offsets[index], self._offsets[index + 1]):
+                for nextIndex in self._nextStates[pair]:
+                    predecessors[nextIndex].add(index)
+
+        self._predecessors = [tuple(sorted(indexes)) for indexes in predecessors]
+        return self._predecessors
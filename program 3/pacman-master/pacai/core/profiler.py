@@ -0,0 +1,353 @@
+"""
+Timing and counting for whole game runs (the `--profile` option of the game binaries).
+
+A `Profiler` is handed to every `pacai.core.game.Game` that should be measured.
+It records:
+ - every move of every agent (a latency histogram, the total, and the slowest move),
+ - how many successor states each agent generated while choosing its moves
+   (and how long that took),
+ - engine sections: the game's own `generateSuccessor`, the rules' `process`, and the view,
+ - crashes and timeouts, with the game and turn they happened on.
+
+Successors are counted by wrapping a method (see `Profiler.instrument`)
+only while the profiler is running, so nothing is paid for when profiling is off.
+
+The report is written as JSON or CSV (picked by the file extension),
+and a `cProfile` dump of the whole run can be written alongside it.
+"""
+
+import cProfile
+import csv
+import functools
+import json
+import logging
+import time
+
+# The upper bounds (in seconds) of the buckets in move latency histograms.
+# The last bucket catches everything else.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0)
+
+# Engine sections timed by `pacai.core.game.Game`.
+SECTION_SUCCESSOR = 'generateSuccessor'
+SECTION_PROCESS = 'process'
+SECTION_VIEW = 'view'
+
+class Profiler(object):
+    """
+    Collects timings for a run of games.
+    Use it as a context manager (or call start() and stop()) around the games,
+    then get the results with getReport() or writeReport().
+    """
+
+    def __init__(self, reportPath = None, cProfilePath = None, buckets = DEFAULT_BUCKETS,
+            clock = time.perf_counter):
+        """
+        Args:
+            reportPath: Where stop() writes the report (.csv for CSV, anything else for JSON).
+                Use None to not write a report.
+            cProfilePath: Where stop() writes `cProfile` stats for the whole run
+                (read them with `pstats`). Use None to not run `cProfile`.
+            buckets: The increasing upper bounds (in seconds) of the histogram buckets.
+            clock: A function that returns the current time in seconds.
+        """
+
+        if (list(buckets) != sorted(buckets)):
+            raise ValueError('Histogram buckets must be increasing: %s.' % (str(buckets)))
+
+        self.clock = clock
+
+        self._reportPath = reportPath
+        self._cProfilePath = cProfilePath
+        self._cProfile = None
+        self._buckets = tuple(buckets)
+
+        # [(class, methodName), ...]
+        self._instrumented = []
+        # [(class, methodName, original), ...]
+        self._installed = []
+
+        # [calls, seconds]
+        self._successors = [0, 0.0]
+        # {section: [calls, seconds, maxSeconds], ...}
+        self._sections = {}
+        # {agentIndex: _AgentStats, ...}
+        self._agents = {}
+        self._events = []
+
+        self._numGames = 0
+        self._turn = 0
+        self._startTime = None
+        self._totalTime = 0.0
+
+        self._moveStart = None
+        self._moveCalls = 0
+        self._moveCallTime = 0.0
+
+    def instrument(self, cls, methodName = 'generateSuccessor'):
+        """
+        Count the calls to (and time spent in) a method of a class as generated successors
+        while the profiler runs.
+        The calls made during each move are also charged to the moving agent.
+        """
+
+        self._instrumented.append((cls, methodName))
+
+    def start(self):
+        if (self._startTime is not None):
+            raise ValueError('The profiler is already running.')
+
+        for (cls, methodName) in self._instrumented:
+            original = cls.__dict__.get(methodName)
+            setattr(cls, methodName, self._wrap(getattr(cls, methodName)))
+            self._installed.append((cls, methodName, original))
+
+        if (self._cProfilePath is not None):
+            self._cProfile = cProfile.Profile()
+            self._cProfile.enable()
+
+        self._startTime = self.clock()
+
+    def stop(self):
+        """
+        Stop profiling, and write out the report and cProfile stats (if there are paths for them).
+        """
+
+        if (self._startTime is None):
+            return
+
+        self._totalTime += self.clock() - self._startTime
+        self._startTime = None
+
+        if (self._cProfile is not None):
+            self._cProfile.disable()
+            self._cProfile.dump_stats(self._cProfilePath)
+            logging.info("cProfile stats written to: '%s'." % (self._cProfilePath))
+            self._cProfile = None
+
+        # Put back the original methods (in reverse, in case a method was instrumented twice).
+        for (cls, methodName, original) in reversed(self._installed):
+            if (original is None):
+                delattr(cls, methodName)
+            else:
+                setattr(cls, methodName, original)
+
+        self._installed = []
+
+        if (self._reportPath is not None):
+            self.writeReport(self._reportPath)
+            logging.info("Profile written to: '%s'." % (self._reportPath))
+
+    def startGame(self, agents):
+        self._numGames += 1
+        self._turn = 0
+
+        for (agentIndex, agent) in enumerate(agents):
+            stats = self._getAgentStats(agentIndex)
+            if (stats.name is None):
+                stats.name = agent.__class__.__name__
+
+    def startMove(self, agentIndex):
+        self._turn += 1
+
+        self._moveCalls, self._moveCallTime = self._successors
+
+        self._moveStart = self.clock()
+
+    def endMove(self, agentIndex):
+        """
+        Finish the move started by the last call to startMove().
+        """
+
+        seconds = self.clock() - self._moveStart
+
+        calls, callTime = self._successors
+
+        stats = self._getAgentStats(agentIndex)
+        stats.addMove(seconds, self._getBucket(seconds), self._numGames, self._turn)
+        stats.successors += calls - self._moveCalls
+        stats.successorTime += callTime - self._moveCallTime
+
+        return seconds
+
+    def addStartupTime(self, agentIndex, seconds):
+        self._getAgentStats(agentIndex).startupTime += seconds
+
+    def addTime(self, section, seconds):
+        """
+        Charge some time to an engine section (e.g. `SECTION_PROCESS`).
+        """
+
+        stats = self._sections.get(section)
+        if (stats is None):
+            stats = [0, 0.0, 0.0]
+            self._sections[section] = stats
+
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+
+    def recordEvent(self, agentIndex, kind, **info):
+        """
+        Record something notable (e.g. a 'crash' or 'timeout') for an agent on the current turn.
+        """
+
+        event = {
+            'game': self._numGames,
+            'turn': self._turn,
+            'agent': agentIndex,
+            'type': kind,
+        }
+        event.update(info)
+
+        self._events.append(event)
+
+    def getReport(self):
+        """
+        Get everything collected so far as a dict (of JSON-friendly values).
+        """
+
+        totalTime = self._totalTime
+        if (self._startTime is not None):
+            totalTime += self.clock() - self._startTime
+
+        agents = [self._agents[agentIndex].getReport(agentIndex, self._buckets)
+                for agentIndex in sorted(self._agents)]
+
+        sections = {}
+        for (section, (calls, seconds, maxSeconds)) in sorted(self._sections.items()):
+            sections[section] = {
+                'calls': calls,
+                'totalTime': seconds,
+                'meanTime': _mean(seconds, calls),
+                'maxTime': maxSeconds,
+            }
+
+        return {
+            'games': self._numGames,
+            'totalTime': totalTime,
+            'agents': agents,
+            'sections': sections,
+            'successors': {
+                'calls': self._successors[0],
+                'totalTime': self._successors[1],
+            },
+            'events': list(self._events),
+        }
+
+    def writeReport(self, path):
+        """
+        Write the report to a file.
+        Paths ending in '.csv' get a table with a row for each agent and engine section
+        (events are only in the JSON report), all others get JSON.
+        """
+
+        report = self.getReport()
+
+        if (not path.lower().endswith('.csv')):
+            with open(path, 'w') as file:
+                json.dump(report, file, indent = 4)
+
+            return
+
+        bucketNames = ['<=%gs' % (bound) for bound in self._buckets]
+        bucketNames.append('>%gs' % (self._buckets[-1]))
+
+        with open(path, 'w', newline = '') as file:
+            writer = csv.writer(file)
+            writer.writerow(['kind', 'name', 'calls', 'totalTime', 'meanTime', 'maxTime',
+                    'successors', 'successorTime'] + bucketNames)
+
+            for agent in report['agents']:
+                name = '%d:%s' % (agent['agent'], agent['name'])
+                row = ['agent', name, agent['moves'], agent['totalTime'], agent['meanTime']]
+                row += [agent['maxTime'], agent['successors'], agent['successorTime']]
+                row += [bucket['count'] for bucket in agent['histogram']]
+
+                writer.writerow(row)
+
+            for (section, stats) in report['sections'].items():
+                writer.writerow(['section', section, stats['calls'], stats['totalTime'],
+                        stats['meanTime'], stats['maxTime'], '', ''] + [''] * len(bucketNames))
+
+    def _getAgentStats(self, agentIndex):
+        stats = self._agents.get(agentIndex)
+        if (stats is None):
+            stats = _AgentStats(len(self._buckets) + 1)
+            self._agents[agentIndex] = stats
+
+        return stats
+
+    def _getBucket(self, seconds):
+        for (i, bound) in enumerate(self._buckets):
+            if (seconds <= bound):
+                return i
+
+        return len(self._buckets)
+
+    def _wrap(self, method):
+        counter = self._successors
+        clock = self.clock
+
+        @functools.wraps(method)
+        def profiled(*args, **kwargs):
+            startTime = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                counter[0] += 1
+                counter[1] += clock() - startTime
+
+        return profiled
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+class _AgentStats(object):
+    def __init__(self, numBuckets):
+        self.name = None
+        self.moves = 0
+        self.totalTime = 0.0
+        self.maxTime = 0.0
+        self.slowestMove = None
+        self.startupTime = 0.0
+        self.successors = 0
+        self.successorTime = 0.0
+        self.histogram = [0] * numBuckets
+
+    def addMove(self, seconds, bucket, game, turn):
+        self.moves += 1
+        self.totalTime += seconds
+        self.histogram[bucket] += 1
+
+        if (self.slowestMove is None or seconds > self.maxTime):
+            self.maxTime = seconds
+            self.slowestMove = {'game': game, 'turn': turn}
+
+    def getReport(self, agentIndex, buckets):
+        histogram = [{'upTo': bound, 'count': count}
+                for (bound, count) in zip(buckets, self.histogram)]
+        histogram.append({'upTo': None, 'count': self.histogram[-1]})
+
+        return {
+            'agent': agentIndex,
+            'name': self.name,
+            'moves': self.moves,
+            'totalTime': self.totalTime,
+            'meanTime': _mean(self.totalTime, self.moves),
+            'maxTime': self.maxTime,
+            'slowestMove': self.slowestMove,
+            'startupTime': self.startupTime,
+            'successors': self.successors,
+            'successorTime': self.successorTime,
+            'histogram': histogram,
+        }
+
+def _mean(total, count):
+    if (count == 0):
+        return 0.0
+
+    return total / count
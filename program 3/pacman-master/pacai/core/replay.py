@@ -0,0 +1,301 @@
+"""
+A compact binary format for game replays.
+
+A replay file is laid out as:
+```
+    magic (8 bytes) | version (1 byte) | header length (4 bytes) | header (JSON)
+    record, record, ...
+```
+The header holds the layout text and any game specific information (team names, etc).
+Each record is either:
+ - A move: a single byte, `(agentIndex << 3) | actionCode`.
+ - A checkpoint: `CHECKPOINT_MARKER`, the move number (4 bytes), the payload length (4 bytes),
+   and the game state after that many moves, as compressed JSON.
+   Checkpoints only hold plain data (agents, food, capsules, score, etc),
+   the state is rebuilt around the layout in the header
+   (so opening a replay never runs anything from the file).
+
+Records are written as the game is played (see `ReplayWriter`),
+so a game that crashes part way through still leaves a usable replay.
+There is always a checkpoint at move 0 (the initial state),
+so `ReplayReader` can build the state at any move by starting from the closest checkpoint
+instead of replaying the entire game.
+"""
+
+import bisect
+import importlib
+import json
+import logging
+import struct
+import zlib
+
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+
+MAGIC = b'PACAIRPL'
+VERSION = 2
+
+DEFAULT_CHECKPOINT_INTERVAL = 100
+
+# Moves only use action codes 0 - 4, so this byte can never be a move.
+CHECKPOINT_MARKER = 0xFF
+
+MAX_AGENTS = 32
+
+ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+ACTION_CODES = {action: code for (code, action) in enumerate(ACTIONS)}
+
+# The only game states that checkpoints can hold, and the module each one is in.
+STATE_MODULES = {
+    'PacmanGameState': 'pacai.bin.pacman',
+    'CaptureGameState': 'pacai.bin.capture',
+}
+
+_LENGTH_FORMAT = '>I'
+_CHECKPOINT_FORMAT = '>II'
+
+class ReplayWriter(object):
+    """
+    Write a replay while a game is being played.
+    Pass this to `pacai.core.game.Game` (as `replayWriter`) and close it when the game is done
+    (or use it as a context manager).
+    """
+
+    def __init__(self, path, layout, info = None,
+            checkpointInterval = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Args:
+            path: Where to write the replay.
+            layout: The `pacai.core.layout.Layout` the game is played on.
+            info: A JSON-serializable dict of extra information to keep in the header.
+            checkpointInterval: The number of moves between state checkpoints.
+        """
+
+        if (checkpointInterval < 1):
+            raise ValueError('The checkpoint interval must be positive, got %d.'
+                    % (checkpointInterval))
+
+        self._path = path
+        self._checkpointInterval = checkpointInterval
+        self._numMoves = 0
+
+        header = {
+            'layout': layout.layoutText,
+            'numGhosts': layout.getNumGhosts(),
+            'checkpointInterval': checkpointInterval,
+            'info': info or {},
+        }
+        header = json.dumps(header).encode('utf-8')
+
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + bytes([VERSION]))
+        self._file.write(struct.pack(_LENGTH_FORMAT, len(header)))
+        self._file.write(header)
+
+    def close(self):
+        if (self._file is None):
+            return
+
+        self._file.close()
+        self._file = None
+
+    def getNumMoves(self):
+        return self._numMoves
+
+    def getPath(self):
+        return self._path
+
+    def recordMove(self, agentIndex, action, state):
+        """
+        Record a move, and the state it resulted in.
+        """
+
+        if (agentIndex < 0 or agentIndex >= MAX_AGENTS):
+            raise ValueError('Replays support at most %d agents, got agent index %d.'
+                    % (MAX_AGENTS, agentIndex))
+
+        self._file.write(bytes([(agentIndex << 3) | ACTION_CODES[action]]))
+        self._numMoves += 1
+
+        if (self._numMoves % self._checkpointInterval == 0):
+            self._writeCheckpoint(state)
+
+    def start(self, state):
+        """
+        Record the initial state of the game.
+        """
+
+        self._writeCheckpoint(state)
+
+    def _writeCheckpoint(self, state):
+        stateType = type(state).__name__
+        if (stateType not in STATE_MODULES):
+            raise ValueError('Replays can not hold a %s.' % (stateType))
+
+        checkpoint = {
+            'type': stateType,
+            'state': state._getCheckpoint(),
+        }
+        payload = zlib.compress(json.dumps(checkpoint).encode('utf-8'))
+
+        self._file.write(bytes([CHECKPOINT_MARKER]))
+        self._file.write(struct.pack(_CHECKPOINT_FORMAT, self._numMoves, len(payload)))
+        self._file.write(payload)
+
+        # Make sure everything up to this point survives a crash.
+        self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+class ReplayReader(object):
+    """
+    Read a replay written by `ReplayWriter`.
+    Replays that were cut short (e.g. by a crash) can still be read up to the last full record.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        if (not isReplayData(data)):
+            raise ValueError("'%s' is not a replay file." % (path))
+
+        version = data[len(MAGIC)]
+        if (version != VERSION):
+            raise ValueError("Unsupported replay version (%d) in '%s'." % (version, path))
+
+        offset = len(MAGIC) + 1
+        (headerLength,) = struct.unpack_from(_LENGTH_FORMAT, data, offset)
+        offset += struct.calcsize(_LENGTH_FORMAT)
+
+        self._header = json.loads(data[offset:offset + headerLength].decode('utf-8'))
+        offset += headerLength
+
+        self._layout = Layout(self._header['layout'], maxGhosts = self._header['numGhosts'])
+
+        self._moves = bytearray()
+
+        # Checkpoints are kept as parallel lists, so they can be bisected by move number.
+        self._checkpointMoves = []
+        self._checkpointPayloads = []
+
+        self._index(data, offset)
+
+    def getCheckpointMoves(self):
+        """
+        Get the move numbers that have a checkpoint.
+        """
+
+        return list(self._checkpointMoves)
+
+    def getInfo(self):
+        return self._header['info']
+
+    def getLayout(self):
+        return self._layout
+
+    def getMove(self, moveIndex):
+        """
+        Get a single move as (agentIndex, action).
+        """
+
+        return _decodeMove(self._moves[moveIndex])
+
+    def getMoves(self, start = 0, end = None):
+        """
+        Get the moves in [start, end) as a list of (agentIndex, action).
+        """
+
+        return [_decodeMove(move) for move in self._moves[start:end]]
+
+    def getNumMoves(self):
+        return len(self._moves)
+
+    def getState(self, moveIndex):
+        """
+        Get the game state after the given number of moves (0 is the initial state).
+        Only the moves since the closest preceding checkpoint are replayed.
+        """
+
+        if (moveIndex < 0 or moveIndex > len(self._moves)):
+            raise ValueError('Move index (%d) is out of range [0, %d].'
+                    % (moveIndex, len(self._moves)))
+
+        if (len(self._checkpointMoves) == 0):
+            raise ValueError('Replay has no checkpoints.')
+
+        checkpoint = bisect.bisect_right(self._checkpointMoves, moveIndex) - 1
+        state = self._loadCheckpoint(checkpoint)
+
+        for move in self._moves[self._checkpointMoves[checkpoint]:moveIndex]:
+            state = state.generateSuccessor(*_decodeMove(move))
+
+        return state
+
+    def _index(self, data, offset):
+        """
+        Split the records into moves and checkpoints.
+        """
+
+        checkpointSize = struct.calcsize(_CHECKPOINT_FORMAT)
+
+        while (offset < len(data)):
+            # Every byte up to the next marker is a move.
+            markerOffset = data.find(CHECKPOINT_MARKER, offset)
+            if (markerOffset == -1):
+                markerOffset = len(data)
+
+            self._moves += data[offset:markerOffset]
+            offset = markerOffset
+
+            if (offset >= len(data)):
+                break
+
+            offset += 1
+            if (offset + checkpointSize > len(data)):
+                logging.warning('Replay is truncated in a checkpoint header.')
+                break
+
+            moveIndex, length = struct.unpack_from(_CHECKPOINT_FORMAT, data, offset)
+            offset += checkpointSize
+
+            if (offset + length > len(data)):
+                logging.warning('Replay is truncated in the checkpoint for move %d.' % (moveIndex))
+                break
+
+            if (moveIndex != len(self._moves)):
+                raise ValueError('Replay checkpoint is for move %d, but it follows move %d.'
+                        % (moveIndex, len(self._moves)))
+
+            self._checkpointMoves.append(moveIndex)
+            self._checkpointPayloads.append(data[offset:offset + length])
+            offset += length
+
+    def _loadCheckpoint(self, checkpoint):
+        payload = zlib.decompress(self._checkpointPayloads[checkpoint])
+        checkpoint = json.loads(payload.decode('utf-8'))
+
+        stateType = checkpoint['type']
+        if (stateType not in STATE_MODULES):
+            raise ValueError('Unknown type of game state in replay checkpoint: %s.' % (stateType))
+
+        stateClass = getattr(importlib.import_module(STATE_MODULES[stateType]), stateType)
+        return stateClass._fromCheckpoint(self._layout, checkpoint['state'])
+
+def isReplayData(data):
+    return data[:len(MAGIC)] == MAGIC
+
+def isReplayFile(path):
+    """
+    Check if a file is in the replay format (and not a legacy pickled replay).
+    """
+
+    with open(path, 'rb') as file:
+        return isReplayData(file.read(len(MAGIC)))
+
+def _decodeMove(move):
+    return (move >> 3, ACTIONS[move & 0x07])
@@ -0,0 +1,260 @@
+"""
+Lightweight game states for playing out many games quickly (e.g. Monte Carlo tree search).
+
+Full game states are immutable (every move makes a successor).
+A `RolloutState` is instead made once from a full state,
+changed in place with `RolloutState.apply`,
+and taken back to where it was with `RolloutState.undo`.
+Positions are maze cell ids (see `pacai.core.mazegraph.MazeGraph`),
+and the food and capsules are bitsets (ints) over those cell ids,
+so a move only touches a handful of ints.
+
+Rollout states play by a simplified version of the game's rules:
+every agent is always on a cell (e.g. scared pacman ghosts move at full speed),
+and the game ends as soon as the rules could end it (e.g. when a capture game runs out of time).
+Each game (`pacai.bin.pacman`, `pacai.bin.capture`) has its own rollout state,
+get one with `pacai.core.gamestate.AbstractGameState.getRolloutState`.
+"""
+
+import abc
+
+from pacai.core import fooddistance
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.util.util import nearestPoint
+
+# Move tables shared by every rollout state on the same maze.
+# {graphKey: _MoveTables, ...}
+_tablesCache = {}
+
+class RolloutState(abc.ABC):
+    """
+    A mutable game state with undo.
+    Children define the rules in `RolloutState._applyAction` and `RolloutState.getLegalActions`,
+    and add any fields they change to `RolloutState._save` and `RolloutState._restore`.
+    """
+
+    # The points for eating one food.
+    FOOD_POINTS = 1
+
+    def __init__(self, gameState):
+        layout = gameState.getInitialLayout()
+
+        self._walls = layout.walls
+        self._graph = layout.getMazeGraph()
+        self._tables = _getTables(layout)
+
+        # Indexed by agent.
+        self._cells = []
+        self._directions = []
+        self._scaredTimers = []
+        self._startCells = []
+
+        for index in range(gameState.getNumAgents()):
+            agentState = gameState.getAgentState(index)
+
+            self._cells.append(self._graph.getCellId(nearestPoint(agentState.getPosition())))
+            self._directions.append(agentState.getDirection())
+            self._scaredTimers.append(agentState.getScaredTimer())
+            self._startCells.append(self._graph.getCellId(layout.agentPositions[index][1]))
+
+        self._food = 0
+        self._numFood = 0
+        self._capsules = 0
+
+        for (cellId, (x, y)) in enumerate(self._graph.getCells()):
+            if (gameState.hasFood(x, y)):
+                self._food |= (1 << cellId)
+                self._numFood += 1
+
+            if (gameState.hasCapsule(x, y)):
+                self._capsules |= (1 << cellId)
+
+        self._score = gameState.getScore()
+        self._gameover = gameState.isOver()
+        self._win = gameState.isWin()
+
+        # {agentIndex: FoodDistanceField or None, ...}, see getFoodDistance().
+        self._foodDistances = {}
+
+        # A saved copy of the state (see _save()) from before each move that can be undone.
+        self._history = []
+
+    def apply(self, agentIndex, action):
+        """
+        Make a move in place.
+        The action must be legal (see `RolloutState.getLegalActions`), it is not checked.
+        """
+
+        self._history.append(self._save())
+        self._applyAction(agentIndex, action)
+
+    def getAgentPosition(self, agentIndex):
+        return self._graph.getPosition(self._cells[agentIndex])
+
+    def getDepth(self):
+        """
+        Get the number of moves that can be undone.
+        """
+
+        return len(self._history)
+
+    @abc.abstractmethod
+    def getLegalActions(self, agentIndex):
+        """
+        Get the legal actions for an agent (in no particular order).
+        The caller should not modify the result.
+        """
+
+        pass
+
+    def getFoodDistance(self, agentIndex):
+        """
+        Get the maze distance from an agent to the closest food that they can eat,
+        counting the food there was when this rollout state was made
+        (so that this is just a lookup, wherever the rollout goes).
+        Returns None if the agent does not eat food, or there is no food they can reach.
+        """
+
+        if (agentIndex not in self._foodDistances):
+            field = None
+
+            food = self._getStartingFood(agentIndex)
+            if (food is not None):
+                field = fooddistance.getFoodDistances(self._walls, food, graph = self._graph)
+
+            self._foodDistances[agentIndex] = field
+
+        field = self._foodDistances[agentIndex]
+        if (field is None):
+            return None
+
+        return field.getDistance(self.getAgentPosition(agentIndex))
+
+    def getNumAgents(self):
+        return len(self._cells)
+
+    def getNumFood(self):
+        return self._numFood
+
+    def getScore(self):
+        return self._score
+
+    def getScoreFor(self, agentIndex):
+        """
+        Get the score from the point of view of an agent's side (higher is better for them).
+        """
+
+        return self._score
+
+    def getSignature(self):
+        """
+        Get a value that is equal for equal rollout states (no matter the history),
+        e.g. to find a state again in a search tree.
+        """
+
+        return self._save()
+
+    def hasFood(self, position):
+        cellId = self._graph.getCellId(position)
+        return cellId is not None and bool(self._food & (1 << cellId))
+
+    def isTeammate(self, agentIndex, otherIndex):
+        """
+        Check if two agents are on the same side (an agent is its own teammate).
+        """
+
+        return agentIndex == otherIndex
+
+    def isLose(self):
+        return self._gameover and not self._win
+
+    def isOver(self):
+        return self._gameover
+
+    def isWin(self):
+        return self._gameover and self._win
+
+    def undo(self):
+        """
+        Take back the last move made with `RolloutState.apply`.
+        """
+
+        self._restore(self._history.pop())
+
+    @abc.abstractmethod
+    def _applyAction(self, agentIndex, action):
+        pass
+
+    @abc.abstractmethod
+    def _getStartingFood(self, agentIndex):
+        """
+        Get the grid of food that an agent could eat when this state was made,
+        or None if the agent does not eat food.
+        """
+
+        pass
+
+    def _move(self, agentIndex, action):
+        """
+        Move an agent (and face it in the direction of the action, if it moves).
+        """
+
+        cellId = self._cells[agentIndex]
+        self._cells[agentIndex] = self._tables.moves[cellId][action]
+
+        if (action != Directions.STOP):
+            self._directions[agentIndex] = action
+
+    def _respawn(self, agentIndex):
+        self._cells[agentIndex] = self._startCells[agentIndex]
+        self._directions[agentIndex] = Directions.STOP
+        self._scaredTimers[agentIndex] = 0
+
+    def _save(self):
+        """
+        Get an (immutable) copy of everything a move can change.
+        """
+
+        return (tuple(self._cells), tuple(self._directions), tuple(self._scaredTimers),
+                self._food, self._numFood, self._capsules,
+                self._score, self._gameover, self._win)
+
+    def _restore(self, saved):
+        cells, directions, scaredTimers, self._food, self._numFood, self._capsules = saved[:6]
+        self._score, self._gameover, self._win = saved[6:]
+
+        self._cells = list(cells)
+        self._directions = list(directions)
+        self._scaredTimers = list(scaredTimers)
+
+class _MoveTables(object):
+    def __init__(self, layout):
+        graph = layout.getMazeGraph()
+
+        # For each cell: {action: cellId, ...}.
+        self.moves = []
+
+        # For each cell: the legal actions of an agent that may stop and turn around.
+        self.actions = []
+
+        # For each cell: {direction: legal ghost actions, ...} (see `pacai.bin.pacman.GhostRules`).
+        self.ghostActions = []
+
+        for (cellId, position) in enumerate(graph.getCells()):
+            moves = {Directions.STOP: cellId}
+            for (action, neighbor) in zip(graph.getNeighborActions(cellId),
+                    graph.getNeighbors(cellId)):
+                moves[action] = neighbor
+
+            self.moves.append(moves)
+            self.actions.append(layout.getLegalActions(position))
+            self.ghostActions.append({direction: layout.getLegalGhostActions(position, direction)
+                    for direction in Actions._directions})
+
+def _getTables(layout):
+    key = layout.getMazeGraph().getKey()
+    if (key not in _tablesCache):
+        _tablesCache[key] = _MoveTables(layout)
+
+    return _tablesCache[key]
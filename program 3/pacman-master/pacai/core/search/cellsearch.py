@@ -0,0 +1,270 @@
+"""
+Fast search routines for problems whose states are board positions
+(`pacai.core.search.position.PositionSearchProblem` and its subclasses).
+
+Instead of asking the problem for successors (and building tuples for every expansion),
+these searches work directly on the integer cell ids of a `pacai.core.mazegraph.MazeGraph`
+and keep their bookkeeping (parents and path costs) in flat arrays indexed by cell id.
+
+The problem-level functions (`breadthFirstSearch`, `uniformCostSearch`, and `aStarSearch`)
+have the same signatures as the ones in `pacai.student.search`,
+so they can be passed to `pacai.agents.search.base.SearchAgent`
+(e.g. `--agent-args fn=pacai.core.search.cellsearch.bfs`).
+The cell-level functions (`bfsCells` and `astarCells`) can be used directly
+by anything that has a graph.
+"""
+
+import array
+import heapq
+import math
+
+from pacai.core.search.position import PositionSearchProblem
+
+def breadthFirstSearch(problem):
+    """
+    Search the shallowest cells first.
+    Like textbook BFS, action costs are ignored.
+
+    Returns a list of actions that reaches the goal, or None if no goal is reachable.
+    """
+
+    graph, start = _getStart(problem)
+    goalTest = _getGoalTest(problem, graph)
+
+    path = bfsCells(graph, start, goalTest, _getExpandCallback(problem, graph))
+    return _finishSearch(problem, graph, path)
+
+def uniformCostSearch(problem):
+    """
+    Search the cell of least total cost first.
+
+    Returns a list of actions that reaches the goal, or None if no goal is reachable.
+    """
+
+    return aStarSearch(problem, None)
+
+def aStarSearch(problem, heuristic):
+    """
+    Search the cell that has the lowest combined cost and heuristic first.
+    The heuristic is a normal `pacai.core.search.heuristic` function, (position, problem),
+    or None for no heuristic.
+
+    Returns a list of actions that reaches the goal, or None if no goal is reachable.
+    """
+
+    graph, start = _getStart(problem)
+    goalTest = _getGoalTest(problem, graph)
+    cells = graph.getCells()
+
+    # Costs and heuristic values only depend on the cell, so only compute them once.
+    cost = _cacheByCell(problem.costFn, cells)
+
+    cellHeuristic = None
+    if (heuristic is not None):
+        cellHeuristic = _cacheByCell(lambda position: heuristic(position, problem), cells)
+
+    path = astarCells(graph, start, goalTest, cost, cellHeuristic,
+            _getExpandCallback(problem, graph))
+    return _finishSearch(problem, graph, path)
+
+def bfsCells(graph, start, isGoal, onExpand = None):
+    """
+    Breadth first search over the cells of a `pacai.core.mazegraph.MazeGraph`.
+
+    Args:
+        graph: The `pacai.core.mazegraph.MazeGraph` to search.
+        start: The starting cell id.
+        isGoal: A function that takes a cell id and returns True if it is a goal.
+        onExpand: An optional function that gets called with every expanded cell id.
+
+    Returns the list of cell ids from the start to the nearest goal (inclusive),
+    or None if no goal is reachable.
+    """
+
+    if (isGoal(start)):
+        return [start]
+
+    neighbors = graph.getAllNeighbors()
+
+    # -1 for cells that have not been reached.
+    parents = array.array('i', [-1]) * graph.getNumCells()
+    parents[start] = start
+
+    frontier = [start]
+    head = 0
+
+    while (head < len(frontier)):
+        cellId = frontier[head]
+        head += 1
+
+        if (onExpand is not None):
+            onExpand(cellId)
+
+        for nextId in neighbors[cellId]:
+            if (parents[nextId] != -1):
+                continue
+
+            parents[nextId] = cellId
+
+            # All edges have the same cost, so the first time we see a goal is the closest.
+            if (isGoal(nextId)):
+                return _buildCellPath(parents, nextId)
+
+            frontier.append(nextId)
+
+    return None
+
+def astarCells(graph, start, isGoal, cost, heuristic = None, onExpand = None):
+    """
+    A* (or uniform cost search if there is no heuristic)
+    over the cells of a `pacai.core.mazegraph.MazeGraph`.
+
+    Args:
+        graph: The `pacai.core.mazegraph.MazeGraph` to search.
+        start: The starting cell id.
+        isGoal: A function that takes a cell id and returns True if it is a goal.
+        cost: A function that takes a cell id and returns the cost of moving into that cell.
+        heuristic: An optional function that takes a cell id and returns
+            the estimated cost to the nearest goal.
+        onExpand: An optional function that gets called with every expanded cell id.
+
+    Returns the list of cell ids from the start to a goal (inclusive),
+    or None if no goal is reachable.
+    """
+
+    neighbors = graph.getAllNeighbors()
+    numCells = graph.getNumCells()
+
+    parents = array.array('i', [-1]) * numCells
+    pathCosts = array.array('d', [math.inf]) * numCells
+    closed = bytearray(numCells)
+
+    parents[start] = start
+    pathCosts[start] = 0.0
+
+    priority = 0.0
+    if (heuristic is not None):
+        priority = heuristic(start)
+
+    # Ties are broken by cell id, which keeps the search deterministic.
+    frontier = [(priority, start)]
+
+    while (len(frontier) > 0):
+        _, cellId = heapq.heappop(frontier)
+
+        # Stale entries are left in the heap instead of being updated.
+        if (closed[cellId]):
+            continue
+
+        if (isGoal(cellId)):
+            return _buildCellPath(parents, cellId)
+
+        closed[cellId] = 1
+        if (onExpand is not None):
+            onExpand(cellId)
+
+        pathCost = pathCosts[cellId]
+        for nextId in neighbors[cellId]:
+            if (closed[nextId]):
+                continue
+
+            nextCost = pathCost + cost(nextId)
+            if (nextCost >= pathCosts[nextId]):
+                continue
+
+            pathCosts[nextId] = nextCost
+            parents[nextId] = cellId
+
+            priority = nextCost
+            if (heuristic is not None):
+                priority += heuristic(nextId)
+
+            heapq.heappush(frontier, (priority, nextId))
+
+    return None
+
+def cellPathToActions(graph, cellPath):
+    """
+    Convert a list of adjacent cell ids into the list of actions that walks it.
+    """
+
+    actions = []
+
+    for i in range(1, len(cellPath)):
+        cellId = cellPath[i - 1]
+        index = graph.getNeighbors(cellId).index(cellPath[i])
+        actions.append(graph.getNeighborActions(cellId)[index])
+
+    return actions
+
+def _buildCellPath(parents, goal):
+    path = [goal]
+
+    while (parents[path[-1]] != path[-1]):
+        path.append(parents[path[-1]])
+
+    path.reverse()
+    return path
+
+def _cacheByCell(function, cells):
+    """
+    Wrap a function of a position into a (lazily cached) function of a cell id.
+    """
+
+    values = [None] * len(cells)
+
+    def lookup(cellId):
+        value = values[cellId]
+        if (value is None):
+            value = function(cells[cellId])
+            values[cellId] = value
+
+        return value
+
+    return lookup
+
+def _finishSearch(problem, graph, cellPath):
+    if (cellPath is None):
+        return None
+
+    # Let the problem see (and register) the goal, just like a normal search would.
+    problem.isGoal(graph.getPosition(cellPath[-1]))
+
+    return cellPathToActions(graph, cellPath)
+
+def _getExpandCallback(problem, graph):
+    cells = graph.getCells()
+    return lambda cellId: problem.recordExpansion(cells[cellId])
+
+def _getGoalTest(problem, graph):
+    """
+    Get a goal test on cell ids.
+    Problems that use the standard (single position) goal test get a simple id comparison,
+    everything else asks the problem.
+    """
+
+    if (type(problem).isGoal is PositionSearchProblem.isGoal):
+        goal = graph.getCellId(problem.goal)
+        if (goal is None):
+            return lambda cellId: False
+
+        return goal.__eq__
+
+    cells = graph.getCells()
+    return lambda cellId: problem.isGoal(cells[cellId])
+
+def _getStart(problem):
+    graph = problem.getMazeGraph()
+
+    start = graph.getCellId(problem.startingState())
+    if (start is None):
+        raise ValueError('The starting position (%s) is not an open cell.'
+                % (str(problem.startingState())))
+
+    return graph, start
+
+# Abbreviations
+
+bfs = breadthFirstSearch
+ucs = uniformCostSearch
+astar = aStarSearch
@@ -1,5 +1,5 @@
+from pacai.core import mazegraph
 from pacai.core.actions import Actions
-from pacai.core.directions import Directions
 from pacai.core.search.problem import SearchProblem
 
 DEFAULT_COST_FUNCTION = lambda x: 1
@@ -13,17 +13,21 @@ class PositionSearchProblem(SearchProblem):
     Note that this search problem is fully specified and should be used as an example.
     """
     def __init__(self, gameState, costFn = DEFAULT_COST_FUNCTION,
-            goal = DEFAULT_GOAL_POSITION, start = None):
+            goal = DEFAULT_GOAL_POSITION, start = None, recordVisits = True):
         """
         Args:
             gameState: A `pacai.core.gamestate.AbstractGameState`.
             costFn: A function from a search state (x, y) to a non-negative number.
             goal: The target position.
+            start: The starting position (defaults to the position of agent 0).
+            recordVisits: See `pacai.core.search.problem.SearchProblem`.
         """
 
-        super().__init__()
+        super().__init__(recordVisits = recordVisits)
 
+        self.gameState = gameState
         self.walls = gameState.getWalls()
+        self._graph = None
         self.goal = goal
         self.costFn = costFn
 
@@ -34,6 +38,21 @@ class PositionSearchProblem(SearchProblem):
         if (self.startState is None):
             raise ValueError("Could not find starting location.")
 
+    def getMazeGraph(self):
+        """
+        Get the `pacai.core.mazegraph.MazeGraph` (adjacency table) for this problem's walls.
+        The graph is shared with the game's layout when there is one.
+        """
+
+        if (self._graph is None):
+            layout = self.gameState.getInitialLayout()
+            if (layout is not None):
+                self._graph = layout.getMazeGraph()
+            else:
+                self._graph = mazegraph.getMazeGraph(self.walls)
+
+        return self._graph
+
     def startingState(self):
         return self.startState
 
@@ -41,6 +60,9 @@ class PositionSearchProblem(SearchProblem):
         if (state != self.goal):
             return False
 
+        if (not self._recordVisits):
+            return True
+
         # Register the locations we have visited.
         # This allows the GUI to highlight them.
         self._visitedLocations.add(state)
@@ -56,27 +78,22 @@ class PositionSearchProblem(SearchProblem):
         Returns successor states, the actions they require, and a constant cost of 1.
         """
 
-        successors = []
-
-        for action in Directions.CARDINAL:
-            x, y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
+        graph = self.getMazeGraph()
+        cellId = graph.getCellId(state)
+        if (cellId is None):
+            return []
 
-            if (not self.walls[nextx][nexty]):
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
+        successors = []
 
-                successors.append((nextState, action, cost))
+        # Neighbors are already in cardinal order.
+        for (nextId, action) in zip(graph.getNeighbors(cellId), graph.getNeighborActions(cellId)):
+            nextState = graph.getPosition(nextId)
+            successors.append((nextState, action, self.costFn(nextState)))
 
         # Bookkeeping for display purposes (the highlight in the GUI).
-        self._numExpanded += 1
-        if (state not in self._visitedLocations):
-            self._visitedLocations.add(state)
-            # Note: visit history requires coordinates not states. In this situation
-            # they are equivalent.
-            coordinates = state
-            self._visitHistory.append(coordinates)
+        # Note: visit history requires coordinates not states. In this situation
+        # they are equivalent.
+        self.recordExpansion(state)
 
         return successors
 
@@ -22,13 +22,20 @@ class SearchProblem(abc.ABC):
     those same states and actions.
     """
 
-    def __init__(self):
+    def __init__(self, recordVisits = True):
+        """
+        Args:
+            recordVisits: Keep track of the visited coordinates (for the GUI to highlight).
+                Searches that will not be displayed can turn this off.
+        """
+
         # The number of search nodes we expended.
         self._numExpanded = 0
 
         # Keep track of the coordinates we have visited.
         # Students are not required to use these,
         # but doing so will allow the GUI to highlight the visited coordinates.
+        self._recordVisits = recordVisits
         self._visitedLocations = set()
         self._visitHistory = []
 
@@ -60,6 +67,20 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def recordExpansion(self, coordinates):
+        """
+        Count an expanded search node,
+        and remember its coordinates (if visits are being recorded).
+        """
+
+        self._numExpanded += 1
+
+        if (not self._recordVisits or coordinates in self._visitedLocations):
+            return
+
+        self._visitedLocations.add(coordinates)
+        self._visitHistory.append(coordinates)
+
     @abc.abstractmethod
     def startingState(self):
         """
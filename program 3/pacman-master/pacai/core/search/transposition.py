@@ -0,0 +1,196 @@
+"""
+A bounded transposition table for adversarial (minimax, alpha-beta, and expectimax) search.
+
+The same game state is often reached through different orders of moves,
+and a search on the next turn revisits most of the states from the last search.
+A transposition table remembers what a search learned about a state
+(its value, what kind of bound that value is, and the best move),
+so that work does not have to be repeated.
+
+Entries are keyed by the state, the index of the agent to move, and the remaining search depth.
+Values are only reused for the exact same remaining depth,
+so a search with a table finds the same values as the same search without one.
+Best moves are kept regardless of depth, since they are still good guesses for move ordering.
+"""
+
+import collections
+
+# Bound types.
+EXACT = 0
+# The true value is at least the stored value (the search failed high).
+LOWER = 1
+# The true value is at most the stored value (the search failed low).
+UPPER = 2
+
+# Replacement policies.
+# Evict the least recently used entry.
+REPLACE_LRU = 'lru'
+# Evict the shallowest (cheapest to recompute) entry, least recently stored first.
+REPLACE_DEPTH = 'depth'
+
+REPLACEMENT_POLICIES = [REPLACE_LRU, REPLACE_DEPTH]
+
+DEFAULT_MAX_SIZE = 100000
+
+TableEntry = collections.namedtuple('TableEntry', ['depth', 'value', 'bound', 'bestMove'])
+
+class TranspositionTable(object):
+    """
+    A fixed size map from (state, agentIndex) to a `TableEntry`.
+    Each (state, agentIndex) holds a single entry, for the depth it was last searched to.
+    """
+
+    def __init__(self, maxSize = DEFAULT_MAX_SIZE, replacement = REPLACE_LRU):
+        """
+        Args:
+            maxSize: The maximum number of entries to keep.
+            replacement: The replacement policy, one of `REPLACEMENT_POLICIES`.
+        """
+
+        maxSize = int(maxSize)
+        if (maxSize < 1):
+            raise ValueError('The table size must be positive, got %d.' % (maxSize))
+
+        if (replacement not in REPLACEMENT_POLICIES):
+            raise ValueError("Unknown replacement policy: '%s'. Expected one of: %s."
+                    % (replacement, ', '.join(REPLACEMENT_POLICIES)))
+
+        self._maxSize = maxSize
+        self._replacement = replacement
+
+        # {(state, agentIndex): TableEntry, ...}
+        # For LRU, this is kept in order of use.
+        self._entries = collections.OrderedDict()
+
+        # Only used for depth-preferred replacement.
+        # {depth: OrderedDict((state, agentIndex): None, ...), ...}
+        self._keysByDepth = {}
+
+        self._hits = 0
+        self._misses = 0
+
+    def clear(self):
+        self._entries.clear()
+        self._keysByDepth.clear()
+
+        self._hits = 0
+        self._misses = 0
+
+    def getBestMove(self, state, agentIndex):
+        """
+        Get the best move found the last time this state was searched (at any depth),
+        or None.
+        """
+
+        entry = self._entries.get((state, agentIndex))
+        if (entry is None):
+            return None
+
+        return entry.bestMove
+
+    def getHits(self):
+        return self._hits
+
+    def getMaxSize(self):
+        return self._maxSize
+
+    def getMisses(self):
+        return self._misses
+
+    def lookup(self, state, agentIndex, depth):
+        """
+        Get the `TableEntry` for this state searched to exactly this depth, or None.
+        """
+
+        key = (state, agentIndex)
+
+        entry = self._entries.get(key)
+        if (entry is None or entry.depth != depth):
+            self._misses += 1
+            return None
+
+        self._hits += 1
+
+        if (self._replacement == REPLACE_LRU):
+            self._entries.move_to_end(key)
+
+        return entry
+
+    def probe(self, state, agentIndex, depth, alpha = float('-inf'), beta = float('inf')):
+        """
+        Get a value for this state that can be used as-is in an alpha-beta search
+        with the given window, or None if the state still needs to be searched.
+        """
+
+        entry = self.lookup(state, agentIndex, depth)
+        if (entry is None):
+            return None
+
+        if (entry.bound == EXACT
+                or (entry.bound == LOWER and entry.value >= beta)
+                or (entry.bound == UPPER and entry.value <= alpha)):
+            return entry.value
+
+        return None
+
+    def store(self, state, agentIndex, depth, value, bound = EXACT, bestMove = None):
+        """
+        Remember the result of searching a state.
+        With depth-preferred replacement, a shallower result will not replace a deeper one.
+        """
+
+        key = (state, agentIndex)
+        entry = TableEntry(depth, value, bound, bestMove)
+
+        old = self._entries.get(key)
+        if (old is not None):
+            if (self._replacement == REPLACE_LRU):
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                return
+
+            if (old.depth > depth):
+                return
+
+            self._removeDepthKey(key, old.depth)
+            self._entries[key] = entry
+            self._keysByDepth.setdefault(depth, collections.OrderedDict())[key] = None
+            return
+
+        if (len(self._entries) >= self._maxSize and not self._evict(depth)):
+            return
+
+        self._entries[key] = entry
+        if (self._replacement == REPLACE_DEPTH):
+            self._keysByDepth.setdefault(depth, collections.OrderedDict())[key] = None
+
+    def _evict(self, depth):
+        """
+        Make room for an entry of the given depth.
+        Returns False if the new entry should not be stored instead.
+        """
+
+        if (self._replacement == REPLACE_LRU):
+            self._entries.popitem(last = False)
+            return True
+
+        shallowest = min(self._keysByDepth)
+        if (shallowest > depth):
+            return False
+
+        key, _ = self._keysByDepth[shallowest].popitem(last = False)
+        if (len(self._keysByDepth[shallowest]) == 0):
+            del self._keysByDepth[shallowest]
+
+        del self._entries[key]
+        return True
+
+    def _removeDepthKey(self, key, depth):
+        keys = self._keysByDepth[depth]
+        del keys[key]
+
+        if (len(keys) == 0):
+            del self._keysByDepth[depth]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,235 @@
+"""
+Train reinforcement learning agents with multiple processes.
+
+Training is split between a learner (the calling process) and a number of actors
+(forked processes that each have their own copy of the agent and its environment).
+Every actor plays a few episodes, then sends the learner the changes it made to the agent's
+parameters (see `pacai.agents.learning.reinforcement.ReinforcementAgent.getParameters`).
+The learner merges the changes from all the actors
+(each parameter moves by the average of the changes made to it),
+and sends the merged parameters back before the actors play their next few episodes.
+
+Parameter keys are pickled to move between processes.
+Anything they share that has identity based equality (like a `pacai.core.layout.Layout`)
+should be passed as a shared object, so it is sent by reference instead of being copied.
+"""
+
+import io
+import logging
+import multiprocessing
+import pickle
+import random
+import traceback
+
+DEFAULT_SYNC_INTERVAL = 10
+
+def train(agent, runEpisode, numEpisodes, numActors, syncInterval = DEFAULT_SYNC_INTERVAL,
+        sharedObjects = ()):
+    """
+    Play numEpisodes training episodes split between numActors processes,
+    and leave the agent with the merged parameters.
+    runEpisode(agent) plays a single episode and may return a (picklable) result.
+    Since actors are forked, it does not need to be picklable itself.
+    sharedObjects are sent between processes by reference (see the module documentation).
+
+    If an agent counts its episodes (e.g. to know when training is done),
+    the episodes played by the actors are counted as if the agent played them itself.
+
+    Returns the results of every episode.
+    """
+
+    if (agent.getParameters() is None):
+        raise ValueError('%s does not support training with multiple processes.'
+                % (type(agent).__name__))
+
+    numActors = max(1, min(int(numActors), numEpisodes))
+    syncInterval = int(syncInterval)
+    if (syncInterval < 1):
+        raise ValueError('The sync interval must be positive, got %d.' % (syncInterval))
+
+    if (numActors > 1 and 'fork' not in multiprocessing.get_all_start_methods()):
+        logging.warning('Processes cannot be forked on this platform, training with one process.')
+        numActors = 1
+
+    if (numActors == 1):
+        return [runEpisode(agent) for i in range(numEpisodes)]
+
+    context = multiprocessing.get_context('fork')
+    seedBase = random.getrandbits(32)
+
+    connections = []
+    processes = []
+
+    for actorIndex in range(numActors):
+        actorEpisodes = numEpisodes // numActors
+        if (actorIndex < numEpisodes % numActors):
+            actorEpisodes += 1
+
+        learnerConnection, actorConnection = context.Pipe()
+        process = context.Process(target = _runActor, daemon = True,
+                args = (_Channel(actorConnection, sharedObjects), agent, runEpisode,
+                    actorEpisodes, syncInterval, seedBase + actorIndex))
+        process.start()
+
+        actorConnection.close()
+        connections.append(learnerConnection)
+        processes.append(process)
+
+    try:
+        return _runLearner(agent, [_Channel(connection, sharedObjects)
+                for connection in connections])
+    finally:
+        for connection in connections:
+            connection.close()
+
+        for process in processes:
+            process.join()
+
+def mergeChanges(parameters, changes):
+    """
+    Merge a list of changes (each a dict of {key: delta}) into the parameters (in place).
+    Every key moves by the average of the deltas given for it.
+
+    Returns a dict with the new value of every key that changed.
+    """
+
+    totals = {}
+    counts = {}
+
+    for change in changes:
+        for (key, delta) in change.items():
+            totals[key] = totals.get(key, 0.0) + delta
+            counts[key] = counts.get(key, 0) + 1
+
+    merged = {}
+    for (key, total) in totals.items():
+        value = parameters.get(key, 0.0) + total / counts[key]
+
+        parameters[key] = value
+        merged[key] = value
+
+    return merged
+
+def _getChanges(parameters, snapshot):
+    changes = {}
+
+    for (key, value) in parameters.items():
+        delta = value - snapshot.get(key, 0.0)
+        if (delta != 0.0):
+            changes[key] = delta
+
+    return changes
+
+def _runActor(connection, agent, runEpisode, numEpisodes, syncInterval, seed):
+    """
+    Play episodes in a forked process.
+    Messages to the learner are (changes, results, episodes counted, training rewards, done),
+    or an error message if something went wrong.
+    """
+
+    try:
+        # Every actor is forked from the same random state.
+        random.seed(seed)
+
+        snapshot = dict(agent.getParameters())
+        agent.setParameters(dict(snapshot))
+
+        while (numEpisodes > 0):
+            startEpisodes = agent.episodesSoFar
+            startRewards = agent.accumTrainRewards
+
+            results = []
+            for i in range(min(syncInterval, numEpisodes)):
+                results.append(runEpisode(agent))
+
+            numEpisodes -= len(results)
+            done = (numEpisodes == 0)
+
+            changes = _getChanges(agent.getParameters(), snapshot)
+            connection.send((changes, results, agent.episodesSoFar - startEpisodes,
+                    agent.accumTrainRewards - startRewards, done))
+
+            if (done):
+                break
+
+            snapshot.update(connection.recv())
+            agent.setParameters(dict(snapshot))
+    except Exception:
+        connection.send(traceback.format_exc())
+    finally:
+        connection.close()
+
+def _runLearner(agent, connections):
+    parameters = dict(agent.getParameters())
+    results = []
+
+    numEpisodes = 0
+    trainRewards = 0.0
+
+    active = list(connections)
+    while (len(active) > 0):
+        changes = []
+        stillActive = []
+
+        for connection in active:
+            message = connection.recv()
+            if (isinstance(message, str)):
+                raise RuntimeError('A training process failed:\n' + message)
+
+            actorChanges, actorResults, actorEpisodes, actorRewards, done = message
+
+            changes.append(actorChanges)
+            results += actorResults
+            numEpisodes += actorEpisodes
+            trainRewards += actorRewards
+
+            if (not done):
+                stillActive.append(connection)
+
+        merged = mergeChanges(parameters, changes)
+        for connection in stillActive:
+            connection.send(merged)
+
+        active = stillActive
+
+    agent.setParameters(parameters)
+    agent.recordEpisodes(numEpisodes, trainRewards)
+
+    return results
+
+class _Channel(object):
+    """
+    One end of a connection between the learner and an actor.
+    """
+
+    def __init__(self, connection, sharedObjects):
+        self._connection = connection
+        self._sharedObjects = list(sharedObjects)
+
+    def close(self):
+        self._connection.close()
+
+    def recv(self):
+        file = io.BytesIO(self._connection.recv_bytes())
+        return _SharedUnpickler(file, self._sharedObjects).load()
+
+    def send(self, message):
+        file = io.BytesIO()
+        _SharedPickler(file, self._sharedObjects).dump(message)
+        self._connection.send_bytes(file.getvalue())
+
+class _SharedPickler(pickle.Pickler):
+    def __init__(self, file, sharedObjects):
+        super().__init__(file, protocol = pickle.HIGHEST_PROTOCOL)
+        self._sharedIndexes = {id(obj): index for (index, obj) in enumerate(sharedObjects)}
+
+    def persistent_id(self, obj):
+        return self._sharedIndexes.get(id(obj))
+
+class _SharedUnpickler(pickle.Unpickler):
+    def __init__(self, file, sharedObjects):
+        super().__init__(file)
+        self._sharedObjects = sharedObjects
+
+    def persistent_load(self, id):
+        return self._sharedObjects[id]
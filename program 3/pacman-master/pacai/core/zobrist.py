@@ -0,0 +1,69 @@
+"""
+Zobrist hashing keys for board contents.
+
+Each (board item, cell) pair gets a random 64 bit key,
+and a board is hashed as the XOR of the keys for everything on it.
+Adding or removing an item is then a single XOR,
+instead of rehashing the whole board.
+"""
+
+import random
+
+# Keys are generated from a fixed seed (and a private generator),
+# so hashes are the same across processes and the game's random stream is untouched.
+ZOBRIST_SEED = 140
+KEY_BITS = 64
+
+# {(width, height): ZobristKeys, ...}
+_keysCache = {}
+
+class ZobristKeys(object):
+    """
+    The keys for every cell on a board of a given size.
+    """
+
+    def __init__(self, width, height):
+        self._width = width
+        self._height = height
+
+        rng = random.Random(ZOBRIST_SEED + width * 1000003 + height)
+        numCells = width * height
+
+        self._foodKeys = [rng.getrandbits(KEY_BITS) for i in range(numCells)]
+        self._capsuleKeys = [rng.getrandbits(KEY_BITS) for i in range(numCells)]
+
+    def capsule(self, x, y):
+        return self._capsuleKeys[int(x) * self._height + int(y)]
+
+    def food(self, x, y):
+        return self._foodKeys[int(x) * self._height + int(y)]
+
+    def __reduce__(self):
+        # Keys are deterministic, so unpickling can just use the shared keys for this size.
+        return (getKeys, (self._width, self._height))
+
+    def hashBoard(self, food, capsules):
+        """
+        Compute the full hash of a food grid and a list of capsule positions.
+        """
+
+        value = 0
+
+        for (x, y) in food.asList():
+            value ^= self.food(x, y)
+
+        for (x, y) in capsules:
+            value ^= self.capsule(x, y)
+
+        return value
+
+def getKeys(width, height):
+    """
+    Get the (shared) keys for a board of the given size.
+    """
+
+    size = (width, height)
+    if (size not in _keysCache):
+        _keysCache[size] = ZobristKeys(width, height)
+
+    return _keysCache[size]
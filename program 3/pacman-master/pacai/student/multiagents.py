@@ -70,7 +70,9 @@ class MinimaxAgent(MultiAgentSearchAgent):
     Get the total number of agents in the game
 
     `pacai.core.gamestate.AbstractGameState.getLegalActions`:
-    Returns a list of legal actions for an agent.
+    Returns a tuple of legal actions for an agent.
+    The tuple is shared between states and can not be modified,
+    make a new list if you want to change it (e.g. to filter out STOP).
     Pacman is always at index 0, and ghosts are >= 1.
 
     `pacai.core.gamestate.AbstractGameState.generateSuccessor`:
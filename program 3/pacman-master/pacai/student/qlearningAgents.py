@@ -1,5 +1,7 @@
 from pacai.agents.learning.reinforcement import ReinforcementAgent
+from pacai.core.features import WeightVector
 from pacai.util import reflection
+import logging
 import random
 
 class QLearningAgent(ReinforcementAgent):
@@ -60,6 +62,12 @@ class QLearningAgent(ReinforcementAgent):
             self.qValue[state, action] = 0
         return self.qValue[state, action]
 
+    def getParameters(self):
+        return self.qValue
+
+    def setParameters(self, parameters):
+        self.qValue = parameters
+
     def getValue(self, state):
         """
         Return the value of the best action in a state.
@@ -169,9 +177,58 @@ class ApproximateQAgent(PacmanQAgent):
     def __init__(self, index,
             extractor = 'pacai.core.featureExtractors.IdentityExtractor', **kwargs):
         super().__init__(index, **kwargs)
-        self.featExtractor = reflection.qualifiedImport(extractor)
+        self.featExtractor = reflection.qualifiedImport(extractor)()
 
         # You might want to initialize weights here.
+        self.weights = WeightVector(self.featExtractor.getFeatureIndex())
+
+        # The legal actions and their feature vectors for the last state features were needed for.
+        # Every step needs them for the same state twice (the update into it and the next action).
+        self._featureState = None
+        self._featureActions = []
+        self._featureVectors = []
+
+    def getParameters(self):
+        return self.weights.asDict()
+
+    def setParameters(self, parameters):
+        self.weights = WeightVector.fromDict(self.featExtractor.getFeatureIndex(), parameters)
+
+    def getPolicy(self, state):
+        actions, vectors = self._getFeatureVectors(state)
+        if (len(actions) == 0):
+            return None
+
+        qValues = self.weights.dotAll(vectors)
+        bestValue = max(qValues)
+
+        return random.choice([action for (action, qValue) in zip(actions, qValues)
+                if (qValue == bestValue)])
+
+    def getQValue(self, state, action):
+        actions, vectors = self._getFeatureVectors(state)
+        if (action in actions):
+            return self.weights.dot(vectors[actions.index(action)])
+
+        return self.weights.dot(self.featExtractor.getFeatureVector(state, action))
+
+    def getValue(self, state):
+        actions, vectors = self._getFeatureVectors(state)
+        if (len(actions) == 0):
+            return 0.0
+
+        return max(self.weights.dotAll(vectors))
+
+    def update(self, state, action, nextState, reward):
+        actions, vectors = self._getFeatureVectors(state)
+        if (action in actions):
+            features = vectors[actions.index(action)]
+        else:
+            features = self.featExtractor.getFeatureVector(state, action)
+
+        correction = (reward + self.getDiscountRate() * self.getValue(nextState)
+                - self.weights.dot(features))
+        self.weights.update(features, self.getAlpha() * correction)
 
     def final(self, state):
         """
@@ -184,5 +241,17 @@ class ApproximateQAgent(PacmanQAgent):
         # Did we finish training?
         if self.episodesSoFar == self.numTraining:
             # You might want to print your weights here for debugging.
-            # *** Your Code Here ***
-            raise NotImplementedError()
+            logging.debug('Trained weights: %s' % (str(self.weights.asDict())))
+
+    def _getFeatureVectors(self, state):
+        """
+        Get the legal actions in a state, and the feature vector for each of them.
+        """
+
+        if (state is not self._featureState):
+            self._featureState = state
+            self._featureActions = list(self.getLegalActions(state))
+            self._featureVectors = [self.featExtractor.getFeatureVector(state, action)
+                    for action in self._featureActions]
+
+        return self._featureActions, self._featureVectors
@@ -1,4 +1,5 @@
 from pacai.agents.learning.value import ValueEstimationAgent
+from pacai.core.mdp import ValueIterationSolver
 
 class ValueIterationAgent(ValueEstimationAgent):
     """
@@ -36,47 +37,27 @@ class ValueIterationAgent(ValueEstimationAgent):
         self.mdp = mdp
         self.discountRate = discountRate
         self.iters = iters
-        self.values = {}  # A dictionary which holds the q-values for each state.
 
         # Compute the values here.
-        for state in self.mdp.getStates():
-            self.values[state] = 0
-        for _ in range(self.iters):
-            newVal = {}
-            for state in self.mdp.getStates():
-                if not self.mdp.getPossibleActions(state):
-                    newVal[state] = self.getValue(state)
-                else:
-                    bestA = list(self.mdp.getPossibleActions(state))[0]
-                    for action in self.mdp.getPossibleActions(state):
-                        if self.getQValue(state, action) > self.getQValue(state, bestA):
-                            bestA = action
-                    newVal[state] = self.getQValue(state, bestA)
-            self.values = newVal
+        # The solver compiles the mdp once and runs batch sweeps over flat tables,
+        # stopping early if the values converge.
+        self.solver = ValueIterationSolver(self.mdp, self.discountRate)
+        self.solver.iterate(self.iters)
+
+        self.values = self.solver.getValues()  # A dictionary which holds the values for each state.
 
     def getValue(self, state):
         """
         Return the value of the state (computed in __init__).
         """
 
-        return self.values[state]
+        return self.solver.getValue(state)
 
     def getQValue(self, state, action):
-        qValue = 0
-        for t in self.mdp.getTransitionStatesAndProbs(state, action):
-            qValue += (self.getValue(t[0]) * self.discountRate
-            + self.mdp.getReward(state, action, t[0])) * t[1]
-        return qValue
+        return self.solver.getQValue(state, action)
 
     def getPolicy(self, state):
-        if self.mdp.getPossibleActions(state):
-            bestA = list(self.mdp.getPossibleActions(state))[0]
-            for action in self.mdp.getPossibleActions(state):
-                if self.getQValue(state, action) > self.getQValue(state, bestA):
-                    bestA = action
-        else:
-            bestA = None
-        return bestA
+        return self.solver.getPolicy(state)
 
     def getAction(self, state):
         """
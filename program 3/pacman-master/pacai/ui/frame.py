@@ -79,14 +79,17 @@ class Frame(abc.ABC):
     def getBoardWidth(self):
         return self._boardWidth
 
-    def toImage(self, sprites = {}, font = None):
-        # Height is +1 for the score.
-        size = (
-            self._boardWidth * spritesheet.SQUARE_SIZE,
-            (self._boardHeight + 1) * spritesheet.SQUARE_SIZE
-        )
+    def toImage(self, sprites = {}, font = None, staticImage = None):
+        """
+        Render this frame.
+        If given, the static image (see `Frame.toStaticImage`) is used as the background
+        instead of redrawing the walls.
+        """
 
-        image = Image.new('RGB', size, (0, 0, 0, 255))
+        if (staticImage is None):
+            staticImage = self.toStaticImage(sprites)
+
+        image = staticImage.copy()
         draw = ImageDraw.Draw(image)
 
         # First, draw any highlights.
@@ -99,11 +102,12 @@ class Frame(abc.ABC):
 
             draw.rectangle([startPoint, endPoint], fill = (255, intensity, intensity))
 
-        # Then, draw the board.
+        # Then, draw the items on the board (the walls are already drawn).
         for x in range(self._boardWidth):
             for y in range(self._boardHeight):
-                if (self._board[x][y] != token.EMPTY_TOKEN):
-                    self._placeToken(x, y, self._board[x][y], sprites, image, draw)
+                objectToken = self._board[x][y]
+                if (objectToken != token.EMPTY_TOKEN and not token.isWall(objectToken)):
+                    self._placeToken(x, y, objectToken, sprites, image, draw)
 
         # Finally, overlay the agents.
         for ((x, y), agentToken) in self._agentTokens.items():
@@ -116,6 +120,27 @@ class Frame(abc.ABC):
 
         return image
 
+    def toStaticImage(self, sprites = {}):
+        """
+        Render only the parts of this frame that do not change during a game (the walls).
+        """
+
+        # Height is +1 for the score.
+        size = (
+            self._boardWidth * spritesheet.SQUARE_SIZE,
+            (self._boardHeight + 1) * spritesheet.SQUARE_SIZE
+        )
+
+        image = Image.new('RGB', size, (0, 0, 0, 255))
+        draw = ImageDraw.Draw(image)
+
+        for x in range(self._boardWidth):
+            for y in range(self._boardHeight):
+                if (token.isWall(self._board[x][y])):
+                    self._placeToken(x, y, self._board[x][y], sprites, image, draw)
+
+        return image
+
     def _buildBoard(self, state):
         board = self._boardWidth * [None]
         for x in range(self._boardWidth):
@@ -0,0 +1,76 @@
+"""
+Streaming GIF encoding.
+"""
+
+from PIL import GifImagePlugin
+from PIL import Image
+from PIL import ImageChops
+
+# The GIF trailer byte.
+GIF_TRAILER = b';'
+
+class GifWriter(object):
+    """
+    Write an animated GIF one frame at a time.
+    Each frame is encoded and written as soon as it is added,
+    so frames never have to be held in memory until the end.
+
+    Every frame gets its own (adaptive) color table,
+    so no colors are lost when new sprites show up part way through a game.
+    After the first frame, only the region that changed since the previous frame is encoded.
+    """
+
+    def __init__(self, path, fps):
+        self._path = path
+        self._frameDurationMS = int(1.0 / fps * 1000.0)
+
+        self._file = None
+        self._numFrames = 0
+
+        # The last frame that was added (as RGB).
+        self._previousImage = None
+
+    def addFrame(self, image):
+        image = image.convert('RGB')
+
+        offset = (0, 0)
+        changedImage = image
+
+        if (self._file is None):
+            self._file = open(self._path, 'wb')
+
+            info = {'loop': 0, 'duration': self._frameDurationMS}
+            header, _ = GifImagePlugin.getheader(self._toPalette(image), info = info)
+            self._write(header)
+        else:
+            bbox = ImageChops.difference(image, self._previousImage).getbbox()
+            if (bbox is None):
+                # Nothing changed, but the frame still needs to take up time.
+                bbox = (0, 0, 1, 1)
+
+            offset = bbox[0:2]
+            changedImage = image.crop(bbox)
+
+        self._write(GifImagePlugin.getdata(self._toPalette(changedImage), offset = offset,
+                duration = self._frameDurationMS, include_color_table = True))
+
+        self._previousImage = image
+        self._numFrames += 1
+
+    def close(self):
+        if (self._file is None):
+            return
+
+        self._file.write(GIF_TRAILER)
+        self._file.close()
+        self._file = None
+
+    def getNumFrames(self):
+        return self._numFrames
+
+    def _toPalette(self, image):
+        return image.convert('P', palette = Image.ADAPTIVE)
+
+    def _write(self, chunks):
+        for chunk in chunks:
+            self._file.write(chunk)
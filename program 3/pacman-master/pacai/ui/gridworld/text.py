@@ -94,6 +94,10 @@ class TextGridworldDisplay(object):
         print()
 
     def _getArrow(self, direction):
+        # States without any actions (and walls) have no policy.
+        if (direction is None):
+            return ''
+
         direction = direction.lower()
 
         if (direction in ARROWS):
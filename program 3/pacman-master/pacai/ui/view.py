@@ -4,6 +4,7 @@ import os
 from PIL import ImageFont
 
 from pacai.ui import spritesheet
+from pacai.ui.gif import GifWriter
 
 DEFAULT_GIF_FPS = 10
 MIN_GIF_FPS = 1
@@ -32,7 +33,12 @@ class AbstractView(abc.ABC):
 
         self._saveFrames = (self._gifPath is not None)
         self._skipFrames = max(1, int(skipFrames))
-        self._keyFrames = []
+
+        # Key frames are rendered and encoded as they are produced (instead of at the end).
+        self._gifWriter = None
+
+        # The walls never change during a game, so they are only rendered once per game.
+        self._staticImage = None
 
         # The number of frames this view has produced.
         self._frameCount = 0
@@ -48,13 +54,10 @@ class AbstractView(abc.ABC):
         Signal that the game is over and the UI should cleanup.
         """
 
-        # Save the gif.
-        if (self._saveFrames and len(self._keyFrames) > 0):
-            gifTimePerFrameMS = int(1.0 / self._gifFPS * 1000.0)
-
-            images = [frame.toImage(self._sprites, self._font) for frame in self._keyFrames]
-            images[0].save(self._gifPath, save_all = True, append_images = images,
-                    duration = gifTimePerFrameMS, loop = 0, optimize = False)
+        # Finish the gif.
+        if (self._gifWriter is not None):
+            self._gifWriter.close()
+            self._gifWriter = None
 
     def getKeyboard(self):
         """
@@ -68,7 +71,8 @@ class AbstractView(abc.ABC):
         Perform an initial drawing of the view.
         """
 
-        pass
+        # A new game may be on a new layout.
+        self._staticImage = None
 
     def update(self, state, forceDraw = False):
         """
@@ -81,7 +85,7 @@ class AbstractView(abc.ABC):
         frame = self._createFrame(state)
         if (frame is not None and self._saveFrames
                 and (state.isOver() or (self._frameCount % self._skipFrames == 0))):
-            self._keyFrames.append(frame)
+            self._saveKeyFrame(frame)
 
         self._drawFrame(state, frame, forceDraw = forceDraw)
 
@@ -89,6 +93,22 @@ class AbstractView(abc.ABC):
         if (state.getLastAgentMoved() == 0):
             self._turnCount += 1
 
+    def _renderFrame(self, frame):
+        """
+        Render a frame to an image, reusing the pre-rendered static (wall) layer.
+        """
+
+        if (self._staticImage is None):
+            self._staticImage = frame.toStaticImage(self._sprites)
+
+        return frame.toImage(self._sprites, self._font, staticImage = self._staticImage)
+
+    def _saveKeyFrame(self, frame):
+        if (self._gifWriter is None):
+            self._gifWriter = GifWriter(self._gifPath, self._gifFPS)
+
+        self._gifWriter.addFrame(self._renderFrame(frame))
+
     @abc.abstractmethod
     def _createFrame(self, state):
         """
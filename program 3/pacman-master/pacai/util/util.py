@@ -2,9 +2,16 @@
 Various utility functions.
 """
 
+import os
+
 INITIAL_HASH_VALUE = 17
 HASH_MULTIPLIER = 37
 
+# Files that are cached between runs (e.g. maze distances) are kept under the user's own
+# cache directory, never somewhere shared like the system's temp directory.
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME',
+        os.path.join(os.path.expanduser('~'), '.cache')), 'pacai')
+
 def arrayInvert(array):
     """
     Inverts a matrix stored as a list of lists.
@@ -29,6 +36,18 @@ def buildHash(*args):
 
     return int(hashCode)
 
+def makePrivateDirs(path):
+    """
+    Make a directory (and any missing parents) that only the current user can access.
+    """
+
+    parent = os.path.dirname(os.path.abspath(path))
+    if (not os.path.isdir(parent)):
+        makePrivateDirs(parent)
+
+    if (not os.path.isdir(path)):
+        os.makedirs(path, mode = 0o700, exist_ok = True)
+
 def matrixAsList(matrix, value = True):
     """
     Turns a matrix into a list of coordinates matching the specified value
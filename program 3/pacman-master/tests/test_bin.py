@@ -3,6 +3,7 @@ import unittest
 from pacai.bin import capture
 from pacai.bin import gridworld
 from pacai.bin import pacman
+from pacai.bin import tournament
 
 """
 This is a test class to assess the executables of this project.
@@ -60,6 +61,11 @@ class BinTest(unittest.TestCase):
         # Run game of pacman with seed value entry.
         pacman.main(['-p', 'GreedyAgent', '--null-graphics', '--seed', '1234'])
 
+    def test_simulation(self):
+        # Run headless games, with and without the optional history and timing.
+        pacman.main(['-p', 'GreedyAgent', '--simulation'])
+        capture.main(['--simulation', '--catch-exceptions'])
+
     def test_capture_seeded_maze_generations(self):
         # Run game of capture with random generated map without seed value.
         capture.main(['--null-graphics', '--layout', 'RANDOM']) 
@@ -67,5 +73,20 @@ class BinTest(unittest.TestCase):
         # Run game of capture with random generated map with seed value.
         capture.main(['--null-graphics', '--layout', 'RANDOM94'])
 
+    def test_tournament(self):
+        # Run a small round robin with a random layout.
+        results = tournament.main(['--teams', 'pacai.core.baselineTeam', 'pacai.student.myTeam',
+                '--layouts', 'RANDOM7', '--seeds', '1', '--max-moves', '100', '-w', '2'])
+
+        self.assertEqual(2, len(results))
+
+    def test_tournament_help(self):
+        # Show all tournament arguments.
+        try:
+            tournament.main(['--help'])
+        except SystemExit as status:
+            if status.code != 0:
+                self.fail("Error occured when running --help.")
+
 if __name__ == '__main__':
     unittest.main()
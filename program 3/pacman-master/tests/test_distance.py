@@ -0,0 +1,72 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from pacai.core import distanceCalculator
+from pacai.core.layout import getLayout
+
+"""
+Test the maze distance tables.
+"""
+class DistanceTest(unittest.TestCase):
+    def test_distances(self):
+        layout = getLayout('tinyMaze')
+        table = distanceCalculator.computeDistances(layout)
+
+        for (x, y) in layout.walls.asList(False):
+            self.assertEqual(0, table.getDistance((x, y), (x, y)))
+
+        self.assertEqual(8, table.getDistance((5, 5), (1, 1)))
+        self.assertEqual(8, table.getDistance((1, 1), (5, 5)))
+        self.assertIsNone(table.getDistance((0, 0), (1, 1)))
+
+    def test_disk_cache(self):
+        layout = getLayout('smallMaze')
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            distanceCalculator._tableCache.clear()
+            computed = distanceCalculator.getDistanceTable(layout, cacheDir)
+            self.assertEqual(1, len(os.listdir(cacheDir)))
+
+            distanceCalculator._tableCache.clear()
+            loaded = distanceCalculator.getDistanceTable(layout, cacheDir)
+
+            self.assertIsNot(computed, loaded)
+            for cellId in range(computed.getGraph().getNumCells()):
+                self.assertEqual(computed.getRow(cellId), loaded.getRow(cellId))
+
+        # Tables are shared within a process.
+        self.assertIs(loaded, distanceCalculator.getDistanceTable(layout, None))
+
+    def test_bad_cache_file(self):
+        layout = getLayout('smallMaze')
+        graph = layout.getMazeGraph()
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            path = distanceCalculator._cachePath(graph, cacheDir)
+            expected = distanceCalculator.computeDistances(layout)
+
+            # Old (pickled) tables, other files, and cut off tables are all ignored.
+            contents = [
+                pickle.dumps({'version': 1}),
+                b'not a table',
+                distanceCalculator.CACHE_HEADER.pack(distanceCalculator.CACHE_MAGIC,
+                        distanceCalculator.CACHE_VERSION, graph.getNumCells()) + b'\x00\x00',
+            ]
+
+            for content in contents:
+                with open(path, 'wb') as file:
+                    file.write(content)
+
+                distanceCalculator._tableCache.clear()
+                self.assertIsNone(distanceCalculator._loadTable(graph, cacheDir))
+
+                table = distanceCalculator.getDistanceTable(layout, cacheDir)
+                self.assertEqual(expected.getRow(0), table.getRow(0))
+
+                # The bad file was replaced.
+                self.assertIsNotNone(distanceCalculator._loadTable(graph, cacheDir))
+
+if __name__ == '__main__':
+    unittest.main()
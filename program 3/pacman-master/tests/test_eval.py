@@ -0,0 +1,105 @@
+import random
+import unittest
+
+from pacai.agents.search.multiagent import MultiAgentSearchAgent
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import eval
+from pacai.core.layout import getLayout
+
+"""
+Test evaluating batches of states.
+"""
+class EvalTest(unittest.TestCase):
+    def test_evaluate_all(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        successors = [state.generateSuccessor(0, action) for action in state.getLegalActions()]
+
+        expected = [successor.getScore() for successor in successors]
+        self.assertEqual(expected, eval.evaluateAll(eval.score, state, successors))
+
+        evaluator = _CountingEvaluator()
+        self.assertEqual(expected, eval.evaluateAll(evaluator, state, successors))
+        self.assertEqual(1, evaluator.prepared)
+
+        # A single state is its own parent.
+        self.assertEqual(state.getScore(), evaluator(state))
+
+    def test_closest_food(self):
+        evaluator = eval.ClosestFoodEvaluator(foodWeight = 2.0)
+
+        for state in _getStates():
+            successors = [state.generateSuccessor(0, action)
+                    for action in state.getLegalActions()]
+
+            expected = []
+            for successor in successors:
+                distance = successor.getFoodDistances().getDistance(successor.getPacmanPosition())
+                expected.append(successor.getScore() - 2.0 * distance)
+
+            self.assertEqual(expected, eval.evaluateAll(evaluator, state, successors))
+            self.assertEqual(expected, [evaluator(successor) for successor in successors])
+
+    def test_batched_search(self):
+        evalFn = 'pacai.core.eval.ClosestFoodEvaluator'
+        agent = _SearchAgent(0, evalFn = evalFn, depth = 2, tableSize = 0)
+        self.assertIsInstance(agent.getEvaluationFunction(), eval.ClosestFoodEvaluator)
+
+        for state in _getStates():
+            expected = _minimax(state, 0, 2, agent.getEvaluationFunction())
+
+            value, action = agent.alphaBetaSearch(state)
+            self.assertEqual(expected, value)
+            self.assertIn(action, state.getLegalActions())
+
+class _CountingEvaluator(eval.BatchEvaluator):
+    def __init__(self):
+        self.prepared = 0
+
+    def evaluate(self, gameState, shared):
+        return gameState.getScore()
+
+    def prepare(self, parentState):
+        self.prepared += 1
+
+class _SearchAgent(MultiAgentSearchAgent):
+    def getAction(self, state):
+        return self.alphaBetaSearch(state)[1]
+
+def _getStates():
+    rng = random.Random(140)
+    state = PacmanGameState(getLayout('smallClassic'))
+
+    states = [state]
+    while (len(states) < 5 and not state.isOver()):
+        for agentIndex in range(state.getNumAgents()):
+            state = state.generateSuccessor(agentIndex,
+                    rng.choice(state.getLegalActions(agentIndex)))
+
+            if (state.isOver()):
+                break
+
+        states.append(state)
+
+    return states
+
+def _minimax(state, agentIndex, depth, evaluationFunction):
+    """
+    A plain minimax search, evaluating one state at a time.
+    """
+
+    if (state.isOver() or depth == 0):
+        return evaluationFunction(state)
+
+    nextAgent = (agentIndex + 1) % state.getNumAgents()
+    nextDepth = depth - 1 if (nextAgent == 0) else depth
+
+    values = [_minimax(state.generateSuccessor(agentIndex, action), nextAgent, nextDepth,
+            evaluationFunction) for action in state.getLegalActions(agentIndex)]
+
+    if (agentIndex == 0):
+        return max(values)
+
+    return min(values)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from pacai.bin import pacman
+from pacai.core.featureExtractors import IdentityExtractor
+from pacai.core.features import FeatureIndex
+from pacai.core.features import FeatureVector
+from pacai.core.features import WeightVector
+
+"""
+Test interned feature vectors and weights.
+"""
+class FeaturesTest(unittest.TestCase):
+    def test_index(self):
+        index = FeatureIndex(['a', 'b'])
+
+        self.assertEqual(0, index.register('a'))
+        self.assertEqual(2, index.register('c'))
+        self.assertEqual(1, index.getIndex('b'))
+        self.assertIsNone(index.getIndex('d'))
+        self.assertEqual('c', index.getName(2))
+        self.assertEqual(3, len(index))
+
+    def test_weights(self):
+        index = FeatureIndex()
+        first = FeatureVector.fromDict(index, {'a': 1.0, 'b': 2.0})
+        weights = WeightVector.fromDict(index, {'a': 3.0})
+
+        self.assertEqual(3.0, weights.dot(first))
+
+        # New features start at 0.
+        second = FeatureVector.fromDict(index, {'b': 1.0, 'c': -1.0})
+        self.assertEqual([3.0, 0.0], weights.dotAll([first, second]))
+
+        weights.update(second, 0.5)
+        self.assertEqual({'a': 3.0, 'b': 0.5, 'c': -0.5}, weights.asDict())
+        self.assertEqual(4.0, weights.dot(first))
+        self.assertEqual(0.0, weights.get('d'))
+
+        self.assertEqual({'b': 1.0, 'c': -1.0}, second.asDict(index))
+
+    def test_extractor_vectors(self):
+        extractor = IdentityExtractor()
+
+        vector = extractor.getFeatureVector('state', 'action')
+        self.assertEqual({('state', 'action'): 1.0}, vector.asDict(extractor.getFeatureIndex()))
+
+        # The same features get the same indexes.
+        again = extractor.getFeatureVector('state', 'action')
+        self.assertEqual(vector.getIndexes(), again.getIndexes())
+
+    def test_approximate_agent(self):
+        args = pacman.readCommand(['--null-graphics', '--quiet', '-l', 'smallGrid',
+                '-p', 'ApproximateQAgent', '--num-training', '10', '-n', '11'])
+        pacman.runGames(**args)
+
+        weights = args['pacman'].getParameters()
+        self.assertTrue(len(weights) > 0)
+
+if __name__ == '__main__':
+    unittest.main()
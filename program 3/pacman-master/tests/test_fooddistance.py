@@ -0,0 +1,83 @@
+import pickle
+import random
+import unittest
+
+from pacai.bin import pacman
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import fooddistance
+from pacai.core import mazegraph
+from pacai.core.layout import getLayout
+
+"""
+Test the incrementally maintained food distance field.
+"""
+class FoodDistanceTest(unittest.TestCase):
+    def test_remove_food(self):
+        layout = getLayout('mediumClassic')
+        food = layout.food.copy()
+        field = fooddistance.getFoodDistances(layout.walls, food)
+
+        rng = random.Random(140)
+        positions = food.asList()
+        rng.shuffle(positions)
+
+        for position in positions:
+            field = field.withoutFood(position)
+            food.set(position[0], position[1], False)
+
+            self._checkField(layout.walls, food, field)
+
+    def test_cached_by_food(self):
+        layout = getLayout('smallClassic')
+        field = fooddistance.getFoodDistances(layout.walls, layout.food)
+
+        first, second = layout.food.asList()[:2]
+
+        # The same food eaten in a different order gives the same field.
+        self.assertIs(field.withoutFood(first).withoutFood(second),
+                field.withoutFood(second).withoutFood(first))
+
+        # Removing food that is not there does nothing.
+        self.assertIs(field, field.withoutFood((0, 0)))
+
+    def test_state_distances(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        state.getFoodDistances()
+
+        rng = random.Random(140)
+        for i in range(60):
+            if (state.isOver()):
+                break
+
+            for agentIndex in range(state.getNumAgents()):
+                state = state.generateSuccessor(agentIndex,
+                        rng.choice(state.getLegalActions(agentIndex)))
+
+                if (state.isOver()):
+                    break
+
+            self._checkField(state.getWalls(), state.getFood(), state.getFoodDistances())
+
+        # The field is not pickled with the state.
+        self.assertIsNone(pickle.loads(pickle.dumps(state))._foodDistances)
+
+    def test_simple_extractor(self):
+        pacman.main(['--null-graphics', '--quiet', '-l', 'smallClassic',
+                '-p', 'ApproximateQAgent', '--agent-args',
+                'extractor=pacai.core.featureExtractors.SimpleExtractor',
+                '--num-training', '2', '-n', '3'])
+
+    def _checkField(self, walls, food, field):
+        graph = mazegraph.getMazeGraph(walls)
+        foodCells = [graph.getCellId(position) for position in food.asList()]
+        expected = fooddistance._multiSourceBFS(graph, foodCells)
+
+        for cellId in range(graph.getNumCells()):
+            distance = expected[cellId]
+            if (distance == fooddistance.UNREACHABLE):
+                distance = None
+
+            self.assertEqual(distance, field.getCellDistance(cellId))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,256 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+TEST_LAYOUT = [
+    '%%%%%',
+    '%...%',
+    '%P..%',
+    '%%%%%',
+]
+
+GHOST_LAYOUT = [
+    '%%%%%%%',
+    '%Po..G%',
+    '%.....%',
+    '%%%%%%%',
+]
+
+CAPTURE_LAYOUT = [
+    '%%%%%%%%',
+    '%o..2.o%',
+    '%......%',
+    '%..1...%',
+    '%%%%%%%%',
+]
+
+"""
+Test game states.
+"""
+class GameStateTest(unittest.TestCase):
+    def test_transpositions_hash_equal(self):
+        start = PacmanGameState(Layout(TEST_LAYOUT))
+
+        first = self._walk(start, [Directions.EAST, Directions.NORTH, Directions.WEST,
+                Directions.SOUTH, Directions.EAST])
+        second = self._walk(start, [Directions.NORTH, Directions.EAST, Directions.SOUTH,
+                Directions.WEST, Directions.EAST])
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+
+        self.assertNotEqual(start, first)
+        self.assertNotEqual(hash(start), hash(first))
+
+    def test_eaten_food_changes_hash(self):
+        start = PacmanGameState(Layout(TEST_LAYOUT))
+
+        moved = start.generateSuccessor(0, Directions.EAST)
+        back = moved.generateSuccessor(0, Directions.WEST)
+
+        # Same position, but the food at (2, 1) is gone (and the score has changed).
+        self.assertFalse(back.hasFood(2, 1))
+        self.assertNotEqual(start, back)
+        self.assertNotEqual(hash(start), hash(back))
+
+    def test_successor_shares_agent_states(self):
+        start = PacmanGameState(Layout(GHOST_LAYOUT))
+
+        moved = start.generateSuccessor(0, Directions.SOUTH)
+
+        # Only the moving agent gets a new agent state.
+        self.assertIsNot(start.getPacmanState(), moved.getPacmanState())
+        self.assertIs(start.getGhostState(1), moved.getGhostState(1))
+
+        self.assertEqual((1, 2), start.getPacmanPosition())
+        self.assertEqual((1, 1), moved.getPacmanPosition())
+
+    def test_successor_copies_changed_agent_states(self):
+        start = PacmanGameState(Layout(GHOST_LAYOUT))
+
+        # Eating the capsule scares the (not moving) ghost.
+        moved = start.generateSuccessor(0, Directions.EAST)
+
+        self.assertIsNot(start.getGhostState(1), moved.getGhostState(1))
+        self.assertTrue(moved.getGhostState(1).isScared())
+        self.assertFalse(start.getGhostState(1).isScared())
+
+    def test_capture_sides(self):
+        start = CaptureGameState(Layout(CAPTURE_LAYOUT), 100)
+
+        self.assertEqual(7, start.getRedFoodCount())
+        self.assertEqual(7, start.getBlueFoodCount())
+        self.assertEqual(1, start.getRedCapsuleCount())
+        self.assertEqual(1, start.getBlueCapsuleCount())
+
+        # Red crosses over, then eats blue food.
+        crossed = start.generateSuccessor(0, Directions.EAST)
+        red = crossed.generateSuccessor(0, Directions.EAST)
+        self.assertEqual(6, red.getBlueFoodCount())
+        self.assertEqual(7, red.getRedFoodCount())
+        self.assertFalse(red.getBlueFood()[5][1])
+        self.assertTrue(crossed.getBlueFood()[5][1])
+
+        # Only the side that was eaten from is copied.
+        self.assertIs(crossed.getRedFood(), red.getRedFood())
+
+        # Blue crosses over, eats red food, and then the red capsule.
+        blue = self._walk(red, [Directions.WEST, Directions.WEST, Directions.WEST], 1)
+        self.assertEqual(6, blue.getRedFoodCount())
+        self.assertEqual(0, blue.getRedCapsuleCount())
+        self.assertEqual(1, blue.getBlueCapsuleCount())
+        self.assertIs(red.getBlueCapsules(), blue.getBlueCapsules())
+        self.assertEqual(1, red.getRedCapsuleCount())
+
+        for state in (start, red, blue):
+            self.assertEqual(state.getRedFood().count(), state.getRedFoodCount())
+            self.assertEqual(state.getBlueFood().count(), state.getBlueFoodCount())
+
+    def test_make_move(self):
+        ghostLayout = Layout(GHOST_LAYOUT)
+        captureLayout = Layout(CAPTURE_LAYOUT)
+
+        starts = [
+            lambda: PacmanGameState(getLayout('smallClassic')),
+            lambda: PacmanGameState(ghostLayout),
+            lambda: CaptureGameState(captureLayout, 100),
+        ]
+
+        for makeStart in starts:
+            eaten = 0
+            for seed in range(3):
+                eaten += self._checkMakeMove(makeStart(), makeStart(), seed)
+
+            # Something was eaten in place, so there was something to put back.
+            self.assertGreater(eaten, 0)
+
+    def test_make_move_keeps_successors(self):
+        layout = Layout(TEST_LAYOUT)
+        state = PacmanGameState(layout)
+        successor = state.generateSuccessor(0, Directions.NORTH)
+
+        # The parent shares its food with the successor, so eating in place copies it.
+        undo = state.makeMove(0, Directions.EAST)
+        self.assertEqual(4, state.getNumFood())
+        self.assertEqual(4, successor.getNumFood())
+        self.assertTrue(successor.hasFood(2, 1))
+
+        state.unmakeMove(undo)
+        self.assertEqual(5, state.getNumFood())
+        self.assertEqual(successor, state.generateSuccessor(0, Directions.NORTH))
+
+        # Illegal moves leave the state as it was.
+        with self.assertRaises(ValueError):
+            state.makeMove(0, Directions.WEST)
+
+        self.assertEqual(PacmanGameState(layout), state)
+
+    def test_unmake_move_keeps_successors(self):
+        layout = Layout(TEST_LAYOUT)
+        state = PacmanGameState(layout)
+
+        # The second move eats in place (the first copies the food from the layout).
+        undos = [state.makeMove(0, Directions.EAST), state.makeMove(0, Directions.EAST)]
+        # The successor does not eat, so it shares the food with the state.
+        successor = state.generateSuccessor(0, Directions.WEST)
+        expected = self._walk(PacmanGameState(layout),
+                [Directions.EAST, Directions.EAST, Directions.WEST])
+
+        while (len(undos) > 0):
+            state.unmakeMove(undos.pop())
+
+        self.assertEqual(5, state.getNumFood())
+        self.assertEqual(3, successor.getNumFood())
+        self.assertFalse(successor.hasFood(2, 1))
+        self.assertFalse(successor.hasFood(3, 1))
+        self._assertStatesMatch(expected, successor)
+
+        # Capture food is also split by side, and each side is owned from the start.
+        captureLayout = Layout(CAPTURE_LAYOUT)
+        state = CaptureGameState(captureLayout, 100)
+
+        undos = [state.makeMove(0, Directions.EAST), state.makeMove(0, Directions.EAST)]
+        successor = state.generateSuccessor(0, Directions.STOP)
+        expected = self._walk(CaptureGameState(captureLayout, 100),
+                [Directions.EAST, Directions.EAST, Directions.STOP])
+
+        while (len(undos) > 0):
+            state.unmakeMove(undos.pop())
+
+        self.assertEqual(CaptureGameState(captureLayout, 100), state)
+        self.assertFalse(successor.getBlueFood()[5][1])
+        self.assertEqual(6, successor.getBlueFoodCount())
+        self._assertStatesMatch(expected, successor)
+
+    def _checkMakeMove(self, state, start, seed):
+        """
+        Play the same random moves in place and with successors (from an equal start),
+        then take back all the moves made in place.
+        Returns the amount of food that was eaten.
+        """
+
+        rng = random.Random(seed)
+        successors = [start]
+        undos = []
+
+        agentIndex = 0
+        while (not state.isOver() and len(undos) < 200):
+            action = rng.choice(state.getLegalActions(agentIndex))
+
+            successors.append(successors[-1].generateSuccessor(agentIndex, action))
+            undos.append(state.makeMove(agentIndex, action))
+            self._assertStatesMatch(successors[-1], state)
+
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        eaten = start.getNumFood() - state.getNumFood()
+
+        while (len(undos) > 0):
+            state.unmakeMove(undos.pop())
+            successors.pop()
+            self._assertStatesMatch(successors[-1], state)
+
+        return eaten
+
+    def _assertStatesMatch(self, expected, state):
+        self.assertEqual(expected, state)
+        self.assertEqual(hash(expected), hash(state))
+        self.assertEqual(expected.getScore(), state.getScore())
+        self.assertEqual(expected.isOver(), state.isOver())
+        self.assertEqual(expected.getFood(), state.getFood())
+        self.assertEqual(expected.getCapsules(), state.getCapsules())
+        self.assertEqual(expected.getLastAgentMoved(), state.getLastAgentMoved())
+        self.assertEqual(expected.getLastFoodEaten(), state.getLastFoodEaten())
+        self.assertEqual(expected.getLastCapsuleEaten(), state.getLastCapsuleEaten())
+        self.assertEqual(expected.getFoodDistances().getDistance(expected.getAgentPosition(0)),
+                state.getFoodDistances().getDistance(state.getAgentPosition(0)))
+
+        for (expectedAgent, agent) in zip(expected.getAgentStates(), state.getAgentStates()):
+            self.assertEqual(expectedAgent.getPosition(), agent.getPosition())
+            self.assertEqual(expectedAgent.getDirection(), agent.getDirection())
+            self.assertEqual(expectedAgent.getScaredTimer(), agent.getScaredTimer())
+            self.assertEqual(expectedAgent.isPacman(), agent.isPacman())
+
+        if (isinstance(state, CaptureGameState)):
+            self.assertEqual(expected.getTimeleft(), state.getTimeleft())
+            self.assertEqual(expected.getRedFood(), state.getRedFood())
+            self.assertEqual(expected.getBlueFood(), state.getBlueFood())
+            self.assertEqual(expected.getRedFoodCount(), state.getRedFoodCount())
+            self.assertEqual(expected.getBlueFoodCount(), state.getBlueFoodCount())
+            self.assertEqual(expected.getRedCapsules(), state.getRedCapsules())
+            self.assertEqual(expected.getBlueCapsules(), state.getBlueCapsules())
+
+    def _walk(self, state, actions, agentIndex = 0):
+        for action in actions:
+            state = state.generateSuccessor(agentIndex, action)
+
+        return state
+
+if __name__ == '__main__':
+    unittest.main()
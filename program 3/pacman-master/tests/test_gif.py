@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+from PIL import ImageChops
+
+from pacai.bin import pacman
+from pacai.ui.gif import GifWriter
+
+GIF_FILENAME = 'pacai_unittest.gif'
+
+"""
+Test streaming gif output.
+"""
+class GifTest(unittest.TestCase):
+    def setUp(self):
+        self._path = os.path.join(tempfile.gettempdir(), GIF_FILENAME)
+
+    def tearDown(self):
+        if (os.path.isfile(self._path)):
+            os.remove(self._path)
+
+    def test_writer(self):
+        images = []
+        for i in range(4):
+            image = Image.new('RGB', (40, 30), (0, 0, 0))
+            image.paste((255, 255, 0), (i * 10, 5, i * 10 + 10, 15))
+            images.append(image)
+
+        # Include a repeated frame.
+        images.append(images[-1].copy())
+
+        writer = GifWriter(self._path, 5)
+        for image in images:
+            writer.addFrame(image)
+        writer.close()
+
+        self.assertEqual(len(images), writer.getNumFrames())
+
+        with Image.open(self._path) as gif:
+            self.assertEqual(len(images), gif.n_frames)
+
+            for i in range(len(images)):
+                gif.seek(i)
+                self.assertEqual(200, gif.info['duration'])
+
+                difference = ImageChops.difference(images[i], gif.convert('RGB'))
+                self.assertIsNone(difference.getbbox())
+
+    def test_pacman_gif(self):
+        pacman.main(['--null-graphics', '-l', 'smallClassic', '-p', 'GreedyAgent',
+                '--gif', self._path])
+
+        with Image.open(self._path) as gif:
+            self.assertTrue(gif.n_frames > 1)
+
+if __name__ == '__main__':
+    unittest.main()
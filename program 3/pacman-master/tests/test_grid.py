@@ -0,0 +1,60 @@
+import unittest
+
+from pacai.core.grid import BitGrid
+from pacai.core.grid import Grid
+
+"""
+Test the grid containers.
+"""
+class GridTest(unittest.TestCase):
+    def test_bit_grid_access(self):
+        grid = BitGrid(4, 3)
+        self.assertEqual(0, grid.count())
+        self.assertEqual(12, grid.count(False))
+
+        grid[1][2] = True
+        grid.set(3, 0, True)
+
+        self.assertTrue(grid[1][2])
+        self.assertTrue(grid.get(3, 0))
+        self.assertFalse(grid[0][0])
+        self.assertEqual(2, grid.count())
+        self.assertEqual([(1, 2), (3, 0)], grid.asList())
+        self.assertEqual(10, len(grid.asList(False)))
+
+        grid[1][2] = False
+        self.assertFalse(grid[1][2])
+        self.assertEqual(1, grid.count())
+
+        with self.assertRaises(IndexError):
+            grid[4][0]
+
+    def test_bit_grid_copy(self):
+        grid = BitGrid(3, 3, initialValue = True)
+        copy = grid.copy()
+
+        copy[0][0] = False
+
+        self.assertTrue(grid[0][0])
+        self.assertFalse(copy[0][0])
+        self.assertNotEqual(grid, copy)
+
+    def test_matches_list_grid(self):
+        grid = Grid(5, 4)
+        bitGrid = BitGrid(5, 4)
+
+        for (x, y) in [(0, 0), (1, 3), (4, 2), (2, 1)]:
+            grid[x][y] = True
+            bitGrid[x][y] = True
+
+        self.assertEqual(grid, bitGrid)
+        self.assertEqual(bitGrid, grid)
+        self.assertEqual(hash(grid), hash(bitGrid))
+        self.assertEqual(grid.asList(), bitGrid.asList())
+        self.assertEqual(grid.asList(False), bitGrid.asList(False))
+        self.assertEqual(grid.count(), bitGrid.count())
+        self.assertEqual(str(grid), str(bitGrid))
+        self.assertEqual(bitGrid, BitGrid.fromGrid(grid))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import random
+import unittest
+
+from pacai.agents.capture.dummy import DummyAgent
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.history import ObservationHistory
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+# Small enough that random agents eat some food.
+CAPTURE_LAYOUT = [
+    '%%%%%%%%%%',
+    '%o..2.4.o%',
+    '%........%',
+    '%.1.3....%',
+    '%%%%%%%%%%',
+]
+
+"""
+Test keeping the history of observed states.
+"""
+class HistoryTest(unittest.TestCase):
+    def test_bounded(self):
+        states = _getStates(CaptureGameState(getLayout('defaultCapture'), 1200), 20)
+        observations = ObservationHistory(maxStates = 3)
+
+        for state in states:
+            observations.append(state)
+
+        self.assertEqual(20, len(observations))
+        self.assertEqual(3, observations.getNumKept())
+        self.assertIs(states[-1], observations[-1])
+        self.assertIs(states[-3], observations[17])
+        self.assertEqual(states[-3:], list(observations))
+
+        with self.assertRaises(IndexError):
+            observations[16]
+
+        with self.assertRaises(IndexError):
+            observations[20]
+
+        observations.clear()
+        self.assertEqual(0, len(observations))
+
+    def test_deltas(self):
+        starts = [
+            CaptureGameState(Layout(CAPTURE_LAYOUT), 1200),
+            PacmanGameState(getLayout('smallClassic')),
+        ]
+
+        for start in starts:
+            states = _getStates(start, 150)
+            observations = ObservationHistory(maxStates = 2, keepDeltas = True)
+
+            for state in states:
+                observations.append(state)
+
+            self.assertEqual(2, observations.getNumKept())
+            self.assertEqual(len(states), len(list(observations)))
+
+            for (i, state) in enumerate(states):
+                rebuilt = observations[i]
+
+                self.assertEqual(state, rebuilt)
+                self.assertEqual(hash(state), hash(rebuilt))
+                self.assertEqual(state.getScore(), rebuilt.getScore())
+                self.assertEqual(state.getNumFood(), rebuilt.getNumFood())
+                self.assertEqual(state.getCapsules(), rebuilt.getCapsules())
+
+                if (isinstance(state, CaptureGameState)):
+                    self.assertEqual(state.getTimeleft(), rebuilt.getTimeleft())
+                    self.assertEqual(state.getRedFood(), rebuilt.getRedFood())
+                    self.assertEqual(state.getBlueFoodCount(), rebuilt.getBlueFoodCount())
+
+            # The last state eats something, so the records have something to replay.
+            self.assertLess(states[-1].getNumFood(), states[0].getNumFood())
+
+    def test_agent(self):
+        states = _getStates(CaptureGameState(getLayout('defaultCapture'), 1200), 5)
+        agent = DummyAgent(0, historySize = 2)
+        agent.registerInitialState(states[0])
+
+        self.assertIsNone(agent.getCurrentObservation())
+
+        for state in states:
+            agent.getAction(state)
+
+        self.assertIs(states[-1], agent.getCurrentObservation())
+        self.assertIs(states[-2], agent.getPreviousObservation())
+        self.assertEqual(5, len(agent.observationHistory))
+
+        agent.final(states[-1])
+        self.assertIsNone(agent.getPreviousObservation())
+
+def _getStates(state, count):
+    """
+    Play randomly, keeping every state an agent would have seen.
+    """
+
+    rng = random.Random(140)
+
+    states = [state]
+    while (len(states) < count and not state.isOver()):
+        agentIndex = (len(states) - 1) % state.getNumAgents()
+        state = state.generateSuccessor(agentIndex, rng.choice(state.getLegalActions(agentIndex)))
+        states.append(state)
+
+    return states
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.core import inference
+from pacai.core.actions import Actions
+from pacai.core.inference import Belief
+from pacai.core.inference import OpponentTracker
+from pacai.core.layout import getLayout
+
+"""
+Test tracking opponents.
+"""
+class InferenceTest(unittest.TestCase):
+    def test_elapse_time(self):
+        layout = getLayout('tinyCapture')
+        belief = Belief(layout.getMazeGraph(), (1, 1))
+        expected = {(1, 1): 1.0}
+
+        for i in range(5):
+            belief.elapseTime()
+            expected = self._slowElapseTime(expected, layout.walls)
+
+            self._assertDistribution(expected, belief.getDistribution())
+
+    def test_observe_distance(self):
+        layout = getLayout('tinyCapture')
+        noise = inference.uniformNoise(5)
+
+        belief = Belief(layout.getMazeGraph())
+        belief.observeDistance((1, 1), 4, noise)
+
+        cells = layout.getOpenCells()
+        expected = {}
+        for (x, y) in cells:
+            if (abs(4 - (abs(x - 1) + abs(y - 1))) <= 2):
+                expected[(x, y)] = 1.0
+
+        total = sum(expected.values())
+        expected = {position: value / total for (position, value) in expected.items()}
+
+        self._assertDistribution(expected, belief.getDistribution())
+
+        # Impossible readings start over.
+        belief.observePosition((1, 1))
+        belief.observeDistance((1, 1), 100, noise)
+        self.assertAlmostEqual(1.0 / len(cells), belief.getProbability((1, 1)))
+
+        with self.assertRaises(ValueError):
+            inference.uniformNoise(4)
+
+    def test_observe_not_at(self):
+        layout = getLayout('tinyCapture')
+        belief = Belief(layout.getMazeGraph())
+
+        cells = layout.getOpenCells()
+        belief.observeNotAt(cells[1:])
+        self.assertEqual(cells[0], belief.getMostLikelyPosition())
+        self.assertEqual({cells[0]: 1.0}, belief.getDistribution())
+
+    def test_tracker(self):
+        rng = random.Random(140)
+        noise = inference.uniformNoise()
+
+        layout = getLayout('jumboCapture')
+        state = CaptureGameState(layout, 1200)
+        tracker = OpponentTracker(state, [1])
+
+        # Exact positions are used.
+        tracker.update(state)
+        self.assertEqual(state.getAgentPosition(1), tracker.getMostLikelyPosition(1))
+
+        # Follow a (hidden) random walk with noisy readings from a fixed spot.
+        position = state.getAgentPosition(1)
+        hidden = _HiddenState()
+        for i in range(50):
+            actions = Actions.getPossibleActions(position, None, layout.walls)
+            dx, dy = Actions.directionToVector(rng.choice(actions))
+            position = (int(position[0] + dx), int(position[1] + dy))
+
+            distance = abs(position[0] - 1) + abs(position[1] - 1)
+            reading = distance + rng.choice(list(noise.keys()))
+
+            tracker.update(hidden, (1, 1), {1: reading})
+            self.assertGreater(tracker.getBelief(1).getProbability(position), 0.0)
+
+        tracker.respawn(1)
+        self.assertEqual(1.0, tracker.getBelief(1).getProbability(state.getInitialAgentPosition(1)))
+
+    def _assertDistribution(self, expected, actual):
+        self.assertEqual(sorted(expected), sorted(actual))
+        for (position, value) in expected.items():
+            self.assertAlmostEqual(value, actual[position])
+
+    def _slowElapseTime(self, distribution, walls):
+        result = {}
+        for (position, value) in distribution.items():
+            destinations = [position] + Actions.getLegalNeighbors(position, walls)
+            destinations = set(destinations)
+
+            for destination in destinations:
+                result[destination] = result.get(destination, 0.0) + value / len(destinations)
+
+        return result
+
+class _HiddenState(object):
+    def getAgentPosition(self, index):
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
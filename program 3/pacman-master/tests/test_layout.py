@@ -0,0 +1,156 @@
+import os
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import GhostRules
+from pacai.bin.pacman import PacmanGameState
+from pacai.bin.pacman import PacmanRules
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.grid import BitGrid
+from pacai.core.layout import DEFAULT_LAYOUT_DIR
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+GHOST_LAYOUT = [
+    '%%%%%%%',
+    '%Po..G%',
+    '%.%%%.%',
+    '%%%%%%%',
+]
+
+"""
+Test loading layouts, and what is precomputed for them.
+"""
+class LayoutTest(unittest.TestCase):
+    def test_legal_actions(self):
+        # The table must agree with the general (slow) rules on every layout.
+        for filename in sorted(os.listdir(DEFAULT_LAYOUT_DIR)):
+            layout = getLayout(filename)
+            walls = layout.walls
+
+            for x in range(layout.getWidth()):
+                for y in range(layout.getHeight()):
+                    if (walls[x][y]):
+                        self.assertIsNone(layout.getLegalActions((x, y)))
+                        continue
+
+                    expected = Actions.getPossibleActions((x, y), Directions.STOP, walls)
+                    self.assertEqual(tuple(expected), layout.getLegalActions((x, y)))
+
+                    # Positions may be floats.
+                    self.assertEqual(tuple(expected), layout.getLegalActions((x * 1.0, y * 1.0)))
+
+                    for direction in Actions._directions:
+                        self.assertEqual(self._slowGhostActions((x, y), direction, walls),
+                                layout.getLegalGhostActions((x, y), direction))
+
+    def test_between_cells(self):
+        layout = Layout(GHOST_LAYOUT)
+
+        self.assertIsNone(layout.getLegalActions((1.5, 2)))
+        self.assertIsNone(layout.getLegalGhostActions((1.5, 2), Directions.WEST))
+
+    def test_rules(self):
+        state = PacmanGameState(Layout(GHOST_LAYOUT))
+
+        self.assertEqual((Directions.EAST, Directions.SOUTH, Directions.STOP),
+                PacmanRules.getLegalActions(state))
+
+        # Ghosts do not stop, and only turn around in dead ends.
+        self.assertEqual((Directions.SOUTH, Directions.WEST), GhostRules.getLegalActions(state, 1))
+
+        # Eating the capsule scares the ghost, which then moves at half speed
+        # and must keep going when between cells.
+        state = state.generateSuccessor(0, Directions.EAST)
+        self.assertTrue(state.getGhostState(1).isScared())
+
+        state = state.generateSuccessor(1, Directions.WEST)
+        self.assertEqual((4.5, 2), state.getGhostPosition(1))
+        self.assertEqual((Directions.WEST,), GhostRules.getLegalActions(state, 1))
+
+        # Back on a cell, it may not turn around.
+        state = state.generateSuccessor(0, Directions.STOP)
+        state = state.generateSuccessor(1, Directions.WEST)
+        self.assertEqual((4.0, 2.0), state.getGhostPosition(1))
+        self.assertEqual((Directions.WEST,), GhostRules.getLegalActions(state, 1))
+
+    def test_registry(self):
+        layout = getLayout('smallClassic')
+
+        self.assertIs(layout, getLayout('smallClassic.lay'))
+        self.assertIsNot(layout, getLayout('smallClassic', maxGhosts = 1))
+        self.assertIs(layout.getMazeGraph(), getLayout('smallClassic').getMazeGraph())
+
+    def test_dead_ends(self):
+        layout = getLayout('mediumMaze')
+        walls = layout.walls
+
+        expected = [(x, y) for (x, y) in walls.asList(False)
+                if (len(Actions.getLegalNeighbors((x, y), walls)) == 2)]
+        self.assertEqual(expected, layout.getDeadEnds())
+
+    def test_choke_points(self):
+        for name in ('tinyMaze', 'smallClassic', 'tinyCapture'):
+            layout = getLayout(name)
+            cells = layout.getOpenCells()
+
+            expected = [cell for cell in cells
+                    if (self._countComponents(set(cells) - {cell}) > 1)]
+            self.assertEqual(expected, layout.getChokePoints())
+
+    def test_sides(self):
+        layout = getLayout('defaultCapture')
+        state = CaptureGameState(layout, 100)
+
+        red = layout.getSideMask(True)
+        blue = layout.getSideMask(False)
+
+        for x in range(layout.getWidth()):
+            for y in range(layout.getHeight()):
+                self.assertEqual(state.isOnRedSide((x, y)), red[x][y])
+                self.assertNotEqual(red[x][y], blue[x][y])
+
+        self.assertEqual(layout.food, BitGrid.fromGrid(_union(state.getRedFood(),
+                state.getBlueFood())))
+        for (x, y) in state.getRedFood().asList():
+            self.assertTrue(state.isOnRedSide((x, y)))
+
+    def _countComponents(self, cells):
+        components = 0
+        unseen = set(cells)
+
+        while (len(unseen) > 0):
+            components += 1
+            stack = [unseen.pop()]
+
+            while (len(stack) > 0):
+                x, y = stack.pop()
+                for neighbor in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                    if (neighbor in unseen):
+                        unseen.remove(neighbor)
+                        stack.append(neighbor)
+
+        return components
+
+    def _slowGhostActions(self, position, direction, walls):
+        actions = Actions.getPossibleActions(position, direction, walls)
+        reverse = Actions.reverseDirection(direction)
+
+        if (Directions.STOP in actions):
+            actions.remove(Directions.STOP)
+
+        if (reverse in actions and len(actions) > 1):
+            actions.remove(reverse)
+
+        return tuple(actions)
+
+def _union(first, second):
+    grid = first.copy()
+    for (x, y) in second.asList():
+        grid.set(x, y, True)
+
+    return grid
+
+if __name__ == '__main__':
+    unittest.main()
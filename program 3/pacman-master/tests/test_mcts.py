@@ -0,0 +1,138 @@
+import random
+import unittest
+
+from pacai.agents.search.mcts import MonteCarloAgent
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+# Pacman must eat the food, and not walk into the ghost.
+CHOICE_LAYOUT = [
+    '%%%%%%%',
+    '%.P  G%',
+    '%%%%%%%',
+]
+
+# The ghost can catch pacman, or run away from them.
+CHASE_LAYOUT = [
+    '%%%%%%%%',
+    '%.PG  .%',
+    '%%%%%%%%',
+]
+
+"""
+Test rollout states and Monte Carlo tree search.
+"""
+class MonteCarloTest(unittest.TestCase):
+    def test_pacman_rollout(self):
+        for seed in range(5):
+            self._checkRollout(PacmanGameState(getLayout('smallClassic')), seed)
+
+    def test_capture_rollout(self):
+        for seed in range(5):
+            self._checkRollout(CaptureGameState(getLayout('tinyCapture'), 1200), seed)
+
+    def test_choice(self):
+        state = PacmanGameState(Layout(CHOICE_LAYOUT))
+        agent = MonteCarloAgent(0, timeBudget = None, maxIterations = 100, seed = 140)
+
+        self.assertEqual(Directions.WEST, agent.getAction(state))
+        self.assertEqual(100, agent.getLastIterations())
+
+    def test_ghost_choice(self):
+        state = PacmanGameState(Layout(CHASE_LAYOUT))
+        agent = MonteCarloAgent(1, timeBudget = None, maxIterations = 100, seed = 140)
+
+        self.assertEqual(Directions.WEST, agent.getAction(state))
+
+        # Ghosts are on the same side, and want pacman's score to be low.
+        rolloutState = state.getRolloutState()
+        self.assertTrue(rolloutState.isTeammate(1, 2))
+        self.assertFalse(rolloutState.isTeammate(0, 1))
+        self.assertEqual(-rolloutState.getScore(), rolloutState.getScoreFor(1))
+
+    def test_tree_reuse(self):
+        state = CaptureGameState(getLayout('defaultCapture'), 1200)
+        agent = MonteCarloAgent(0, timeBudget = None, maxIterations = 2000, seed = 140)
+        agent.registerInitialState(state)
+
+        action = agent.getAction(state)
+        self.assertFalse(agent.reusedTree())
+
+        # Every other agent makes the first move the search tried for them.
+        state = state.generateSuccessor(0, action)
+        node = agent._root.children[action]
+        for agentIndex in range(1, state.getNumAgents()):
+            nextAction, node = next(iter(node.children.items()))
+            state = state.generateSuccessor(agentIndex, nextAction)
+
+        agent.getAction(state)
+        self.assertTrue(agent.reusedTree())
+
+        # A state the tree does not know.
+        agent.registerInitialState(state)
+        agent.getAction(state)
+        self.assertFalse(agent.reusedTree())
+
+    def test_time_budget(self):
+        agent = MonteCarloAgent(0)
+
+        agent.setMoveWarningTime(1)
+        self.assertEqual(0.75, agent.getTimeBudget())
+
+        # Pacman's warning time is the whole game's timeout.
+        agent.setMoveWarningTime(30)
+        self.assertEqual(1.0, agent.getTimeBudget())
+
+        with self.assertRaises(ValueError):
+            MonteCarloAgent(0, timeBudget = None)
+
+    def _checkRollout(self, state, seed):
+        """
+        Play the same random moves on a full state and a rollout state,
+        then undo all of them.
+        """
+
+        rng = random.Random(seed)
+        rolloutState = state.getRolloutState()
+        signatures = [rolloutState.getSignature()]
+
+        agentIndex = 0
+        while (not state.isOver() and len(signatures) < 300):
+            legalActions = state.getLegalActions(agentIndex)
+            self.assertEqual(sorted(legalActions),
+                    sorted(rolloutState.getLegalActions(agentIndex)))
+
+            action = rng.choice(legalActions)
+            state = state.generateSuccessor(agentIndex, action)
+            rolloutState.apply(agentIndex, action)
+
+            # Scared pacman ghosts move at half speed, rollouts stop matching.
+            if (any([agent.getPosition() != agent.getNearestPosition()
+                    for agent in state.getAgentStates()])):
+                break
+
+            for index in range(state.getNumAgents()):
+                self.assertEqual(state.getAgentPosition(index),
+                        rolloutState.getAgentPosition(index))
+
+            self.assertEqual(state.getScore(), rolloutState.getScore())
+            self.assertEqual(state.getNumFood(), rolloutState.getNumFood())
+            self.assertEqual(state.isOver(), rolloutState.isOver())
+            self.assertEqual(state.getRolloutState().getSignature(), rolloutState.getSignature())
+
+            signatures.append(rolloutState.getSignature())
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        self.assertEqual(len(signatures) - 1, rolloutState.getDepth())
+
+        while (len(signatures) > 1):
+            self.assertEqual(signatures.pop(), rolloutState.getSignature())
+            rolloutState.undo()
+
+        self.assertEqual(signatures[0], rolloutState.getSignature())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from pacai.bin import gridworld
+from pacai.core.mdp import CompiledMDP
+from pacai.core.mdp import ValueIterationSolver
+
+"""
+Test the value iteration solver.
+"""
+class ValueIterationSolverTest(unittest.TestCase):
+    def test_iterate_matches_textbook(self):
+        mdp = gridworld._getGridWorld('bookgrid')
+        solver = ValueIterationSolver(mdp, 0.9)
+
+        for iters in range(1, 6):
+            expected = self._textbookValues(mdp, 0.9, iters)
+
+            solver.iterate(1)
+            for state in mdp.getStates():
+                self.assertAlmostEqual(expected[state], solver.getValue(state))
+
+    def test_converged_variants_agree(self):
+        mdp = CompiledMDP(gridworld._getGridWorld('bridgegrid'))
+
+        batch = ValueIterationSolver(mdp, 0.9)
+        sweeps = batch.iterate(1000, threshold = 1e-9)
+        self.assertTrue(sweeps < 1000)
+
+        inPlace = ValueIterationSolver(mdp, 0.9)
+        inPlace.iterateInPlace(1000, threshold = 1e-9)
+
+        prioritized = ValueIterationSolver(mdp, 0.9)
+        prioritized.prioritizedSweep(100000, threshold = 1e-9)
+
+        for state in mdp.getStates():
+            self.assertAlmostEqual(batch.getValue(state), inPlace.getValue(state), places = 6)
+            self.assertAlmostEqual(batch.getValue(state), prioritized.getValue(state), places = 6)
+
+            self.assertEqual(batch.getPolicy(state), inPlace.getPolicy(state))
+            self.assertEqual(batch.getPolicy(state), prioritized.getPolicy(state))
+
+    def test_sweep_snapshots(self):
+        mdp = CompiledMDP(gridworld._getGridWorld('bookgrid'))
+
+        solver = ValueIterationSolver(mdp, 0.9)
+        snapshots = list(solver.sweeps(10, threshold = None))
+        self.assertEqual(10, len(snapshots))
+
+        # Later sweeps (and in place updates) should not change earlier snapshots.
+        solver.iterateInPlace(5)
+
+        for iters in range(1, 11):
+            expected = ValueIterationSolver(mdp, 0.9)
+            expected.iterate(iters, threshold = None)
+
+            self.assertEqual(expected.getValues(), snapshots[iters - 1].getValues())
+
+    def test_terminal_state(self):
+        mdp = gridworld._getGridWorld('bookgrid')
+        solver = ValueIterationSolver(mdp, 0.9)
+        solver.iterate(10)
+
+        terminal = mdp.grid.terminalState
+        self.assertEqual(0.0, solver.getValue(terminal))
+        self.assertIsNone(solver.getPolicy(terminal))
+
+        # The exit in the top right is worth 1.
+        self.assertEqual('exit', solver.getPolicy((3, 2)))
+        self.assertAlmostEqual(1.0, solver.getQValue((3, 2), 'exit'))
+
+    def _textbookValues(self, mdp, discountRate, iters):
+        values = {state: 0.0 for state in mdp.getStates()}
+
+        for i in range(iters):
+            newValues = {}
+            for state in mdp.getStates():
+                qValues = []
+                for action in mdp.getPossibleActions(state):
+                    qValue = 0.0
+                    for (nextState, prob) in mdp.getTransitionStatesAndProbs(state, action):
+                        reward = mdp.getReward(state, action, nextState)
+                        qValue += prob * (reward + discountRate * values[nextState])
+
+                    qValues.append(qValue)
+
+                newValues[state] = max(qValues, default = 0.0)
+
+            values = newValues
+
+        return values
+
+if __name__ == '__main__':
+    unittest.main()
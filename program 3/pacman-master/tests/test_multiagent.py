@@ -0,0 +1,129 @@
+import random
+import time
+import unittest
+
+from pacai.agents.search.multiagent import MultiAgentSearchAgent
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import getLayout
+from pacai.core.search import transposition
+from pacai.core.search.transposition import TranspositionTable
+
+"""
+Test the transposition table and the searches in MultiAgentSearchAgent.
+"""
+class TranspositionTest(unittest.TestCase):
+    def test_searches_match_without_table(self):
+        for search in (_SearchAgent.alphaBetaSearch, _SearchAgent.expectimaxSearch):
+            for replacement in transposition.REPLACEMENT_POLICIES:
+                withTable = _SearchAgent(0, depth = 2, tableSize = 500,
+                        tableReplacement = replacement)
+                withoutTable = _SearchAgent(0, depth = 2, tableSize = 0)
+
+                for state in self._getStates():
+                    expected, _ = search(withoutTable, state)
+                    value, action = search(withTable, state)
+
+                    self.assertEqual(expected, value)
+                    self.assertIn(action, state.getLegalActions())
+
+                self.assertTrue(withTable.getTranspositionTable().getHits() > 0)
+
+    def test_probe_bounds(self):
+        table = TranspositionTable()
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        table.store(state, 0, 2, 10, transposition.LOWER, 'North')
+        self.assertIsNone(table.probe(state, 0, 2, 0, 20))
+        self.assertEqual(10, table.probe(state, 0, 2, 0, 5))
+        self.assertIsNone(table.probe(state, 0, 1, 0, 5))
+        self.assertIsNone(table.probe(state, 1, 2, 0, 5))
+
+        table.store(state, 0, 2, 10, transposition.UPPER, 'North')
+        self.assertIsNone(table.probe(state, 0, 2, 0, 20))
+        self.assertEqual(10, table.probe(state, 0, 2, 15, 20))
+
+        self.assertEqual('North', table.getBestMove(state, 0))
+
+    def test_replacement(self):
+        states = self._getStates()[:4]
+
+        table = TranspositionTable(2, transposition.REPLACE_LRU)
+        table.store(states[0], 0, 3, 0)
+        table.store(states[1], 0, 1, 0)
+        table.lookup(states[0], 0, 3)
+        table.store(states[2], 0, 2, 0)
+
+        self.assertEqual(2, len(table))
+        self.assertIsNotNone(table.lookup(states[0], 0, 3))
+        self.assertIsNone(table.lookup(states[1], 0, 1))
+
+        table = TranspositionTable(2, transposition.REPLACE_DEPTH)
+        table.store(states[0], 0, 3, 0)
+        table.store(states[1], 0, 1, 0)
+        table.store(states[2], 0, 2, 0)
+
+        # The shallowest entry was evicted, and nothing is shallower than what is left.
+        self.assertIsNone(table.lookup(states[1], 0, 1))
+        table.store(states[3], 0, 1, 0)
+        self.assertIsNone(table.lookup(states[3], 0, 1))
+
+        # A shallower search does not replace a deeper one.
+        table.store(states[0], 0, 1, 5)
+        self.assertEqual(0, table.lookup(states[0], 0, 3).value)
+
+        self.assertEqual(2, len(table))
+
+    def test_iterative_deepening_depth(self):
+        for state in self._getStates():
+            agent = _SearchAgent(0, depth = 3)
+            expected, _ = _SearchAgent(0, tableSize = 0).alphaBetaSearch(state, 3)
+
+            value, action, depth = agent.iterativeDeepeningSearch(state)
+            self.assertEqual(expected, value)
+            self.assertEqual(3, depth)
+
+            # Tables should not be shared between kinds of search.
+            agent = _SearchAgent(0, depth = 2)
+            expected, _ = _SearchAgent(0, tableSize = 0).expectimaxSearch(state, 2)
+
+            value, action, depth = agent.iterativeDeepeningSearch(state, expectimax = True)
+            self.assertEqual(expected, value)
+
+    def test_iterative_deepening_budget(self):
+        state = PacmanGameState(getLayout('mediumClassic'))
+
+        agent = _SearchAgent(0, timeBudget = 'auto', timeFraction = 0.5)
+        agent.setMoveWarningTime(0.4)
+        self.assertAlmostEqual(0.2, agent.getTimeBudget())
+
+        for expectimax in (False, True):
+            startTime = time.time()
+            value, action, depth = agent.iterativeDeepeningSearch(state, expectimax = expectimax)
+
+            self.assertTrue(time.time() - startTime < 1.0)
+            self.assertTrue(depth > 1)
+            self.assertIn(action, state.getLegalActions())
+
+    def _getStates(self):
+        rng = random.Random(140)
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        states = [state]
+        while (len(states) < 6 and not state.isOver()):
+            for agentIndex in range(state.getNumAgents()):
+                state = state.generateSuccessor(agentIndex,
+                        rng.choice(state.getLegalActions(agentIndex)))
+
+                if (state.isOver()):
+                    break
+
+            states.append(state)
+
+        return states
+
+class _SearchAgent(MultiAgentSearchAgent):
+    def getAction(self, state):
+        return self.alphaBetaSearch(state)[1]
+
+if __name__ == '__main__':
+    unittest.main()
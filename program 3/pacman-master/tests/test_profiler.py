@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+from pacai.bin import capture
+from pacai.bin import gridworld
+from pacai.bin import pacman
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import profiler
+from pacai.core.profiler import Profiler
+
+PACMAN_REPORT = 'pacai_unittest_pacman_profile.json'
+PACMAN_CPROFILE = 'pacai_unittest_pacman.prof'
+CAPTURE_REPORT = 'pacai_unittest_capture_profile.csv'
+GRIDWORLD_REPORT = 'pacai_unittest_gridworld_profile.json'
+
+"""
+Test profiling game runs.
+"""
+class ProfilerTest(unittest.TestCase):
+    def test_moves(self):
+        clock = _FakeClock()
+        moves = Profiler(buckets = (1.0, 2.0), clock = clock)
+
+        moves.startGame([_Agent()])
+        for seconds in (0.5, 3.0, 1.5, 0.5):
+            moves.startMove(0)
+            clock.time += seconds
+            moves.endMove(0)
+
+        moves.addTime(profiler.SECTION_PROCESS, 0.25)
+        moves.addTime(profiler.SECTION_PROCESS, 0.75)
+        moves.recordEvent(0, 'timeout')
+
+        report = moves.getReport()
+        agent = report['agents'][0]
+
+        self.assertEqual('_Agent', agent['name'])
+        self.assertEqual(4, agent['moves'])
+        self.assertEqual(5.5, agent['totalTime'])
+        self.assertEqual(3.0, agent['maxTime'])
+        self.assertEqual({'game': 1, 'turn': 2}, agent['slowestMove'])
+        self.assertEqual([2, 1, 1], [bucket['count'] for bucket in agent['histogram']])
+
+        self.assertEqual({'calls': 2, 'totalTime': 1.0, 'meanTime': 0.5, 'maxTime': 0.75},
+                report['sections'][profiler.SECTION_PROCESS])
+        self.assertEqual([{'game': 1, 'turn': 4, 'agent': 0, 'type': 'timeout'}],
+                report['events'])
+
+    def test_instrument(self):
+        counter = Profiler()
+        counter.instrument(_SubAgent, 'getAction')
+
+        agent = _SubAgent()
+        with counter:
+            counter.startGame([agent])
+            counter.startMove(0)
+            agent.getAction(None)
+            agent.getAction(None)
+            counter.endMove(0)
+
+            agent.getAction(None)
+
+        # Outside of the moves, calls are only counted in the total.
+        report = counter.getReport()
+        self.assertEqual(2, report['agents'][0]['successors'])
+        self.assertEqual(3, report['successors']['calls'])
+
+        # The inherited method is back.
+        self.assertNotIn('getAction', _SubAgent.__dict__)
+
+    def test_pacman(self):
+        reportPath = os.path.join(tempfile.gettempdir(), PACMAN_REPORT)
+        cProfilePath = os.path.join(tempfile.gettempdir(), PACMAN_CPROFILE)
+
+        pacman.main(['--null-graphics', '--quiet', '-l', 'smallClassic', '-p', 'GreedyAgent',
+                '-n', '2', '--profile', reportPath, '--profile-cprofile', cProfilePath])
+
+        with open(reportPath, 'r') as file:
+            report = json.load(file)
+
+        self.assertEqual(2, report['games'])
+        self.assertEqual('GreedyAgent', report['agents'][0]['name'])
+        self.assertTrue(report['agents'][0]['successors'] > 0)
+        self.assertTrue(report['agents'][1]['moves'] > 0)
+
+        # Every move is applied by the game.
+        moves = sum([agent['moves'] for agent in report['agents']])
+        self.assertEqual(moves, report['sections'][profiler.SECTION_SUCCESSOR]['calls'])
+        self.assertEqual(moves, report['sections'][profiler.SECTION_PROCESS]['calls'])
+
+        self.assertTrue(report['successors']['calls']
+                >= moves + report['agents'][0]['successors'])
+
+        pstats.Stats(cProfilePath)
+
+        # Profiling is over.
+        self.assertFalse(hasattr(PacmanGameState.generateSuccessor, '__wrapped__'))
+
+        os.remove(reportPath)
+        os.remove(cProfilePath)
+
+    def test_capture(self):
+        reportPath = os.path.join(tempfile.gettempdir(), CAPTURE_REPORT)
+
+        capture.main(['--null-graphics', '--quiet', '--max-moves', '40',
+                '--profile', reportPath])
+
+        with open(reportPath, 'r', newline = '') as file:
+            rows = list(csv.DictReader(file))
+
+        agents = [row for row in rows if (row['kind'] == 'agent')]
+        self.assertEqual(4, len(agents))
+        self.assertEqual(40, sum([int(row['calls']) for row in agents]))
+
+        sections = [row['name'] for row in rows if (row['kind'] == 'section')]
+        self.assertIn(profiler.SECTION_VIEW, sections)
+
+        os.remove(reportPath)
+
+    def test_gridworld(self):
+        reportPath = os.path.join(tempfile.gettempdir(), GRIDWORLD_REPORT)
+
+        gridworld.main(['--null-graphics', '--quiet', '-a', 'value', '-k', '2',
+                '--profile', reportPath])
+
+        with open(reportPath, 'r') as file:
+            report = json.load(file)
+
+        self.assertEqual(2, report['games'])
+        self.assertTrue(report['agents'][0]['moves'] > 0)
+
+        # Value iteration looks at every transition.
+        self.assertTrue(report['successors']['calls'] > report['agents'][0]['moves'])
+
+        os.remove(reportPath)
+
+class _Agent(object):
+    def getAction(self, state):
+        return None
+
+class _SubAgent(_Agent):
+    pass
+
+class _FakeClock(object):
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
+import json
 import os
+import random
 import tempfile
 import unittest
+import zlib
 
 from pacai.bin import capture
 from pacai.bin import pacman
+from pacai.core import replay
+from pacai.core.layout import getLayout
 
 PACMAN_FILENAME = 'pacai_unittest_pacman.replay'
 CAPTURE_FILENAME = 'pacai_unittest_capture.replay'
@@ -35,5 +40,110 @@ class ReplayTest(unittest.TestCase):
 
         os.remove(replayPath)
 
+    def test_seek(self):
+        replayPath = os.path.join(tempfile.gettempdir(), CAPTURE_FILENAME)
+
+        games = capture.main(['--null-graphics', '--max-moves', '250', '--record', replayPath])
+        history = games[0].moveHistory
+
+        reader = replay.ReplayReader(replayPath)
+        os.remove(replayPath)
+
+        self.assertEqual(len(history), reader.getNumMoves())
+        self.assertEqual(history, reader.getMoves())
+        self.assertEqual([0, 100, 200], reader.getCheckpointMoves())
+        self.assertEqual(250, reader.getInfo()['length'])
+
+        # Every state should match the one from replaying the game from the start.
+        state = reader.getState(0)
+        for moveIndex in range(len(history)):
+            state = state.generateSuccessor(*history[moveIndex])
+
+            if (moveIndex % 37 == 0 or moveIndex + 1 == len(history)):
+                self.assertEqual(state, reader.getState(moveIndex + 1))
+
+        self.assertEqual(games[0].state.getScore(), state.getScore())
+
+    def test_truncated(self):
+        replayPath = os.path.join(tempfile.gettempdir(), PACMAN_FILENAME)
+
+        pacman.main(['--null-graphics', '-p', 'GreedyAgent', '--record', replayPath])
+
+        with open(replayPath, 'rb') as file:
+            data = file.read()
+
+        reader = replay.ReplayReader(replayPath)
+        numMoves = reader.getNumMoves()
+
+        # Cut the file off in the middle of the last move.
+        with open(replayPath, 'wb') as file:
+            file.write(data[:-1])
+
+        reader = replay.ReplayReader(replayPath)
+        os.remove(replayPath)
+
+        self.assertEqual(numMoves - 1, reader.getNumMoves())
+        self.assertIsNotNone(reader.getState(numMoves - 1))
+
+    def test_checkpoints(self):
+        replayPath = os.path.join(tempfile.gettempdir(), CAPTURE_FILENAME)
+
+        starts = [
+            pacman.PacmanGameState(getLayout('smallClassic')),
+            capture.CaptureGameState(getLayout('tinyCapture'), 1200),
+        ]
+
+        for start in starts:
+            states = _playRandomly(start, 300)
+
+            with replay.ReplayWriter(replayPath, start.getInitialLayout(),
+                    checkpointInterval = 1) as writer:
+                writer.start(states[0][0])
+                for (state, move) in states[1:]:
+                    writer.recordMove(*move, state)
+
+            reader = replay.ReplayReader(replayPath)
+            self.assertEqual(len(states), len(reader.getCheckpointMoves()))
+
+            for (moveIndex, (state, move)) in enumerate(states):
+                loaded = reader.getState(moveIndex)
+
+                # The loaded state has the reader's own layout, so it is not equal to the original.
+                self.assertEqual(state._getCheckpoint(), loaded._getCheckpoint())
+                self.assertEqual(state.getAgentStates(), loaded.getAgentStates())
+                self.assertEqual(state.getFood(), loaded.getFood())
+                self.assertEqual(state.getScore(), loaded.getScore())
+                self.assertEqual(state.getCapsules(), loaded.getCapsules())
+                self.assertEqual(state.getLastFoodEaten(), loaded.getLastFoodEaten())
+                self.assertEqual(state.getLastAgentMoved(), loaded.getLastAgentMoved())
+
+                if (isinstance(state, capture.CaptureGameState)):
+                    self.assertEqual(state.getTimeleft(), loaded.getTimeleft())
+                    self.assertEqual(state.getRedFood(), loaded.getRedFood())
+                    self.assertEqual(state.getBlueCapsules(), loaded.getBlueCapsules())
+                    self.assertEqual(state.getBlueFoodCount(), loaded.getBlueFoodCount())
+
+            # Checkpoints are plain JSON.
+            payload = zlib.decompress(reader._checkpointPayloads[-1])
+            self.assertEqual(type(states[-1][0]).__name__, json.loads(payload)['type'])
+
+        os.remove(replayPath)
+
+def _playRandomly(state, count):
+    """
+    Get a list of (state, move), where each move led to its state (the first move is None).
+    """
+
+    rng = random.Random(140)
+
+    states = [(state, None)]
+    while (len(states) < count and not state.isOver()):
+        agentIndex = (len(states) - 1) % state.getNumAgents()
+        move = (agentIndex, rng.choice(state.getLegalActions(agentIndex)))
+        state = state.generateSuccessor(*move)
+        states.append((state, move))
+
+    return states
+
 if __name__ == '__main__':
     unittest.main()
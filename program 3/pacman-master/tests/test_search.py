@@ -0,0 +1,103 @@
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.search import cellsearch
+from pacai.core.search import heuristic
+from pacai.core.search.position import PositionSearchProblem
+
+# The goal (1, 1) is in the bottom left corner.
+TEST_LAYOUT = [
+    '%%%%%%',
+    '%....%',
+    '%.%%.%',
+    '%.%P.%',
+    '%%%%%%',
+]
+
+"""
+Test the cell id based search routines.
+"""
+class CellSearchTest(unittest.TestCase):
+    def test_search_small(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+
+        expected = [Directions.EAST, Directions.NORTH, Directions.NORTH, Directions.WEST,
+                Directions.WEST, Directions.WEST, Directions.SOUTH, Directions.SOUTH]
+
+        for search in (cellsearch.bfs, cellsearch.ucs, self._astar):
+            problem = PositionSearchProblem(state)
+            actions = search(problem)
+
+            self.assertEqual(expected, actions)
+            self.assertEqual(8, problem.actionsCost(actions))
+            self.assertTrue(problem.getExpandedCount() > 0)
+
+    def test_search_maze(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+
+        for search in (cellsearch.bfs, cellsearch.ucs, self._astar):
+            problem = PositionSearchProblem(state)
+            self.assertEqual(68, problem.actionsCost(search(problem)))
+
+    def test_search_costs(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+
+        # Make the top row very expensive, the only path still goes through it.
+        costFn = lambda position: 10 if (position[1] == 3) else 1
+        problem = PositionSearchProblem(state, costFn = costFn)
+        actions = cellsearch.ucs(problem)
+
+        self.assertEqual(8, len(actions))
+        self.assertEqual(44, problem.actionsCost(actions))
+
+    def test_search_unreachable(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+
+        for search in (cellsearch.bfs, cellsearch.ucs, self._astar):
+            problem = PositionSearchProblem(state, goal = (2, 2))
+            self.assertIsNone(search(problem))
+
+    def test_visit_history(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+
+        problem = PositionSearchProblem(state)
+        cellsearch.bfs(problem)
+        history = problem.getVisitHistory()
+
+        self.assertEqual((3, 1), history[0])
+        self.assertEqual((1, 1), history[-1])
+
+        problem = PositionSearchProblem(state, recordVisits = False)
+        cellsearch.bfs(problem)
+
+        self.assertEqual([], problem.getVisitHistory())
+        self.assertTrue(problem.getExpandedCount() > 0)
+
+    def test_successor_states(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+        problem = PositionSearchProblem(state)
+
+        expected = [((4, 1), Directions.EAST, 1)]
+        self.assertEqual(expected, problem.successorStates((3, 1)))
+
+        expected = [((1, 3), Directions.NORTH, 1), ((1, 1), Directions.SOUTH, 1)]
+        self.assertEqual(expected, problem.successorStates((1, 2)))
+
+        # Walls and positions off the board have no successors.
+        self.assertEqual([], problem.successorStates((0, 0)))
+        self.assertEqual([], problem.successorStates((-1, 100)))
+
+    def test_shared_maze_graph(self):
+        state = PacmanGameState(getLayout('tinyMaze'))
+        problem = PositionSearchProblem(state)
+
+        self.assertIs(state.getInitialLayout().getMazeGraph(), problem.getMazeGraph())
+
+    def _astar(self, problem):
+        return cellsearch.astar(problem, heuristic.manhattan)
+
+if __name__ == '__main__':
+    unittest.main()
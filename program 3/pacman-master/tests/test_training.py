@@ -0,0 +1,91 @@
+import unittest
+
+from pacai.agents.learning.reinforcement import ReinforcementAgent
+from pacai.bin import pacman
+from pacai.core import training
+
+"""
+Test training with multiple processes.
+"""
+class TrainingTest(unittest.TestCase):
+    def test_merge(self):
+        parameters = {'a': 1.0, 'b': 2.0}
+        changes = [{'a': 1.0, 'c': 4.0}, {'a': 3.0}]
+
+        merged = training.mergeChanges(parameters, changes)
+
+        self.assertEqual({'a': 3.0, 'c': 4.0}, merged)
+        self.assertEqual({'a': 3.0, 'b': 2.0, 'c': 4.0}, parameters)
+
+    def test_train(self):
+        for numActors in (1, 3):
+            agent = _CountingAgent(0, numTraining = 30)
+            results = training.train(agent, _runEpisode, 30, numActors, syncInterval = 5)
+
+            self.assertEqual(30, len(results))
+            self.assertEqual(30, agent.episodesSoFar)
+            self.assertEqual(30.0, agent.accumTrainRewards)
+            self.assertTrue(agent.isInTesting())
+
+            # Every actor plays 10 episodes (in 2 rounds), and changes are averaged.
+            expected = 30.0 / numActors
+            self.assertEqual(expected, agent.getParameters()['episodes'])
+
+    def test_pacman_training(self):
+        args = pacman.readCommand(['--null-graphics', '--quiet', '-l', 'smallGrid',
+                '-p', 'PacmanQAgent', '--num-training', '20', '-n', '21',
+                '--training-processes', '2'])
+        games = pacman.runGames(**args)
+
+        agent = args['pacman']
+        self.assertEqual(1, len(games))
+        self.assertTrue(agent.isInTesting())
+
+        # Learned states should reference the layout in this process (not a copy of it).
+        qValues = agent.getParameters()
+        self.assertTrue(len(qValues) > 0)
+        for (state, action) in qValues:
+            self.assertIs(args['layout'], state.getInitialLayout())
+
+    def test_unsupported_agent(self):
+        agent = _CountingAgent(0)
+        agent.parameters = None
+
+        self.assertRaises(ValueError, training.train, agent, _runEpisode, 10, 2)
+
+class _CountingAgent(ReinforcementAgent):
+    def __init__(self, index, **kwargs):
+        super().__init__(index, **kwargs)
+
+        self.parameters = {}
+
+    def getAction(self, state):
+        return None
+
+    def getParameters(self):
+        return self.parameters
+
+    def getQValue(self, state, action):
+        return 0.0
+
+    def getPolicy(self, state):
+        return None
+
+    def getValue(self, state):
+        return 0.0
+
+    def setParameters(self, parameters):
+        self.parameters = parameters
+
+    def update(self, state, action, nextState, reward):
+        self.parameters['episodes'] = self.parameters.get('episodes', 0.0) + 1.0
+
+def _runEpisode(agent):
+    agent.startEpisode()
+    agent.observeTransition(None, None, None, 1.0)
+    agent.stopEpisode()
+
+    return agent.index
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,6 @@
+import os
+import stat
+import tempfile
 import unittest
 
 from pacai.util import util
@@ -13,5 +16,16 @@ class UtilTest(unittest.TestCase):
         self.assertEquals(util.buildHash(1, 1), 23311)
         self.assertEquals(util.buildHash(1, 2), 23312)
 
+    def test_private_dirs(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'cache', 'pacai')
+            util.makePrivateDirs(path)
+
+            for dirPath in (os.path.join(root, 'cache'), path):
+                self.assertEqual(0o700, stat.S_IMODE(os.stat(dirPath).st_mode))
+
+            # Existing directories are fine.
+            util.makePrivateDirs(path)
+
 if __name__ == '__main__':
     unittest.main()